@@ -0,0 +1,89 @@
+"""Run the benchmarks of the projection hot paths or compare recorded runs.
+
+Examples:
+    python -m benchmarks run --sizes 1 1000 1000000 --filter Projector
+    python -m benchmarks compare --threshold 0.05
+"""
+from __future__ import annotations
+import argparse
+import sys
+
+from . import suite
+
+
+DEFAULT_HISTORY = "benchmark_history.json"
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parser().parse_args(argv)
+    if args.command=="run":
+        return _run(args)
+    return _compare(args)
+
+
+def _run(args: argparse.Namespace) -> int:
+    cases = [c for c in suite.cases(args.workers) if any(f in c.name for f in args.filter or [""])]
+    if not cases:
+        print("No benchmark matches the filter.", file=sys.stderr)
+        return 1
+    print(f"{'case':<48}{'points':>10}{'points/s':>14}{'peak memory':>14}{'efficiency':>12}")
+    results = suite.run(cases, args.sizes, args.repeat, args.min_time, report=_print_result)
+    for r in results:
+        if r.efficiency is not None:
+            print(f"scaling efficiency of {r.case} for {r.size} points: {r.efficiency:.2f}")
+    if not args.no_record:
+        suite.record(results, args.history)
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    runs = suite.load(args.history)
+    try:
+        baseline, current = runs[args.baseline], runs[args.current]
+    except IndexError:
+        print(f"History '{args.history}' has {len(runs)} run(s), cannot compare runs {args.baseline} and {args.current}.", file=sys.stderr)
+        return 1
+    comparisons = suite.compare(baseline, current, args.threshold)
+    print(f"baseline {baseline['timestamp']} ({baseline['commit']}), current {current['timestamp']} ({current['commit']})")
+    print(f"{'case':<48}{'points':>10}{'throughput':>12}{'memory':>10}")
+    for c in comparisons:
+        flag = "  REGRESSION" if c.regression else ""
+        print(f"{c.case:<48}{c.size:>10}{c.throughput_ratio:>12.2f}{c.memory_ratio:>10.2f}{flag}")
+    regressions = sum(c.regression for c in comparisons)
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%} in {len(comparisons)} compared result(s).")
+    return 1 if regressions else 0
+
+
+def _print_result(r: suite.Result) -> None:
+    efficiency = "" if r.efficiency is None else f"{r.efficiency:.2f}"
+    print(f"{r.case:<48}{r.size:>10}{r.throughput:>14.4g}{_bytes(r.peak_bytes):>14}{efficiency:>12}", flush=True)
+
+
+def _bytes(n: int) -> str:
+    for unit in ("B", "kB", "MB"):
+        if n<1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help=f"JSON file with the recorded runs, '{DEFAULT_HISTORY}' by default")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="measure the benchmarks and append the results to the history")
+    run.add_argument("--sizes", type=lambda s: int(float(s)), nargs="+", default=suite.SIZES, help="numbers of points, 1 to 1e7 by default")
+    run.add_argument("--filter", nargs="+", help="run only the cases with names containing any of the strings")
+    run.add_argument("--workers", type=int, nargs="+", help="numbers of workers of the parallel cases, powers of two up to the number of cores by default")
+    run.add_argument("--repeat", type=int, default=3, help="number of measurements of which the best is taken")
+    run.add_argument("--min-time", type=float, default=0.1, help="minimum duration of a measurement in seconds")
+    run.add_argument("--no-record", action="store_true", help="do not append the results to the history")
+    compare = commands.add_parser("compare", help="compare two recorded runs, exit with status 1 on regressions")
+    compare.add_argument("--baseline", type=int, default=-2, help="index of the baseline run in the history, the one before the last by default")
+    compare.add_argument("--current", type=int, default=-1, help="index of the compared run in the history, the last by default")
+    compare.add_argument("--threshold", type=float, default=suite.THRESHOLD, help="relative change reported as a regression")
+    return parser
+
+
+if __name__=="__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,331 @@
+"""Benchmarks of the projection hot paths, their history and comparison of runs.
+
+Every case is measured for a number of points. The scalar cases (`Point` and the point-wise functions) loop
+over the points in Python, the batch cases pass all the points in a single call. The result holds the best
+time of several calls, the throughput in points per second and the peak of the memory allocated during a call,
+measured by `tracemalloc` in a separate call (numpy reports its buffers to it, the memory of worker processes
+and shared memory blocks is not included). A `Point` caches its angles and distance from the origin, hence the
+cases of its attributes and of the rotations construct the points in the timed call, and their times include
+that of the `Point` case.
+
+The parallel cases project the points with 1, 2, 4, ... worker processes and report the scaling efficiency,
+i.e., the throughput divided by the number of workers and by the throughput of a single worker.
+
+The runs are appended to a JSON history. Two runs are compared case by case, and a drop of the throughput
+or a growth of the peak memory beyond a threshold is reported as a regression.
+"""
+from __future__ import annotations
+from math import pi, inf
+from typing import Callable, Iterable
+import contextlib
+import dataclasses
+import datetime
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+
+from conicsp import Point, PointArray, Projector, limit_azimuth, rot_xy, rot_yz, vectorized
+from conicsp.parallel import ParallelProjector
+
+
+SIZES = (1, 100, 10_000, 1_000_000, 10_000_000)
+# the scalar cases loop in Python, which takes seconds already for a million points
+SCALAR_MAX_SIZE = 100_000
+PARALLEL_MIN_SIZE = 100_000
+LAMBDAS = {"negative": -1.5, "below_one": 0.7, "one": 1.0, "above_one": 2.0}
+THRESHOLD = 0.1
+# differences of the peak memory below this are noise of the interpreter allocations
+MEMORY_SLACK = 64*1024
+
+Setup = Callable[[int, contextlib.ExitStack], Callable[[], object]]
+
+
+@dataclasses.dataclass(frozen=True)
+class Case:
+    """Benchmarked operation. The setup prepares the data for the given number of points and returns the timed call."""
+    name: str
+    setup: Setup
+    scalar: bool = False
+    workers: int | None = None
+
+    def sizes(self, sizes: Iterable[int]) -> list[int]:
+        if self.scalar:
+            return [n for n in sizes if n<=SCALAR_MAX_SIZE]
+        if self.workers is not None:
+            return [n for n in sizes if n>=PARALLEL_MIN_SIZE]
+        return list(sizes)
+
+
+@dataclasses.dataclass
+class Result:
+    case: str
+    size: int
+    seconds: float
+    throughput: float
+    peak_bytes: int
+    efficiency: float | None = None
+
+
+@dataclasses.dataclass(frozen=True)
+class Comparison:
+    case: str
+    size: int
+    throughput_ratio: float
+    memory_ratio: float
+    regression: bool
+
+
+def cases(workers: Iterable[int] | None = None) -> list[Case]:
+    """All the benchmarked cases, with parallel cases for the given numbers of workers (1, 2, 4, ... cores by default)."""
+    if workers is None:
+        cpus = os.cpu_count() or 1
+        workers = [2**k for k in range(cpus.bit_length()) if 2**k<=cpus]
+    result = [
+        Case("Point", _point, scalar=True),
+        Case("PointArray.from_xyz", _point_array),
+        Case("Point.omega", _point_attribute("omega"), scalar=True),
+        Case("Point.phi", _point_attribute("phi"), scalar=True),
+        Case("Point.r", _point_attribute("r"), scalar=True),
+        Case("PointArray.omega", _point_array_attribute("omega")),
+        Case("PointArray.phi", _point_array_attribute("phi")),
+        Case("PointArray.r", _point_array_attribute("r")),
+        Case("Projector.kappa", _kappa, scalar=True),
+        Case("Projector.kappa[array]", _kappa_array),
+        Case("limit_azimuth", _limit_azimuth, scalar=True),
+        Case("vectorized.limit_azimuth", _limit_azimuth_array),
+        Case("rot_xy", _rotation(rot_xy), scalar=True),
+        Case("rot_yz", _rotation(rot_yz), scalar=True),
+        Case("vectorized.rot_xy", _rotation_array(vectorized.rot_xy)),
+        Case("vectorized.rot_yz", _rotation_array(vectorized.rot_yz)),
+    ]
+    for label, lambda_ in LAMBDAS.items():
+        result.append(Case(f"Projector.point[{label}]", _projection(lambda_), scalar=True))
+        result.append(Case(f"Projector.point_array[{label}]", _projection_array(lambda_)))
+    for w in workers:
+        result.append(Case(f"ParallelProjector.point_array[workers={w}]", _parallel_projection(w), workers=w))
+    return result
+
+
+def run(
+    cases: Iterable[Case],
+    sizes: Iterable[int] = SIZES,
+    repeat: int = 3,
+    min_time: float = 0.1,
+    report: Callable[[Result], None] | None = None
+) -> list[Result]:
+    """Measure the cases for each of the sizes. Each result is passed to `report` as soon as it is measured."""
+    results = []
+    for case in cases:
+        for n in case.sizes(sizes):
+            result = _measure(case, n, repeat, min_time)
+            results.append(result)
+            if report is not None:
+                report(result)
+    _set_efficiency(results, {case.name: case.workers for case in cases if case.workers is not None})
+    return results
+
+
+def record(results: list[Result], path: str) -> dict:
+    """Append a run with the results to the JSON history in the file, which is created if missing. Return the run."""
+    run_ = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": [dataclasses.asdict(r) for r in results],
+    }
+    history = load(path)
+    history.append(run_)
+    temporary = path + ".tmp"
+    with open(temporary, "w") as file:
+        json.dump({"runs": history}, file, indent=1)
+    os.replace(temporary, path)
+    return run_
+
+
+def load(path: str) -> list[dict]:
+    """Runs recorded in the JSON history, oldest first. Empty if the file does not exist."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return json.load(file)["runs"]
+
+
+def compare(baseline: dict, current: dict, threshold: float = THRESHOLD) -> list[Comparison]:
+    """Compare the results of the cases measured in both runs.
+
+    A regression is a throughput lower by more than the `threshold` fraction of the baseline
+    or a peak memory higher by more than that fraction (and more than `MEMORY_SLACK` bytes).
+    """
+    if threshold<0:
+        raise ValueError("Threshold must not be negative.")
+    previous = {(r["case"], r["size"]): r for r in baseline["results"]}
+    comparisons = []
+    for r in current["results"]:
+        b = previous.get((r["case"], r["size"]))
+        if b is None:
+            continue
+        throughput_ratio = r["throughput"]/b["throughput"]
+        memory_ratio = r["peak_bytes"]/b["peak_bytes"] if b["peak_bytes"]>0 else 1.0
+        slower = throughput_ratio < 1 - threshold
+        larger = r["peak_bytes"] > (1 + threshold)*b["peak_bytes"] and r["peak_bytes"] - b["peak_bytes"] > MEMORY_SLACK
+        comparisons.append(Comparison(r["case"], r["size"], throughput_ratio, memory_ratio, slower or larger))
+    return comparisons
+
+
+def _measure(case: Case, n: int, repeat: int, min_time: float) -> Result:
+    with contextlib.ExitStack() as stack:
+        call = case.setup(n, stack)
+        # the first call measures the memory and warms up caches and pools of workers
+        tracemalloc.start()
+        start = time.perf_counter()
+        call()
+        first = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        # a single call is enough for the calls taking long
+        best = inf
+        for _ in range(repeat if first<1.0 else 1):
+            calls, start = 0, time.perf_counter()
+            while True:
+                call()
+                calls += 1
+                elapsed = time.perf_counter() - start
+                if elapsed>=min_time:
+                    break
+            best = min(best, elapsed/calls)
+    return Result(case.name, n, best, n/best, peak)
+
+
+def _set_efficiency(results: list[Result], workers: dict[str,int]) -> None:
+    single = {r.size: r.throughput for r in results if workers.get(r.case)==1}
+    for r in results:
+        if r.case in workers and r.size in single:
+            r.efficiency = r.throughput/(workers[r.case]*single[r.size])
+
+
+def _commit() -> str | None:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def _xyz(n: int) -> np.ndarray:
+    return np.random.default_rng(0).normal(size=(n,3))
+
+
+def _points(n: int) -> list[Point]:
+    return [Point(*p) for p in _coordinates(n)]
+
+
+def _coordinates(n: int) -> list[tuple[float,float,float,int]]:
+    rng = np.random.default_rng(0)
+    return [(*p, r) for p, r in zip(_xyz(n).tolist(), rng.integers(-2, 3, n).tolist())]
+
+
+def _point_array_of(n: int) -> PointArray:
+    return PointArray.from_xyz(_xyz(n), np.random.default_rng(0).integers(-2, 3, n))
+
+
+def _point(n: int, stack: contextlib.ExitStack) -> Callable[[], object]:
+    coordinates = _xyz(n).tolist()
+    return lambda: [Point(x, y, z) for x, y, z in coordinates]
+
+
+def _point_array(n: int, stack: contextlib.ExitStack) -> Callable[[], object]:
+    xyz = _xyz(n)
+    return lambda: PointArray.from_xyz(xyz)
+
+
+def _point_attribute(name: str) -> Setup:
+    def setup(n: int, stack: contextlib.ExitStack) -> Callable[[], object]:
+        coordinates = _coordinates(n)
+        return lambda: [getattr(Point(*p), name) for p in coordinates]
+    return setup
+
+
+def _point_array_attribute(name: str) -> Setup:
+    def setup(n: int, stack: contextlib.ExitStack) -> Callable[[], object]:
+        points = _point_array_of(n)
+        return lambda: getattr(points, name)
+    return setup
+
+
+def _kappa(n: int, stack: contextlib.ExitStack) -> Callable[[], object]:
+    projector = Projector(2.0)
+    xyz = _xyz(n)
+    arguments = list(zip(xyz[:,0].tolist(), np.hypot(xyz[:,1], xyz[:,2]).tolist()))
+    return lambda: [projector.kappa(x, radius) for x, radius in arguments]
+
+
+def _kappa_array(n: int, stack: contextlib.ExitStack) -> Callable[[], object]:
+    projector = Projector(2.0)
+    xyz = _xyz(n)
+    x, radius = xyz[:,0], np.hypot(xyz[:,1], xyz[:,2])
+    return lambda: projector.kappa(x, radius)
+
+
+def _azimuths(n: int) -> np.ndarray:
+    return np.random.default_rng(0).uniform(-6*pi, 6*pi, n)
+
+
+def _limit_azimuth(n: int, stack: contextlib.ExitStack) -> Callable[[], object]:
+    phi = _azimuths(n).tolist()
+    return lambda: [limit_azimuth(p, 4*pi) for p in phi]
+
+
+def _limit_azimuth_array(n: int, stack: contextlib.ExitStack) -> Callable[[], object]:
+    phi = _azimuths(n)
+    return lambda: vectorized.limit_azimuth(phi, 4*pi)
+
+
+def _rotation(rotate: Callable[[Point, float], Point]) -> Setup:
+    def setup(n: int, stack: contextlib.ExitStack) -> Callable[[], object]:
+        coordinates = _coordinates(n)
+        return lambda: [rotate(Point(*p), 0.7) for p in coordinates]
+    return setup
+
+
+def _rotation_array(rotate: Callable) -> Setup:
+    def setup(n: int, stack: contextlib.ExitStack) -> Callable[[], object]:
+        points = _point_array_of(n)
+        if rotate is vectorized.rot_xy:
+            return lambda: rotate(points.x, points.y, points.z, 0.7)
+        return lambda: rotate(points.y, points.z, 0.7)
+    return setup
+
+
+def _projection(lambda_: float) -> Setup:
+    def setup(n: int, stack: contextlib.ExitStack) -> Callable[[], object]:
+        projector, points = Projector(lambda_), _points(n)
+        return lambda: [projector.point(p, 0.3) for p in points]
+    return setup
+
+
+def _projection_array(lambda_: float) -> Setup:
+    def setup(n: int, stack: contextlib.ExitStack) -> Callable[[], object]:
+        projector, points = Projector(lambda_), _point_array_of(n)
+        return lambda: projector.point_array(points, 0.3)
+    return setup
+
+
+def _parallel_projection(workers: int) -> Setup:
+    def setup(n: int, stack: contextlib.ExitStack) -> Callable[[], object]:
+        projector = stack.enter_context(ParallelProjector(Projector(2.0), workers, chunk_size=max(n//(4*workers), 1)))
+        points = _point_array_of(n)
+        return lambda: projector.point_array(points, 0.3)
+    return setup
@@ -1,2 +1,2 @@
-from .projection import Projector, Point
-from .projection import rot_yz, rot_xy, limit_azimuth
\ No newline at end of file
+from .projection import Projector, ProjectionPlan, Point, PointArray
+from .projection import rot_yz, rot_xy, limit_azimuth
@@ -0,0 +1,103 @@
+"""Project a stream of points read from a file or the standard input.
+
+Example:
+    python -m conicsp points.csv -o images.csv --lambda 2 --base 0.5
+"""
+from __future__ import annotations
+from typing import Iterator
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+from .projection import Projector, PointArray
+from .storage import PointFile, PointFileWriter
+from .stream import (
+    DEFAULT_CHUNK_SIZE,
+    StreamStats,
+    project_chunks,
+    read_binary,
+    read_text,
+    write_binary,
+    write_text,
+)
+
+
+FORMATS = ("csv", "txt", "bin", "csp")
+STDIO = "-"
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parser().parse_args(argv)
+    input_format = args.input_format or _format_from_path(args.input)
+    if args.output_format is not None:
+        output_format = args.output_format
+    elif args.output==STDIO and input_format!="csp":
+        output_format = input_format
+    else:
+        output_format = _format_from_path(args.output)
+    if (input_format=="csp" and args.input==STDIO) or (output_format=="csp" and args.output==STDIO):
+        _parser().error("point files (csp) cannot be read from standard input or written to standard output")
+    stats = StreamStats()
+    start = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        source = _open(stack, args.input, input_format, "r")
+        target = _open(stack, args.output, output_format, "w")
+        if input_format=="csp":
+            chunks: Iterator[PointArray] = _read_point_file(source, stats)
+        elif input_format=="bin":
+            chunks = read_binary(source, args.chunk_size, args.rev, stats)
+        else:
+            chunks = read_text(source, args.chunk_size, "," if input_format=="csv" else None, stats)
+        for images in project_chunks(chunks, Projector(args.lambda_), args.base, stats):
+            if output_format=="csp":
+                target.write(images)
+            elif output_format=="bin":
+                write_binary(target, images)
+            else:
+                write_text(target, images, "," if output_format=="csv" else None)
+        if output_format!="csp":
+            target.flush()
+    stats.seconds = time.perf_counter() - start
+    if not args.quiet:
+        print(stats, file=sys.stderr)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m conicsp", description=__doc__.splitlines()[0])
+    parser.add_argument("input", nargs="?", default=STDIO, help="input file, standard input if omitted or '-'")
+    parser.add_argument("-o", "--output", default=STDIO, help="output file, standard output if omitted or '-'")
+    parser.add_argument("--lambda", dest="lambda_", type=float, default=1.0, help="lambda of the projection")
+    parser.add_argument("--base", type=float, default=0.0, help="base plane angle")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="number of points projected at once, csp input keeps its own chunks")
+    parser.add_argument("--input-format", choices=FORMATS, help="input format, derived from the file extension by default")
+    parser.add_argument("--output-format", choices=FORMATS, help="output format, derived from the file extension by default, standard output takes the input format (txt for csp)")
+    parser.add_argument("--rev", action="store_true", help="binary input contains revolutions as the fourth value of each point")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print throughput statistics")
+    return parser
+
+
+def _format_from_path(path: str) -> str:
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    return extension if extension in FORMATS else "txt"
+
+
+def _open(stack: contextlib.ExitStack, path: str, format: str, mode: str):
+    if format=="csp":
+        return stack.enter_context(PointFile(path) if mode=="r" else PointFileWriter(path))
+    binary = format=="bin"
+    if path==STDIO:
+        stdio = sys.stdin if mode=="r" else sys.stdout
+        return stdio.buffer if binary else stdio
+    return stack.enter_context(open(path, mode + "b" if binary else mode))
+
+
+def _read_point_file(points: PointFile, stats: StreamStats) -> Iterator[PointArray]:
+    for chunk in points:
+        stats.bytes_read += chunk.nbytes
+        yield chunk
+
+
+if __name__=="__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,151 @@
+"""Index of source points by angles for queries of the points whose images lie in a window of angles.
+
+The projection keeps the distance of a point from the x axis and rotates the point within its plane only when
+its azimuth phi is changed by `limit_azimuth`. The plane of the point is turned to the angle omega/kappa
+from the base plane, where omega and phi are those of the point aligned to the base plane. Kappa depends only
+on the angle a = acos(x/r) between the point and the x axis and is monotone in it (for |lambda|<1 only while
+a < |lambda|*pi). The limited azimuth is either the azimuth itself or +-pi.
+
+The index keeps the points in buckets given by their revolutions, the angle of their plane measured
+from the plane y=0 and the angle a, none of which depends on the projection. For a window of image angles,
+the bounds of the image angles of each bucket are derived from the bounds of its source angles, and only
+the points of the buckets that can reach the window are projected and filtered exactly.
+"""
+from __future__ import annotations
+from math import pi
+from typing import Iterable
+
+import numpy as np
+import numpy.typing as npt
+
+from . import vectorized
+from .interval import limit_azimuth, hull, kappa_of_angle, omega_of_plane
+from .projection import Projector, Point, PointArray
+
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+
+
+DEFAULT_BINS = 64
+# the bounds of the buckets are widened to cover rounding errors
+_MARGIN = 1e-9
+
+
+class AngularIndex:
+    """Points sorted into buckets by revolutions, `plane_bins` intervals of the angle of their plane
+    and `azimuth_bins` intervals of the angle between the point and the x axis.
+    """
+
+    def __init__(
+        self,
+        points: PointArray | Iterable[Point],
+        plane_bins: int = DEFAULT_BINS,
+        azimuth_bins: int = DEFAULT_BINS
+    ) -> None:
+        points = points if isinstance(points, PointArray) else PointArray.from_points(points)
+        plane, azimuth = _source_angles(points)
+        plane_bin = np.minimum(((plane + pi)/(2*pi)*plane_bins).astype(np.int64), plane_bins-1)
+        azimuth_bin = np.minimum((azimuth/pi*azimuth_bins).astype(np.int64), azimuth_bins-1)
+        order = np.lexsort((azimuth_bin, plane_bin, points.rev))
+        self._points = points[order]
+        self._ids = order
+        bucket = np.column_stack((points.rev[order], plane_bin[order], azimuth_bin[order]))
+        self._starts = np.flatnonzero(np.any(np.diff(bucket, axis=0, prepend=bucket[:1]-1), axis=1))
+        self._counts = np.diff(np.append(self._starts, len(order)))
+        plane, azimuth = plane[order], azimuth[order]
+        self._rev = points.rev[order][self._starts].astype(np.int64)
+        if len(order):
+            self._plane = np.minimum.reduceat(plane, self._starts), np.maximum.reduceat(plane, self._starts)
+            self._azimuth = np.minimum.reduceat(azimuth, self._starts), np.maximum.reduceat(azimuth, self._starts)
+        else:
+            self._plane = self._azimuth = (np.empty(0), np.empty(0))
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    @property
+    def n_buckets(self) -> int:
+        return len(self._starts)
+
+    def candidates(
+        self,
+        projector: Projector,
+        omega: tuple[float,float],
+        phi: tuple[float,float],
+        base: float = 0.0
+    ) -> IntArray:
+        """Indices of the points of the buckets whose images can lie in the window of angles."""
+        omega_low, omega_high = self._image_omega_bounds(projector, base)
+        phi_low, phi_high = self._image_phi_bounds(projector, base)
+        hit = (omega_low<=omega[1]) & (omega_high>=omega[0]) & (phi_low<=phi[1]) & (phi_high>=phi[0])
+        starts, counts = self._starts[hit], self._counts[hit]
+        positions = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(int(counts.sum()))
+        return positions
+
+    def query(
+        self,
+        projector: Projector,
+        omega: tuple[float,float],
+        phi: tuple[float,float],
+        base: float = 0.0
+    ) -> IntArray:
+        """Indices (in the indexed point array) of the points whose images have the angle of their plane
+        omega/kappa within the interval `omega` and limited azimuth within the interval `phi`.
+
+        Both angles are measured with respect to the base plane.
+        """
+        positions = self.candidates(projector, omega, phi, base)
+        image_omega, image_phi = image_angles(self._points[positions], projector, base)
+        inside = (image_omega>=omega[0]) & (image_omega<=omega[1]) & (image_phi>=phi[0]) & (image_phi<=phi[1])
+        return np.sort(self._ids[positions[inside]])
+
+    def _image_omega_bounds(self, projector: Projector, base: float) -> tuple[FloatArray, FloatArray]:
+        low, high = omega_of_plane(self._plane, base)
+        # points on the x axis have omega zero
+        on_axis = (self._azimuth[0]<=_MARGIN) | (self._azimuth[1]>=pi-_MARGIN)
+        low, high = np.where(on_axis, np.minimum(low, 0.0), low), np.where(on_axis, np.maximum(high, 0.0), high)
+        a = np.maximum(self._azimuth[0] - _MARGIN, 0.0), np.minimum(self._azimuth[1] + _MARGIN, pi)
+        kappa_low, kappa_high = hull(kappa_of_angle(projector, a), (np.ones(len(a[0])), np.ones(len(a[0]))), on_axis)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratios = np.stack((low/kappa_low, low/kappa_high, high/kappa_low, high/kappa_high))
+        unbounded = ~(kappa_low>0) | np.any(np.isnan(ratios), axis=0)
+        return np.where(unbounded, -np.inf, ratios.min(axis=0)), np.where(unbounded, np.inf, ratios.max(axis=0))
+
+    def _image_phi_bounds(self, projector: Projector, base: float) -> tuple[FloatArray, FloatArray]:
+        plane_low, plane_high = omega_of_plane(self._plane, base)
+        on_axis = (self._azimuth[0]<=_MARGIN) | (self._azimuth[1]>=pi-_MARGIN)
+        # the azimuth is positive for points with y>=0 in the base aligned frame, i.e., |omega|<=pi/2
+        positive = (plane_low<=pi/2) & (plane_high>=-pi/2) | on_axis
+        negative = (plane_low<-pi/2) | (plane_high>pi/2) | on_axis
+        turns = 2*pi*self._rev
+        a_low, a_high = self._azimuth[0] - _MARGIN, self._azimuth[1] + _MARGIN
+        gamma = 2*pi*projector.lambda_
+        low, high = np.full(self.n_buckets, np.inf), np.full(self.n_buckets, -np.inf)
+        for sign, present in ((1, positive), (-1, negative)):
+            lo, hi = (turns + a_low, turns + a_high) if sign==1 else (turns - a_high, turns - a_low)
+            image_low, image_high = limit_azimuth((lo, hi), gamma)
+            low = np.where(present, np.minimum(low, image_low), low)
+            high = np.where(present, np.maximum(high, image_high), high)
+        return low, high
+
+
+def image_angles(points: PointArray, projector: Projector, base: float = 0.0) -> tuple[FloatArray, FloatArray]:
+    """Angle of the plane (omega/kappa) and the limited azimuth of the images of the points,
+    both measured with respect to the base plane.
+    """
+    aligned = vectorized.align(points.x, points.y, points.z, points.rev, base, projector.kappa_table is None)
+    kappa = vectorized.aligned_kappa(aligned, projector.lambda_, projector.kappa_table)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        omega = aligned.omega/kappa
+    return omega, vectorized.limit_azimuth(aligned.phi, 2*pi*projector.lambda_)
+
+
+def _source_angles(points: PointArray) -> tuple[FloatArray, FloatArray]:
+    # angle of the plane of the point measured from the plane y=0 and the angle between the point and the x axis
+    plane = np.arctan2(points.z, points.y)
+    r = np.sqrt(points.x**2 + points.y**2 + points.z**2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        azimuth = np.arccos(np.clip(points.x/r, -1.0, 1.0))
+    azimuth[r==0] = 0.0
+    return plane, azimuth
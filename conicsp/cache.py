@@ -0,0 +1,340 @@
+"""Cache of the images of points, for workloads projecting the same or nearly the same points repeatedly.
+
+The images are keyed by the coordinates of the point rounded to multiples of `quantum` (`TOLERANCE` by default),
+its revolutions, the base plane angle and the projection (lambda and the maximum error of the kappa table).
+A point is thus given the image of the first projected point in the same cell of the grid of the quantum,
+which lies closer than the quantum times the square root of three. Points with coordinates too large for
+the rounded coordinates to fit in the key, and points with non-finite coordinates, are projected
+without the cache.
+
+The images are kept in an open addressing hash table of numpy arrays, so that a batch of points is looked up
+by array operations. Scalar lookups go through a dict mapping the packed keys to the slots of the table.
+When the estimated size of the cache exceeds its byte budget, the least recently used images are evicted
+down to seven eighths of the budget, so that the cost of finding them is amortized over many insertions.
+The cache can be shared by several threads and several projectors.
+"""
+from __future__ import annotations
+from math import isfinite
+import dataclasses
+import struct
+import threading
+
+import numpy as np
+import numpy.typing as npt
+
+from .projection import Projector, Point, PointArray, TOLERANCE
+
+
+DEFAULT_MAX_BYTES = 64*1024**2
+# memory taken by a single image in the table at its lowest load and by its key in the dict of scalar lookups
+ENTRY_BYTES = 512
+
+# Keys are the rounded coordinates and the revolutions with the id of the context, i.e., of the base angle
+# and the projection, as four 64-bit words. The ids are kept in a dict, which is cleared with the images
+# when it grows to MAX_CONTEXTS contexts.
+_KEY = struct.Struct("<qqqq")
+_WORDS = 4
+_KEY_FACTORS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93], dtype=np.uint64)
+MAX_CONTEXTS = 2**16
+# rounded coordinates must fit in the 64-bit words
+_MAX_ROUNDED = 2.0**62
+_EMPTY, _FULL, _DELETED = 0, 1, 2
+_MIN_CAPACITY = 64
+
+
+@dataclasses.dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits/lookups if lookups>0 else 0.0
+
+
+class ProjectionCache:
+    """LRU cache of the images of points with an estimated size of at most `max_bytes`."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, quantum: float = TOLERANCE) -> None:
+        if max_bytes<ENTRY_BYTES:
+            raise ValueError(f"Byte budget must allow for at least a single image of {ENTRY_BYTES} bytes.")
+        if quantum<=0:
+            raise ValueError("Quantum must be positive.")
+        self._max_entries = max_bytes // ENTRY_BYTES
+        self._kept_entries = max(self._max_entries - self._max_entries//8, 1)
+        self._quantum = quantum
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        # the generation of the contexts changes when their ids are reassigned
+        self._generation = 0
+        self._reset()
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            n = self._n_full
+            return CacheStats(self._hits, self._misses, self._evictions, n, n*ENTRY_BYTES)
+
+    def __len__(self) -> int:
+        return self._n_full
+
+    def clear(self) -> None:
+        """Remove all the images. The statistics are kept."""
+        with self._lock:
+            self._reset()
+
+    def point(self, projector: Projector, point: Point, base: float = 0.0) -> Point:
+        """Image of the point projected by the projector, see `Projector.point`."""
+        q, m = self._quantum, _MAX_ROUNDED
+        x, y, z = point.x/q, point.y/q, point.z/q
+        # the comparisons fail for NaN
+        if not (-m<x<m and -m<y<m and -m<z<m and isfinite(base)):
+            with self._lock:
+                self._misses += 1
+            return projector.point(point, base)
+        x, y, z = round(x), round(y), round(z)
+        with self._lock:
+            # scalar lookups tend to repeat the projector and the base angle
+            last_projector, last_base, context = self._last_context
+            if projector is not last_projector or base!=last_base:
+                context = self._context(base, projector)
+                self._last_context = projector, base, context
+            key = _KEY.pack(x, y, z, point.rev << 32 | context)
+            generation = self._generation
+            slot = self._slots.get(key)
+            if slot is not None:
+                self._used[slot] = self._clock
+                self._clock += 1
+                self._hits += 1
+                images = self._images
+                image = Point(images.item(slot, 0), images.item(slot, 1), images.item(slot, 2), self._revs.item(slot))
+            else:
+                self._misses += 1
+        if slot is not None:
+            return image
+        projected = projector.point(point, base)
+        keys = np.frombuffer(key, dtype="<u8").reshape(1, _WORDS)
+        with self._lock:
+            # another thread may have inserted the image meanwhile
+            if generation==self._generation and key not in self._slots:
+                self._insert(keys, _hash(keys), np.array([projected.xyz]), np.array([projected.rev]))
+        return projected
+
+    def point_array(self, projector: Projector, points: PointArray, base: npt.ArrayLike = 0.0) -> PointArray:
+        """Images of the points projected by the projector, see `Projector.point_array`.
+
+        The images found in the cache are taken from it, the other points are projected in a single batch.
+        """
+        base = np.asarray(base, dtype=np.float64)
+        images = PointArray.empty(len(points), points.dtype)
+        with self._lock:
+            keys, cacheable = self._keys(projector, points, base)
+            generation = self._generation
+            hashes = _hash(keys)
+            if cacheable.all():
+                slots = self._find(keys, hashes)
+            else:
+                slots = np.full(len(points), -1, dtype=np.int64)
+                slots[cacheable] = self._find(keys[cacheable], hashes[cacheable])
+            hits = slots>=0
+            found = slots[hits]
+            n_hits = len(found)
+            cached = np.take(self._images, found, axis=0)
+            revs = np.take(self._revs, found)
+            self._used[found] = self._clock + np.arange(n_hits)
+            self._clock += n_hits
+            self._hits += n_hits
+            self._misses += len(points) - n_hits
+        if n_hits==len(points):
+            images.x[:], images.y[:], images.z[:] = cached.T
+            images.rev[:] = revs
+        elif n_hits:
+            images.x[hits], images.y[hits], images.z[hits] = cached.T
+            images.rev[hits] = revs
+
+        missing = ~hits
+        if n_hits<len(points):
+            projected = projector.point_array(points[missing], base if base.ndim==0 else base[missing])
+            images.x[missing], images.y[missing], images.z[missing] = projected.x, projected.y, projected.z
+            images.rev[missing] = projected.rev
+            # each missing key is inserted once, with the image of its first point
+            new = cacheable[missing]
+            _, first = np.unique(keys[missing][new], axis=0, return_index=True)
+            first = np.flatnonzero(new)[first]
+            new_keys, new_hashes = keys[missing][first], hashes[missing][first]
+            new_images = np.column_stack((projected.x[first], projected.y[first], projected.z[first]))
+            with self._lock:
+                if generation!=self._generation:
+                    return images
+                # other threads may have inserted some of the images meanwhile
+                absent = self._find(new_keys, new_hashes)<0
+                self._insert(new_keys[absent], new_hashes[absent], new_images[absent], projected.rev[first][absent])
+        return images
+
+    def _keys(
+        self,
+        projector: Projector,
+        points: PointArray,
+        base: npt.NDArray[np.float64]
+    ) -> tuple[npt.NDArray[np.uint64], npt.NDArray[np.bool_]]:
+        # keys as rows of words and the mask of the points which can be cached
+        n = len(points)
+        keys = np.empty((n, _WORDS), dtype="<u8")
+        cacheable = np.full(n, np.all(np.isfinite(base)))
+        if base.ndim==0:
+            context: int | npt.NDArray[np.int64] = self._context(float(base), projector) if cacheable.all() else 0
+        else:
+            cacheable = np.isfinite(base)
+            values, inverse = np.unique(np.where(cacheable, base, 0.0), return_inverse=True)
+            if len(values)>MAX_CONTEXTS:
+                return keys, np.zeros(n, dtype=bool)
+            if len(self._contexts) + len(values)>MAX_CONTEXTS:
+                self._reset()
+            context = np.array([self._context(value, projector) for value in values.tolist()])[inverse]
+        with np.errstate(invalid="ignore"):
+            for k, coordinate in enumerate((points.x, points.y, points.z)):
+                rounded = np.rint(coordinate.astype(np.float64)/self._quantum)
+                cacheable &= np.abs(rounded)<_MAX_ROUNDED
+                # the words of the points which cannot be cached are arbitrary
+                keys[:,k] = rounded.astype(np.int64).view(np.uint64)
+        keys[:,3] = (points.rev.astype(np.int64) << 32 | context).view(np.uint64)
+        return keys, cacheable
+
+    def _context(self, base: float, projector: Projector) -> int:
+        context = (base, *_projection(projector))
+        id_ = self._contexts.get(context)
+        if id_ is None:
+            if len(self._contexts)>=MAX_CONTEXTS:
+                self._reset()
+            id_ = self._contexts[context] = len(self._contexts)
+        return id_
+
+    def _reset(self) -> None:
+        self._allocate(_MIN_CAPACITY)
+        self._contexts: dict[tuple[float,float,float], int] = {}
+        self._last_context: tuple[Projector | None, float, int] = None, 0.0, 0
+        self._generation += 1
+
+    def _allocate(self, capacity: int) -> None:
+        self._state = np.zeros(capacity, dtype=np.uint8)
+        self._hashes = np.zeros(capacity, dtype=np.uint64)
+        self._table_keys = np.zeros((capacity, _WORDS), dtype="<u8")
+        self._images = np.zeros((capacity, 3), dtype=np.float64)
+        self._revs = np.zeros(capacity, dtype=np.int32)
+        self._used = np.zeros(capacity, dtype=np.int64)
+        self._slots: dict[bytes, int] = {}
+        self._n_full = 0
+        self._n_deleted = 0
+        self._clock = 0
+
+    def _find(self, keys: npt.NDArray[np.uint64], hashes: npt.NDArray[np.uint64]) -> npt.NDArray[np.int64]:
+        # slots of the keys, -1 for the keys not in the table, by linear probing of all the keys at once
+        slots = np.full(len(keys), -1, dtype=np.int64)
+        mask = np.uint64(len(self._state) - 1)
+        pending = np.arange(len(keys))
+        position = (hashes & mask).astype(np.int64)
+        while len(pending):
+            state = np.take(self._state, position)
+            match = (state==_FULL) & (np.take(self._hashes, position)==np.take(hashes, pending))
+            match[match] = _equal(np.take(self._table_keys, position[match], axis=0), np.take(keys, pending[match], axis=0))
+            slots[pending[match]] = position[match]
+            go_on = ~match & (state!=_EMPTY)
+            pending, position = pending[go_on], (position[go_on] + 1) & (len(self._state) - 1)
+        return slots
+
+    def _claim(self, hashes: npt.NDArray[np.uint64]) -> npt.NDArray[np.int64]:
+        # free slots for keys not in the table; of the keys probing the same slot, the first one takes it
+        slots = np.empty(len(hashes), dtype=np.int64)
+        pending = np.arange(len(hashes))
+        position = (hashes & np.uint64(len(self._state) - 1)).astype(np.int64)
+        while len(pending):
+            free = np.flatnonzero(self._state[position]!=_FULL)
+            _, first = np.unique(position[free], return_index=True)
+            taken = free[first]
+            slots[pending[taken]] = position[taken]
+            self._n_deleted -= int(np.count_nonzero(self._state[position[taken]]==_DELETED))
+            self._state[position[taken]] = _FULL
+            go_on = np.ones(len(pending), dtype=bool)
+            go_on[taken] = False
+            pending, position = pending[go_on], (position[go_on] + 1) & (len(self._state) - 1)
+        return slots
+
+    def _insert(
+        self,
+        keys: npt.NDArray[np.uint64],
+        hashes: npt.NDArray[np.uint64],
+        images: npt.NDArray[np.float64],
+        revs: npt.NDArray[np.integer]
+    ) -> None:
+        # insert distinct keys not in the table, keep the load of the table at most one half
+        n = len(keys)
+        if n==0:
+            return
+        if 2*(self._n_full + self._n_deleted + n)>len(self._state):
+            self._rehash(self._n_full + n)
+        slots = self._claim(hashes)
+        self._hashes[slots], self._table_keys[slots] = hashes, keys
+        self._images[slots], self._revs[slots] = images, revs
+        self._used[slots] = self._clock + np.arange(n)
+        self._clock += n
+        self._slots.update(zip(_packed(keys), slots.tolist()))
+        self._n_full += n
+        if self._n_full>self._max_entries:
+            self._evict(self._n_full - self._kept_entries)
+
+    def _evict(self, n: int) -> None:
+        full = np.flatnonzero(self._state==_FULL)
+        oldest = full[np.argpartition(self._used[full], n-1)[:n]]
+        self._state[oldest] = _DELETED
+        for key in _packed(self._table_keys[oldest]):
+            del self._slots[key]
+        self._n_full -= n
+        self._n_deleted += n
+        self._evictions += n
+
+    def _rehash(self, n: int) -> None:
+        # move the images to a table with a load of at most one quarter, dropping the deleted slots
+        full = np.flatnonzero(self._state==_FULL)
+        hashes, keys = self._hashes[full], self._table_keys[full]
+        images, revs, used = self._images[full], self._revs[full], self._used[full]
+        clock = self._clock
+        self._allocate(max(_MIN_CAPACITY, 1 << (4*n - 1).bit_length()))
+        slots = self._claim(hashes)
+        self._hashes[slots], self._table_keys[slots] = hashes, keys
+        self._images[slots], self._revs[slots], self._used[slots] = images, revs, used
+        self._slots = dict(zip(_packed(keys), slots.tolist()))
+        self._n_full, self._clock = len(full), clock
+
+
+def _hash(keys: npt.NDArray[np.uint64]) -> npt.NDArray[np.uint64]:
+    h = keys[:,0]*_KEY_FACTORS[0]
+    for k in range(1, _WORDS):
+        h += keys[:,k]*_KEY_FACTORS[k]
+    h ^= h >> np.uint64(29)
+    h *= _KEY_FACTORS[0]
+    return h ^ (h >> np.uint64(32))
+
+
+def _equal(a: npt.NDArray[np.uint64], b: npt.NDArray[np.uint64]) -> npt.NDArray[np.bool_]:
+    # equality of the rows, compared by columns which is faster than comparing whole rows
+    equal = a[:,0]==b[:,0]
+    for k in range(1, _WORDS):
+        equal &= a[:,k]==b[:,k]
+    return equal
+
+
+def _packed(keys: npt.NDArray[np.uint64]) -> list[bytes]:
+    # keys as bytes equal to those packed by _KEY
+    return np.ascontiguousarray(keys).view(np.dtype((np.void, 8*_WORDS))).ravel().tolist()
+
+
+def _projection(projector: Projector) -> tuple[float, float]:
+    # projectors with the same lambda and kappa table give the same images, zero stands for exact kappa
+    table = projector.kappa_table
+    return projector.lambda_, 0.0 if table is None else table.max_error
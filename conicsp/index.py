@@ -0,0 +1,268 @@
+"""Spatial index of points for nearest neighbour and range queries respecting revolutions.
+
+The points are hashed into cubic cells of a uniform grid together with their revolutions, so points with
+different revolutions never share a cell and are never neighbours, as for `Point.__eq__`. Each query
+looks up only the cells around the queried point. All the queries are evaluated in bulk by array operations.
+
+Inserted points are first kept in a small secondary grid, which is merged into the main grid
+when it grows to a fraction of the main grid, so that inserting is cheap in amortized time.
+"""
+from __future__ import annotations
+from typing import Iterable, Iterator
+import itertools
+
+import numpy as np
+import numpy.typing as npt
+
+from .projection import Point, PointArray, TOLERANCE
+
+
+IntArray = npt.NDArray[np.int64]
+FloatArray = npt.NDArray[np.float64]
+
+
+POINTS_PER_CELL = 2
+MERGE_RATIO = 0.25
+_KEY_FACTORS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93], dtype=np.uint64)
+
+
+class PointIndex:
+    """Index of points given as a point array or an iterable of points.
+
+    Each indexed point gets an id, which is its position in the order of insertion. If `cell_size`
+    is not given, it is chosen at the first insertion for about two points per cell.
+    """
+
+    def __init__(self, points: PointArray | Iterable[Point] | None = None, cell_size: float | None = None) -> None:
+        self._cell_size = cell_size
+        self._main: _Grid | None = None
+        self._delta: _Grid | None = None
+        self._count = 0
+        # bounds of the cells occupied by the points with given revolutions
+        self._bounds: dict[int, tuple[IntArray, IntArray]] = {}
+        if points is not None:
+            self.insert(points)
+
+    @property
+    def cell_size(self) -> float | None:
+        return self._cell_size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def insert(self, points: PointArray | Iterable[Point]) -> IntArray:
+        """Add points to the index. Return their ids."""
+        points = _as_point_array(points)
+        if len(points)==0:
+            return np.empty(0, dtype=np.int64)
+        xyz = points.xyz
+        if self._cell_size is None:
+            self._cell_size = _default_cell_size(xyz)
+        ids = np.arange(self._count, self._count + len(points))
+        self._count += len(points)
+        rev = points.rev.astype(np.int64)
+        new = _Grid(xyz, rev, ids, self._cell_size)
+        all_cells = _cells(xyz, self._cell_size)
+        for r in np.unique(rev).tolist():
+            cells = all_cells[rev==r]
+            low, high = cells.min(axis=0), cells.max(axis=0)
+            if r in self._bounds:
+                low, high = np.minimum(low, self._bounds[r][0]), np.maximum(high, self._bounds[r][1])
+            self._bounds[r] = low, high
+        self._delta = new if self._delta is None else _Grid.merge(self._delta, new)
+        if self._main is None or len(self._delta) > MERGE_RATIO*len(self._main):
+            self._main = self._delta if self._main is None else _Grid.merge(self._main, self._delta)
+            self._delta = None
+        return ids
+
+    def range(self, points: PointArray | Iterable[Point], radius: float) -> list[IntArray]:
+        """For each of the points, get the ids of the indexed points with equal revolutions within `radius`.
+
+        The ids are sorted by the distance from the queried point.
+        """
+        points = _as_point_array(points)
+        queries, ids, distances = self.pairs(points, radius)
+        order = np.lexsort((ids, distances, queries))
+        bounds = np.searchsorted(queries[order], np.arange(1, len(points)))
+        return np.split(ids[order], bounds)
+
+    def pairs(self, points: PointArray | Iterable[Point], radius: float) -> tuple[IntArray, IntArray, FloatArray]:
+        """All pairs of the points and indexed points with equal revolutions within `radius`.
+
+        Return the indices of the points, the ids of the indexed points and their distances, in no particular order.
+        """
+        points = _as_point_array(points)
+        empty = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        if self._cell_size is None or len(points)==0:
+            return empty
+        if 2*radius <= self._cell_size:
+            # only the cells toward the nearest corner of the cell of each point can hold points within the radius
+            cells = _cells(points.xyz, self._cell_size)
+            side = np.where(points.xyz - cells*self._cell_size >= self._cell_size/2, 1, -1)
+            offsets: Iterable[IntArray] = (side*np.array(bits) for bits in itertools.product((0, 1), repeat=3))
+        else:
+            reach = int(np.ceil(radius/self._cell_size))
+            offsets = np.array(list(itertools.product(range(-reach, reach+1), repeat=3)), dtype=np.int64)
+        found = list(self._candidates(points, offsets, radius))
+        if not found:
+            return empty
+        queries, ids, distances = (np.concatenate(column) for column in zip(*found))
+        within = distances<=radius
+        return queries[within], ids[within], distances[within]
+
+    def nearest(self, points: PointArray | Iterable[Point], k: int = 1) -> tuple[FloatArray, IntArray]:
+        """For each of the points, find `k` nearest indexed points with equal revolutions.
+
+        Return the (Q,k) arrays of distances and ids sorted by distance. If fewer than `k` points
+        have the revolutions of the queried point, the rest is filled with infinite distances and ids -1.
+        """
+        points = _as_point_array(points)
+        distances = np.full((len(points), k), np.inf)
+        ids = np.full((len(points), k), -1, dtype=np.int64)
+        if self._cell_size is None or len(points)==0 or k<1:
+            return distances, ids
+        last_ring = self._last_rings(points)
+        active = np.flatnonzero(last_ring>=0)
+        for ring in itertools.count():
+            if len(active)==0:
+                break
+            for q, found, found_distances in self._candidates(points[active], _ring_offsets(ring), distances[active,k-1]):
+                _merge_nearest(distances, ids, active[q], found, found_distances)
+            # all the points closer than the ring are already found
+            active = active[(distances[active,k-1] > ring*self._cell_size) & (last_ring[active] > ring)]
+        return distances, ids
+
+    def match(self, points: PointArray | Iterable[Point], tolerance: float = TOLERANCE) -> IntArray:
+        """For each of the points, get the id of the nearest indexed point equal to it, or -1 if there is none.
+
+        With the default tolerance, the points are equal in the sense of `Point.__eq__`.
+        """
+        matches = self.range(points, tolerance)
+        return np.array([m[0] if len(m) else -1 for m in matches], dtype=np.int64)
+
+    def _last_rings(self, points: PointArray) -> IntArray:
+        # for each of the points the number of rings of cells around it, beyond which there are no indexed points
+        # with its revolutions, -1 if there are no such points at all
+        assert self._cell_size is not None
+        cells = _cells(points.xyz, self._cell_size)
+        last = np.full(len(points), -1, dtype=np.int64)
+        for rev in np.unique(points.rev).tolist():
+            if rev in self._bounds:
+                low, high = self._bounds[rev]
+                i = points.rev==rev
+                last[i] = np.maximum(np.abs(cells[i] - low), np.abs(cells[i] - high)).max(axis=1)
+        return last
+
+    def _grids(self) -> Iterator[_Grid]:
+        for grid in (self._main, self._delta):
+            if grid is not None:
+                yield grid
+
+    def _candidates(
+        self,
+        points: PointArray,
+        offsets: Iterable[IntArray],
+        limits: FloatArray | float
+    ) -> Iterator[tuple[IntArray, IntArray, FloatArray]]:
+        # For each offset and grid, yield the indices of the queried points, ids of the indexed points with equal
+        # revolutions in the cells shifted by the offset and their distances. An offset is either common to all
+        # the points or given for each of them. The cells farther from the queried point than its limit
+        # are skipped. The indices of the queried points are sorted.
+        assert self._cell_size is not None
+        xyz, rev = points.xyz, points.rev.astype(np.int64)
+        cells = _cells(xyz, self._cell_size)
+        for offset in offsets:
+            low = (cells + offset)*self._cell_size
+            gap = np.maximum(np.maximum(low - xyz, xyz - (low + self._cell_size)), 0.0)
+            near = np.flatnonzero(np.einsum("ij,ij->i", gap, gap) <= np.square(limits))
+            if len(near)==0:
+                continue
+            shifted = cells[near] + (offset if offset.ndim==1 else offset[near])
+            for grid in self._grids():
+                q, i = grid.lookup(shifted, rev[near])
+                q = near[q]
+                same_rev = grid.rev[i]==rev[q]
+                q, i = q[same_rev], i[same_rev]
+                if len(q):
+                    yield q, grid.ids[i], np.linalg.norm(grid.xyz[i] - xyz[q], axis=1)
+
+
+class _Grid:
+    """Points sorted by the keys of their cells."""
+
+    def __init__(self, xyz: FloatArray, rev: IntArray, ids: IntArray, cell_size: float) -> None:
+        keys = _keys(_cells(xyz, cell_size), rev)
+        order = np.argsort(keys, kind="stable")
+        self.cell_size = cell_size
+        self.keys, self.starts, self.counts = np.unique(keys[order], return_index=True, return_counts=True)
+        self.xyz = xyz[order]
+        self.rev = rev[order]
+        self.ids = ids[order]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def merge(a: _Grid, b: _Grid) -> _Grid:
+        return _Grid(np.vstack((a.xyz, b.xyz)), np.concatenate((a.rev, b.rev)), np.concatenate((a.ids, b.ids)), a.cell_size)
+
+    def lookup(self, cells: IntArray, rev: IntArray) -> tuple[IntArray, IntArray]:
+        """Pairs of indices of the queried cells and of the points in them."""
+        keys = _keys(cells, rev)
+        # sorted keys are searched much faster thanks to the locality of memory accesses
+        by_key = np.argsort(keys)
+        position = np.empty(len(keys), dtype=np.int64)
+        position[by_key] = np.searchsorted(self.keys, keys[by_key])
+        position = np.minimum(position, len(self.keys)-1)
+        counts = np.where(self.keys[position]==keys, self.counts[position], 0)
+        q = np.repeat(np.arange(len(cells)), counts)
+        i = np.repeat(self.starts[position] - (np.cumsum(counts) - counts), counts) + np.arange(int(counts.sum()))
+        # points of other cells with colliding keys are left out
+        same_cell = np.all(_cells(self.xyz[i], self.cell_size)==cells[q], axis=1)
+        return q[same_cell], i[same_cell]
+
+
+def _merge_nearest(distances: FloatArray, ids: IntArray, queries: IntArray, found: IntArray, found_distances: FloatArray) -> None:
+    # Merge the found points into the (Q,k) arrays of the nearest points. The queries are sorted, so that
+    # the points found for a query are contiguous and are placed in a row of a padded matrix.
+    starts = np.flatnonzero(np.diff(queries, prepend=-1))
+    counts = np.diff(np.append(starts, len(queries)))
+    rows = queries[starts]
+    rank = np.arange(len(queries)) - np.repeat(starts, counts)
+    r = np.repeat(np.arange(len(rows)), counts)
+    candidate_distances = np.full((len(rows), int(counts.max())), np.inf)
+    candidate_ids = np.full(candidate_distances.shape, -1, dtype=np.int64)
+    candidate_distances[r, rank], candidate_ids[r, rank] = found_distances, found
+    all_distances = np.hstack((distances[rows], candidate_distances))
+    all_ids = np.hstack((ids[rows], candidate_ids))
+    order = np.argsort(all_distances, axis=1, kind="stable")[:,:distances.shape[1]]
+    distances[rows] = np.take_along_axis(all_distances, order, axis=1)
+    ids[rows] = np.take_along_axis(all_ids, order, axis=1)
+
+
+def _as_point_array(points: PointArray | Iterable[Point]) -> PointArray:
+    return points if isinstance(points, PointArray) else PointArray.from_points(points)
+
+
+def _default_cell_size(xyz: FloatArray) -> float:
+    extent = xyz.max(axis=0) - xyz.min(axis=0)
+    volume = float(np.prod(extent[extent>0])) if np.any(extent>0) else 0.0
+    dimensions = int(np.count_nonzero(extent>0))
+    if dimensions==0:
+        return 1.0
+    return (volume*POINTS_PER_CELL/len(xyz))**(1/dimensions)
+
+
+def _cells(xyz: FloatArray, cell_size: float) -> IntArray:
+    return np.floor(xyz/cell_size).astype(np.int64)
+
+
+def _keys(cells: IntArray, rev: IntArray) -> npt.NDArray[np.uint64]:
+    # hash of the cell and the revolutions, collisions are resolved by the exact checks of the callers
+    u = np.column_stack((rev, cells)).astype(np.uint64)
+    return np.bitwise_xor.reduce(u*_KEY_FACTORS, axis=1)
+
+
+def _ring_offsets(ring: int) -> IntArray:
+    cube = np.array(list(itertools.product(range(-ring, ring+1), repeat=3)), dtype=np.int64)
+    return cube[np.abs(cube).max(axis=1)==ring]
@@ -0,0 +1,148 @@
+"""Opt-in instrumentation of the projection of cartesian points, scalar and batch.
+
+While a recorder is active, the projection reads the clock between its stages, counts the hits of the special
+branches and collects the histograms of the revolutions and of the magnitude of kappa of the images. Without
+an active recorder, the projection only checks that there is none, so the instrumentation costs next
+to nothing when it is not used.
+
+    with instrumentation.record() as recorder:
+        projector.point_array(points)
+    print(recorder.to_prometheus())
+
+The stages are the alignment to the base plane, the evaluation of omega and phi (with the rotations
+to the plane of the point and by its azimuth), kappa, the limiting of the azimuth and the final rotations.
+A call of a stage covers a single point in the scalar projection and a chunk of points in the batch
+projection. The branches are `y2_zero` (the point lies on the x axis after the alignment to its plane,
+kappa is one), `zero_radius` (the point lies on the x axis, the azimuth is taken as zero or -pi)
+and `clamped` (the azimuth is changed by the azimuth limit).
+
+A block records the projections of the thread or asyncio task that entered it, including the tasks
+started within the block, but not of the other threads, nor of worker processes. A recorder can be
+shared by blocks entered in several threads.
+"""
+from __future__ import annotations
+from typing import Iterator
+import collections
+import contextlib
+import contextvars
+import threading
+
+import numpy as np
+import numpy.typing as npt
+
+
+STAGES = ("align_base", "angles", "kappa", "limit_azimuth", "rotate")
+BRANCHES = ("y2_zero", "zero_radius", "clamped")
+# upper bounds of the buckets of the magnitude of kappa, the last bucket is unbounded
+KAPPA_BUCKETS = (0.01, 0.1, 0.5, 0.9, 1.0, 1.1, 2.0, 10.0, 100.0)
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+
+# recorder of the current thread or asyncio task
+active: contextvars.ContextVar[Recorder | None] = contextvars.ContextVar("conicsp_recorder", default=None)
+
+
+class Recorder:
+    """Timers and call counters of the stages of the projection, counters of branch hits and histograms."""
+
+    def __init__(self) -> None:
+        self.points = 0
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.calls = dict.fromkeys(STAGES, 0)
+        self.branches = dict.fromkeys(BRANCHES, 0)
+        self.revs: collections.Counter[int] = collections.Counter()
+        self.kappa_counts = [0]*(len(KAPPA_BUCKETS) + 1)
+        self.kappa_sum = 0.0
+        self._lock = threading.Lock()
+
+    def add_point(self, times: tuple[float, ...], branches: tuple[bool, bool, bool], kappa: float, rev: int) -> None:
+        """Record a point projected by the scalar projection, given the clock readings before and after the stages."""
+        with self._lock:
+            self.points += 1
+            for k, stage in enumerate(STAGES):
+                self.seconds[stage] += times[k+1] - times[k]
+                self.calls[stage] += 1
+            for name, hit in zip(BRANCHES, branches):
+                self.branches[name] += hit
+            self.revs[rev] += 1
+            magnitude = abs(kappa)
+            self.kappa_counts[np.searchsorted(KAPPA_BUCKETS, magnitude)] += 1
+            if magnitude==magnitude:
+                self.kappa_sum += magnitude
+
+    def add_chunk(
+        self,
+        times: tuple[float, ...],
+        branches: tuple[int, int, int],
+        kappa: FloatArray,
+        revs: IntArray
+    ) -> None:
+        """Record a chunk of points projected by the batch projection. See `add_point`."""
+        magnitude = np.abs(kappa)
+        buckets = np.bincount(np.searchsorted(KAPPA_BUCKETS, magnitude), minlength=len(KAPPA_BUCKETS)+1)
+        values, counts = np.unique(revs, return_counts=True)
+        with self._lock:
+            self.points += len(revs)
+            for k, stage in enumerate(STAGES):
+                self.seconds[stage] += times[k+1] - times[k]
+                self.calls[stage] += 1
+            for name, hits in zip(BRANCHES, branches):
+                self.branches[name] += int(hits)
+            self.revs.update(dict(zip(values.tolist(), counts.tolist())))
+            for k, count in enumerate(buckets.tolist()):
+                self.kappa_counts[k] += count
+            self.kappa_sum += float(np.nansum(magnitude))
+
+    def to_dict(self) -> dict:
+        return {
+            "points": self.points,
+            "stages": {s: {"calls": self.calls[s], "seconds": self.seconds[s]} for s in STAGES},
+            "branches": dict(self.branches),
+            "revs": dict(sorted(self.revs.items())),
+            "kappa": {"buckets": list(KAPPA_BUCKETS), "counts": list(self.kappa_counts), "sum": self.kappa_sum},
+        }
+
+    def to_prometheus(self, prefix: str = "conicsp") -> str:
+        """Metrics in the Prometheus text exposition format. The magnitude of kappa is a histogram."""
+        lines = [
+            f"# HELP {prefix}_points_total Points projected.",
+            f"# TYPE {prefix}_points_total counter",
+            f"{prefix}_points_total {self.points}",
+            f"# HELP {prefix}_stage_seconds_total Time spent in the stages of the projection.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+            *(f'{prefix}_stage_seconds_total{{stage="{s}"}} {self.seconds[s]!r}' for s in STAGES),
+            f"# HELP {prefix}_stage_calls_total Calls of the stages of the projection.",
+            f"# TYPE {prefix}_stage_calls_total counter",
+            *(f'{prefix}_stage_calls_total{{stage="{s}"}} {self.calls[s]}' for s in STAGES),
+            f"# HELP {prefix}_branch_hits_total Points taking the special branches of the projection.",
+            f"# TYPE {prefix}_branch_hits_total counter",
+            *(f'{prefix}_branch_hits_total{{branch="{b}"}} {self.branches[b]}' for b in BRANCHES),
+            f"# HELP {prefix}_image_revolutions_total Images by their revolutions.",
+            f"# TYPE {prefix}_image_revolutions_total counter",
+            *(f'{prefix}_image_revolutions_total{{rev="{r}"}} {n}' for r, n in sorted(self.revs.items())),
+            f"# HELP {prefix}_kappa Magnitude of kappa.",
+            f"# TYPE {prefix}_kappa histogram",
+        ]
+        cumulative = np.cumsum(self.kappa_counts).tolist()
+        for bound, count in zip((*(repr(b) for b in KAPPA_BUCKETS), "+Inf"), cumulative):
+            lines.append(f'{prefix}_kappa_bucket{{le="{bound}"}} {count}')
+        lines.append(f"{prefix}_kappa_sum {self.kappa_sum!r}")
+        lines.append(f"{prefix}_kappa_count {cumulative[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+@contextlib.contextmanager
+def record(recorder: Recorder | None = None) -> Iterator[Recorder]:
+    """Record the projections within the block with the given or a new recorder.
+
+    Blocks can be nested, the innermost recorder of the thread is used and the outer one is restored
+    at the end of the block. Blocks entered by other threads do not interfere.
+    """
+    recorder = Recorder() if recorder is None else recorder
+    token = active.set(recorder)
+    try:
+        yield recorder
+    finally:
+        active.reset(token)
+
@@ -0,0 +1,428 @@
+"""Interval arithmetic of the projection, bounding the images of whole boxes of source points.
+
+An interval is a pair of arrays of the lower and upper bounds, one item per box, so that many boxes, e.g.,
+chunks of a point file or nodes of a tree, are bounded at once. The interval versions of `Point.omega`,
+`Point.phi`, `Projector.kappa`, `limit_azimuth`, `rot_yz` and `rot_xy` enclose all the values of their exact
+counterparts over the intervals of their arguments, and so do `omega_of_plane` and `kappa_of_angle` for the angles
+of spherical wedges. `hull` joins intervals.
+
+`image_wedge` combines them into a bound of the images of an axis-aligned box or a spherical wedge of source
+points. It covers the points whose azimuth is clamped by `limit_azimuth` and the revolutions of the images,
+which may differ by one from those of the exact azimuth (see `conicsp.spherical`). Near the x axis, kappa is
+replaced by one, and where kappa is unbounded or may vanish (for |lambda|<1 beyond the angle |lambda|*pi from
+the x axis), the plane of the image is not bounded. `visible` compares the bounds with a region of the image
+space, so that the boxes whose images cannot reach the region are skipped before projecting any of their points.
+
+The bounds are widened to cover the rounding of the projection in double precision.
+"""
+from __future__ import annotations
+from math import pi
+from typing import Iterable
+import dataclasses
+
+import numpy as np
+import numpy.typing as npt
+
+from .projection import Projector, PointArray
+
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+Interval = tuple[FloatArray, FloatArray]
+
+
+# the bounds are widened to cover rounding errors
+_MARGIN = 1e-9
+_ANY_REV = (np.iinfo(np.int32).min, np.iinfo(np.int32).max)
+
+
+@dataclasses.dataclass(frozen=True)
+class Box:
+    """Axis-aligned boxes of points with intervals of revolutions, one item of each bound per box."""
+    x: Interval
+    y: Interval
+    z: Interval
+    rev: tuple[IntArray, IntArray]
+
+    @staticmethod
+    def of_bounds(
+        low: tuple[float,float,float],
+        high: tuple[float,float,float],
+        rev: tuple[int,int] | None = None
+    ) -> Box:
+        """Single box with the corners `low` and `high`, with any revolutions if `rev` is not given."""
+        low_, high_ = np.asarray(low, dtype=np.float64), np.asarray(high, dtype=np.float64)
+        if not low_.shape==high_.shape==(3,):
+            raise ValueError("Box corners must have three coordinates.")
+        rev = _ANY_REV if rev is None else rev
+        if np.any(low_>high_) or rev[0]>rev[1]:
+            raise ValueError("Lower bounds of a box must not exceed the upper bounds.")
+        x, y, z = ((low_[k:k+1], high_[k:k+1]) for k in range(3))
+        return Box(x, y, z, (np.array([rev[0]], dtype=np.int64), np.array([rev[1]], dtype=np.int64)))
+
+    @staticmethod
+    def of_points(points: PointArray, chunk_size: int | None = None) -> Box:
+        """Bounding boxes of the chunks of `chunk_size` consecutive points, or of all the points."""
+        if chunk_size is not None and chunk_size<1:
+            raise ValueError("Chunk size must be positive.")
+        if len(points)==0:
+            return _empty_boxes(0)
+        starts = np.arange(0, len(points), len(points) if chunk_size is None else chunk_size)
+        x, y, z, rev = (
+            (np.minimum.reduceat(column, starts), np.maximum.reduceat(column, starts))
+            for column in (points.x, points.y, points.z, points.rev)
+        )
+        return Box(
+            _as_float(x), _as_float(y), _as_float(z), (rev[0].astype(np.int64), rev[1].astype(np.int64))
+        )
+
+    @staticmethod
+    def of_chunks(chunks: Iterable[PointArray]) -> Box:
+        """Bounding boxes of the chunks, e.g., of a `PointFile`. Empty chunks give empty boxes."""
+        boxes = [Box.of_points(chunk) if len(chunk) else _empty_boxes(1) for chunk in chunks]
+        if not boxes:
+            return _empty_boxes(0)
+        x, y, z, rev = (
+            tuple(np.concatenate([getattr(box, name)[k] for box in boxes]) for k in range(2))
+            for name in ("x", "y", "z", "rev")
+        )
+        return Box(x, y, z, rev)
+
+    def __len__(self) -> int:
+        return len(self.x[0])
+
+    @property
+    def empty(self) -> npt.NDArray[np.bool_]:
+        return ~((self.x[0]<=self.x[1]) & (self.y[0]<=self.y[1]) & (self.z[0]<=self.z[1]))
+
+    def intersects(self, other: Box) -> npt.NDArray[np.bool_]:
+        """Mask of the boxes intersecting the other box, or the boxes of the other at the same positions."""
+        hit = (self.rev[0]<=other.rev[1]) & (self.rev[1]>=other.rev[0])
+        for mine, others in ((self.x, other.x), (self.y, other.y), (self.z, other.z)):
+            hit &= (mine[0]<=others[1]) & (mine[1]>=others[0])
+        return hit
+
+
+@dataclasses.dataclass(frozen=True)
+class Wedge:
+    """Spherical wedges of points given by the intervals of their spherical coordinates (see `SphericalPoint`),
+    i.e., the distance r, the angle omega of the plane of the point and the x axis, which is not reduced
+    to (-pi, pi], the angle theta between the point and the positive x axis, and the revolutions.
+    """
+    r: Interval
+    omega: Interval
+    theta: Interval
+    rev: tuple[IntArray, IntArray]
+
+    @staticmethod
+    def of_box(box: Box) -> Wedge:
+        return Wedge(_distance(box.x, box.y, box.z), omega(box.y, box.z), azimuth(box.x, box.y, box.z), box.rev)
+
+    def __len__(self) -> int:
+        return len(self.r[0])
+
+    def to_box(self) -> Box:
+        """Boxes enclosing the wedges."""
+        radius = _mul(self.r, _sin(self.theta))
+        x, y, z = _mul(self.r, _cos(self.theta)), _mul(radius, _cos(self.omega)), _mul(radius, _sin(self.omega))
+        margin = _MARGIN*self.r[1]
+        return Box(*((low - margin, high + margin) for low, high in (x, y, z)), self.rev)
+
+
+def omega(y: Interval, z: Interval) -> Interval:
+    """Bounds of `Point.omega` over the intervals of y and z. Where the boxes cross the half plane z=0, y<0,
+    the bounds are not reduced to (-pi, pi] and the upper bound exceeds pi.
+    """
+    ys, zs = np.stack((y[0], y[1], y[0], y[1])), np.stack((z[0], z[0], z[1], z[1])) + 0.0
+    corners = np.arctan2(zs, ys)
+    crossing = (y[1]<0) & (z[0]<0) & (z[1]>=0)
+    corners = np.where(crossing & (zs<0), corners + 2*pi, corners)
+    around = (y[0]<=0) & (y[1]>=0) & (z[0]<=0) & (z[1]>=0)
+    low, high = corners.min(axis=0), corners.max(axis=0)
+    return np.where(around, -pi, low - _MARGIN), np.where(around, pi, high + _MARGIN)
+
+
+def azimuth(x: Interval, y: Interval, z: Interval) -> Interval:
+    """Bounds of the angle between the points and the positive x axis, i.e., of the magnitude of `Point.phi`
+    without revolutions.
+    """
+    return _angle(x, _distance(y, z))
+
+
+def phi(x: Interval, y: Interval, z: Interval, rev: tuple[IntArray, IntArray]) -> Interval:
+    """Bounds of `Point.phi` over the boxes."""
+    a = azimuth(x, y, z)
+    low, high = np.full(len(a[0]), np.inf), np.full(len(a[0]), -np.inf)
+    # points on the negative x axis have azimuth -pi, covered by the negative part
+    on_axis = (y[0]<=0) & (y[1]>=0) & (z[0]<=0) & (z[1]>=0) & (x[0]<0)
+    for sign, present in ((1, y[1]>=0), (-1, (y[0]<0) | on_axis)):
+        low, high = hull((low, high), _phi_part(a, sign, rev), present)
+    return low, high
+
+
+def kappa(projector: Projector, x: Interval, radius: Interval) -> Interval:
+    """Bounds of `Projector.kappa` over the intervals of x and of the distance from the x axis.
+    Where kappa is singular, the bounds are infinite.
+    """
+    return kappa_of_angle(projector, _angle(x, radius))
+
+
+def limit_azimuth(phi: Interval, gamma: float) -> Interval:
+    """Bounds of `limit_azimuth` over the intervals of azimuth."""
+    low, high, _, _ = _limit_azimuth(phi, gamma)
+    return low, high
+
+
+def rot_yz(y: Interval, z: Interval, angle: Interval | float) -> tuple[Interval, Interval]:
+    """Bounds of the y and z coordinates rotated about the x axis (as `rot_yz`) by the angles in the interval."""
+    c, s = _cos(_as_interval(angle)), _sin(_as_interval(angle))
+    return _widen(_sub(_mul(c, y), _mul(s, z))), _widen(_add(_mul(s, y), _mul(c, z)))
+
+
+def rot_xy(
+    x: Interval,
+    y: Interval,
+    z: Interval,
+    angle: Interval | float
+) -> tuple[Interval, Interval, tuple[IntArray, IntArray]]:
+    """Bounds of the x and y coordinates and revolutions of the points rotated about the z axis (as `rot_xy`)
+    by the angles in the interval.
+    """
+    angle = _as_interval(angle)
+    c, s = _cos(angle), _sin(angle)
+    low, high = omega(y, z)
+    # the revolutions are given by omega in (-pi, pi]
+    low, high = np.where(high>pi, -pi, low), np.minimum(high, pi)
+    rev = (
+        np.floor((low + angle[0] + pi)/(2*pi)).astype(np.int64),
+        np.floor((high + angle[1] + pi)/(2*pi)).astype(np.int64)
+    )
+    return _widen(_sub(_mul(c, x), _mul(s, y))), _widen(_add(_mul(s, x), _mul(c, y))), rev
+
+
+def omega_of_plane(plane: Interval, base: float) -> Interval:
+    """Bounds of `Point.omega` relative to the base plane over the intervals of the angles of the planes
+    of the points with the x axis, measured from the y axis (as `Wedge.omega`). Where the bounds wrap
+    around pi, they are [-pi, pi].
+    """
+    low = np.mod(plane[0] - base - _MARGIN + pi, 2*pi) - pi
+    high = low + (plane[1] - plane[0]) + 2*_MARGIN
+    wrapped = (high>pi-2*_MARGIN) | (low<-pi+2*_MARGIN)
+    return np.where(wrapped, -pi, low), np.where(wrapped, pi, high)
+
+
+def kappa_of_angle(projector: Projector, a: Interval) -> Interval:
+    """Bounds of `Projector.kappa` over the intervals of the angle from the x axis, in [0, pi].
+    Where kappa is singular, the bounds are infinite.
+    """
+    # kappa is increasing in the angle a for |lambda|>1 and decreasing for |lambda|<1 while a < |lambda|*pi,
+    # where it vanishes
+    scale = abs(projector.lambda_)
+    if scale==1:
+        low, high = np.ones_like(a[0]), np.ones_like(a[1])
+    elif scale>1:
+        low, high = _kappa(a[0], scale), _kappa(a[1], scale)
+    else:
+        low, high = _kappa(a[1], scale), _kappa(a[0], scale)
+        singular = a[1]>=scale*pi
+        low, high = np.where(singular, -np.inf, low), np.where(singular, np.inf, high)
+    error = 0.0 if projector.kappa_table is None else projector.kappa_table.max_error
+    return low*(1 - _MARGIN) - error, high*(1 + _MARGIN) + error
+
+
+def hull(a: Interval, b: Interval, mask: npt.NDArray[np.bool_]) -> Interval:
+    """Smallest intervals enclosing the intervals a and, where masked, the intervals b."""
+    return np.where(mask, np.minimum(a[0], b[0]), a[0]), np.where(mask, np.maximum(a[1], b[1]), a[1])
+
+
+def image_wedge(projector: Projector, sources: Box | Wedge, base: float = 0.0) -> Wedge:
+    """Wedges enclosing the images of the source boxes or wedges projected by the projector."""
+    if isinstance(sources, Box):
+        sources = Wedge.of_box(sources)
+    n = len(sources)
+    a = np.maximum(sources.theta[0] - _MARGIN, 0.0), np.minimum(sources.theta[1] + _MARGIN, pi)
+    on_axis = (a[0]<=0) | (a[1]>=pi)
+    # omega relative to the base plane, zero for points on the x axis
+    low, high = omega_of_plane(sources.omega, base)
+    low, high = hull((low, high), (np.zeros(n), np.zeros(n)), on_axis)
+    positive = (low<=pi/2) & (high>=-pi/2)
+    negative = (low<-pi/2) | (high>pi/2) | on_axis
+
+    kappa_low, kappa_high = kappa_of_angle(projector, a)
+    kappa_low, kappa_high = hull((kappa_low, kappa_high), (np.ones(n), np.ones(n)), on_axis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratios = np.stack((low/kappa_low, low/kappa_high, high/kappa_low, high/kappa_high))
+        unbounded = ~(kappa_low>0) | np.any(np.isnan(ratios), axis=0)
+        turned_low = np.where(unbounded, -np.inf, ratios.min(axis=0))
+        turned_high = np.where(unbounded, np.inf, ratios.max(axis=0))
+        # the error of the angle of the image plane grows with omega/kappa^2
+        margin = _MARGIN*(1 + np.maximum(np.abs(turned_low), np.abs(turned_high))/kappa_low)
+
+    image_theta = np.full(n, np.inf), np.full(n, -np.inf)
+    image_omega = np.full(n, np.inf), np.full(n, -np.inf)
+    image_rev = np.full(n, _ANY_REV[1], dtype=np.int64), np.full(n, _ANY_REV[0], dtype=np.int64)
+    reflected = _reflected(a)
+    for sign, present in ((1, positive), (-1, negative)):
+        phi_ = _phi_part(a, sign, sources.rev)
+        limited_low, limited_high, kept, clamped = _limit_azimuth(phi_, 2*pi*projector.lambda_)
+        kept, clamped = kept & present, clamped & present
+        # A kept point stays in its plane. A clamped point with positive azimuth is rotated to the negative x axis,
+        # one with negative azimuth to the angle |pi - 2*theta| in the plane turned by pi for theta below pi/2.
+        if sign==1:
+            clamped_theta, turn = (np.full(n, pi), np.full(n, pi)), (np.zeros(n), np.zeros(n))
+        else:
+            clamped_theta = reflected
+            turn = np.where(a[1]>pi/2, 0.0, pi), np.where(a[0]<=pi/2, pi, 0.0)
+        for mask, theta_part, turn_part in ((kept, a, (np.zeros(n), np.zeros(n))), (clamped, clamped_theta, turn)):
+            image_theta = hull(image_theta, theta_part, mask)
+            image_omega = hull(image_omega, (turned_low + turn_part[0], turned_high + turn_part[1]), mask)
+        # the revolutions are evaluated from the limited azimuth and the angle omega3 in [-pi, pi], see `project`
+        rev = (
+            np.floor((limited_low - _MARGIN)/(2*pi)).astype(np.int64),
+            np.floor((limited_high + _MARGIN)/(2*pi) + 1).astype(np.int64)
+        )
+        image_rev = hull(image_rev, rev, present)
+
+    r = sources.r[0]*(1 - _MARGIN), sources.r[1]*(1 + _MARGIN)
+    theta = np.maximum(image_theta[0] - _MARGIN, 0.0), np.minimum(image_theta[1] + _MARGIN, pi)
+    omega_ = image_omega[0] + base - margin, image_omega[1] + base + margin
+    return Wedge(r, omega_, theta, image_rev)
+
+
+def image_box(projector: Projector, sources: Box | Wedge, base: float = 0.0) -> Box:
+    """Boxes enclosing the images of the source boxes or wedges projected by the projector."""
+    return image_wedge(projector, sources, base).to_box()
+
+
+def visible(projector: Projector, sources: Box | Wedge, region: Box, base: float = 0.0) -> npt.NDArray[np.bool_]:
+    """Mask of the source boxes or wedges whose images can intersect the region, a single box of the image space.
+
+    The images of the other sources lie outside of the region, so those sources can be skipped.
+    """
+    wedge = image_wedge(projector, sources, base)
+    r = _distance(region.x, region.y, region.z)
+    hit = wedge.to_box().intersects(region) & (wedge.r[0]<=r[1]) & (wedge.r[1]>=r[0])
+    if isinstance(sources, Box):
+        hit &= ~sources.empty
+    return hit
+
+
+def _phi_part(a: Interval, sign: int, rev: tuple[IntArray, IntArray]) -> Interval:
+    # azimuth of the points with the given sign of the azimuth without revolutions
+    turns = 2*pi*rev[0], 2*pi*rev[1]
+    if sign==1:
+        return a[0] + turns[0], a[1] + turns[1]
+    return -a[1] + turns[0], -a[0] + turns[1]
+
+
+def _reflected(a: Interval) -> Interval:
+    # bounds of |pi - 2*theta|
+    ends = np.abs(pi - 2*a[0]), np.abs(pi - 2*a[1])
+    across = (a[0]<=pi/2) & (a[1]>=pi/2)
+    return np.where(across, 0.0, np.minimum(*ends)), np.maximum(*ends)
+
+
+def _kappa(a: FloatArray, lambda_: float) -> FloatArray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = lambda_*np.sin(a/lambda_)/np.sin(a)
+    return np.where(a==0, 1.0, np.where(a>=pi, np.inf, values))
+
+
+def _limit_azimuth(
+    phi: Interval,
+    gamma: float
+) -> tuple[FloatArray, FloatArray, npt.NDArray[np.bool_], npt.NDArray[np.bool_]]:
+    # Bounds of limit_azimuth over the intervals [low, high] and the masks of the intervals with some azimuth
+    # kept and some clamped. The azimuth with magnitude reduced modulo gamma in (pi, gamma-pi) is clamped to +-pi,
+    # otherwise it is kept.
+    low, high = phi
+    if gamma<=2*pi:
+        return low, high, np.ones(len(low), dtype=bool), np.zeros(len(low), dtype=bool)
+    image_low, image_high = np.full(len(low), np.inf), np.full(len(low), -np.inf)
+    any_kept, any_clamped = np.zeros(len(low), dtype=bool), np.zeros(len(low), dtype=bool)
+    for sign in (1, -1):
+        # the part of the interval with the given sign, as an interval of magnitudes
+        if sign==1:
+            m_low, m_high = np.maximum(low, 0.0), high
+        else:
+            m_low, m_high = np.maximum(-high, 0.0), -low
+        present = m_low<=m_high
+        period_low, period_high = np.floor(m_low/gamma), np.floor(m_high/gamma)
+        u_low, u_high = m_low - period_low*gamma, m_high - period_high*gamma
+        same_period = period_low==period_high
+        clamped = present & np.where(
+            same_period, (u_high>pi) & (u_low<gamma-pi), (period_high - period_low > 1) | (u_low<gamma-pi) | (u_high>pi)
+        )
+        kept = present & ~(same_period & (u_low>pi) & (u_high<gamma-pi))
+        # the kept part lies within the interval, the clamped part is mapped to sign*pi
+        kept_low, kept_high = (m_low, m_high) if sign==1 else (-m_high, -m_low)
+        image_low = np.where(kept, np.minimum(image_low, kept_low), image_low)
+        image_high = np.where(kept, np.maximum(image_high, kept_high), image_high)
+        image_low = np.where(clamped, np.minimum(image_low, sign*pi), image_low)
+        image_high = np.where(clamped, np.maximum(image_high, sign*pi), image_high)
+        any_kept |= kept
+        any_clamped |= clamped
+    return image_low, image_high, any_kept, any_clamped
+
+
+def _angle(x: Interval, radius: Interval) -> Interval:
+    # the angle atan2(radius, x) is monotone in each argument, so its bounds are attained at the corners
+    corners = np.arctan2(np.stack((radius[0], radius[1], radius[0], radius[1])), np.stack((x[0], x[0], x[1], x[1])))
+    return np.maximum(corners.min(axis=0) - _MARGIN, 0.0), np.minimum(corners.max(axis=0) + _MARGIN, pi)
+
+
+def _distance(*coordinates: Interval) -> Interval:
+    # bounds of the distance from the origin of the points with the coordinates in the intervals
+    near = [np.where((c[0]<=0) & (c[1]>=0), 0.0, np.minimum(np.abs(c[0]), np.abs(c[1]))) for c in coordinates]
+    far = [np.maximum(np.abs(c[0]), np.abs(c[1])) for c in coordinates]
+    return np.sqrt(sum(v**2 for v in near))*(1 - _MARGIN), np.sqrt(sum(v**2 for v in far))*(1 + _MARGIN)
+
+
+def _cos(angle: Interval) -> Interval:
+    low, high = angle
+    with np.errstate(invalid="ignore"):
+        ends = np.cos(low), np.cos(high)
+        # the interval contains a maximum at 2*pi*k or a minimum at pi + 2*pi*k
+        maximum = np.ceil(low/(2*pi))<=np.floor(high/(2*pi))
+        minimum = np.ceil((low - pi)/(2*pi))<=np.floor((high - pi)/(2*pi))
+    return np.where(minimum, -1.0, np.minimum(*ends)), np.where(maximum, 1.0, np.maximum(*ends))
+
+
+def _sin(angle: Interval) -> Interval:
+    return _cos((angle[0] - pi/2, angle[1] - pi/2))
+
+
+def _mul(a: Interval, b: Interval) -> Interval:
+    with np.errstate(invalid="ignore"):
+        products = np.stack((a[0]*b[0], a[0]*b[1], a[1]*b[0], a[1]*b[1]))
+    undefined = np.any(np.isnan(products), axis=0)
+    return np.where(undefined, -np.inf, products.min(axis=0)), np.where(undefined, np.inf, products.max(axis=0))
+
+
+def _add(a: Interval, b: Interval) -> Interval:
+    return a[0] + b[0], a[1] + b[1]
+
+
+def _sub(a: Interval, b: Interval) -> Interval:
+    return a[0] - b[1], a[1] - b[0]
+
+
+def _widen(a: Interval) -> Interval:
+    margin = _MARGIN*np.maximum(np.abs(a[0]), np.abs(a[1]))
+    return a[0] - margin, a[1] + margin
+
+
+def _as_interval(angle: Interval | float) -> Interval:
+    if isinstance(angle, tuple):
+        return np.asarray(angle[0], dtype=np.float64), np.asarray(angle[1], dtype=np.float64)
+    value = np.asarray(angle, dtype=np.float64)
+    return value, value
+
+
+def _as_float(bounds: tuple[npt.NDArray, npt.NDArray]) -> Interval:
+    return bounds[0].astype(np.float64), bounds[1].astype(np.float64)
+
+
+def _empty_boxes(n: int) -> Box:
+    low, high = np.full(n, np.inf), np.full(n, -np.inf)
+    return Box((low, high), (low, high), (low, high), (np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64)))
@@ -0,0 +1,146 @@
+"""Tabulated scaling factor kappa.
+
+Kappa depends on the point only through the ratio of x and radius. The table is built over
+s = x/sqrt(x**2 + radius**2), i.e., the cosine of the angle between the x axis and the point.
+As a function of s, kappa = lambda*sin(acos(s)/lambda)/sqrt(1 - s**2) is smooth up to s = 1, but
+grows without bounds towards s = -1 (points behind the singularity) for general lambda.
+The table therefore covers only the interval [s_min, 1] and points with s < s_min
+or with zero radius are evaluated exactly.
+"""
+from __future__ import annotations
+from math import sqrt, acos, sin, floor
+from typing import overload
+
+import numpy as np
+
+from . import vectorized
+from .vectorized import FloatArray
+
+
+DEFAULT_MAX_ERROR = 1e-9
+DEFAULT_S_MIN = -0.9
+MAX_TABLE_SIZE = 2**22
+
+
+class KappaTable:
+    """Kappa evaluated by piecewise cubic interpolation in a table with a guaranteed maximum absolute error.
+
+    Each interval of the table holds the coefficients of the cubic interpolating kappa at the ends
+    and at the thirds of the interval. The number of intervals is doubled until the interpolation error,
+    checked at points between the interpolation nodes, falls below half of the maximum error.
+    """
+
+    def __init__(
+        self,
+        lambda_: float,
+        max_error: float = DEFAULT_MAX_ERROR,
+        s_min: float = DEFAULT_S_MIN,
+        max_size: int = MAX_TABLE_SIZE
+    ) -> None:
+
+        if not max_error>0:
+            raise ValueError(f"Maximum error must be positive, got {max_error}.")
+        if not -1<s_min<1:
+            raise ValueError(f"Lower bound of the table must lie in (-1, 1), got {s_min}.")
+        self._lambda = lambda_
+        self._max_error = max_error
+        self._s_min = s_min
+        n = 64
+        while True:
+            coefficients = self._fit(n)
+            if self._interpolation_error(coefficients) <= max_error/2:
+                break
+            n *= 2
+            if n>max_size:
+                raise ValueError(
+                    f"Kappa for lambda={lambda_} cannot be tabulated with error {max_error} using at most {max_size} intervals."
+                )
+        self._inv_h = n/(1-s_min)
+        self._offset = s_min*self._inv_h
+        self._n = n
+        self._coefficients = coefficients
+        self._coefficients_list: list[tuple[float,float,float,float]] = list(zip(*coefficients.tolist()))
+
+    @property
+    def lambda_(self) -> float:
+        return self._lambda
+
+    @property
+    def max_error(self) -> float:
+        return self._max_error
+
+    @property
+    def s_min(self) -> float:
+        return self._s_min
+
+    @property
+    def size(self) -> int:
+        """Number of intervals of the table."""
+        return self._n
+
+    @overload
+    def __call__(self, x: float, radius: float) -> float: ...
+    @overload
+    def __call__(self, x: FloatArray, radius: FloatArray) -> FloatArray: ...
+    def __call__(self, x, radius):
+        if np.ndim(x)==0 and np.ndim(radius)==0:
+            return self.scalar(x, radius)
+        return self.array(np.asarray(x, dtype=np.float64), np.asarray(radius, dtype=np.float64))
+
+    def scalar(self, x: float, radius: float) -> float:
+        if radius == 0:
+            if x > 0:
+                return 1
+            else:
+                raise ValueError("Cannot compute scaling of circle of radius zero behing singularity and non-unit lambda.")
+        q = sqrt(radius**2 + x**2)
+        s = x / q
+        if s < self._s_min:
+            return self._lambda*(q/radius)*sin(acos(s)/self._lambda)
+        u = s*self._inv_h - self._offset
+        i = min(floor(u), self._n)
+        t = u - i
+        c0, c1, c2, c3 = self._coefficients_list[i]
+        return c0 + t*(c1 + t*(c2 + t*c3))
+
+    def array(self, x: FloatArray, radius: FloatArray) -> FloatArray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            s = x / np.sqrt(radius*radius + x*x)
+        u = s*self._inv_h - self._offset
+        # zero radius gives either s = 1 or s that is not a number
+        exact = np.flatnonzero(~(s>=self._s_min))
+        u[exact] = 0
+        i = u.astype(np.intp)
+        t = u - i
+        c0, c1, c2, c3 = self._coefficients.take(i, axis=1)
+        values = c0 + t*(c1 + t*(c2 + t*c3))
+        if len(exact):
+            values[exact] = vectorized.kappa(x[exact], radius[exact], self._lambda)
+        return values
+
+    def _exact(self, s: FloatArray) -> FloatArray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = self._lambda*np.sin(np.arccos(s)/self._lambda)/np.sqrt((1-s)*(1+s))
+        values[s==1] = 1.0
+        return values
+
+    def _fit(self, n: int) -> FloatArray:
+        """Coefficients of the cubics in the local coordinate t in [0, 1], shaped (4, n+1).
+
+        The last column extends the table by the constant value of kappa at s = 1.
+        """
+        t = np.array([0, 1/3, 2/3, 1])
+        s = self._s_min + (np.arange(n)[:,None] + t)*((1 - self._s_min)/n)
+        s[:,-1] = np.append(s[1:,0], 1.0)
+        coefficients = np.linalg.solve(np.vander(t, increasing=True), self._exact(s.ravel()).reshape(n, 4).T)
+        return np.hstack((coefficients, [[1.0], [0.0], [0.0], [0.0]]))
+
+    def _interpolation_error(self, coefficients: FloatArray) -> float:
+        n = coefficients.shape[1] - 1
+        c0, c1, c2, c3 = coefficients[:,:-1]
+        error = 0.0
+        for t in (1/12, 1/6, 1/4, 5/12, 1/2, 7/12, 3/4, 5/6, 11/12):
+            s = self._s_min + (np.arange(n) + t)*((1 - self._s_min)/n)
+            interpolated = c0 + t*(c1 + t*(c2 + t*c3))
+            error = max(error, float(np.max(np.abs(interpolated - self._exact(s)))))
+        return error
@@ -0,0 +1,223 @@
+"""Projection of large point arrays split into chunks projected on several cores.
+
+In the process mode the points and their images are kept in shared memory blocks, so that the workers
+receive only the names of the blocks and the bounds of their chunks and nothing else is pickled.
+The points are copied into their block and the images out of theirs, the block of the points being released
+first, so that the peak memory is that of the points and two copies of them. The thread mode projects the chunks
+in a thread pool directly into the images, with one copy less, which pays off for array operations releasing
+the GIL.
+
+Each chunk is written to its own slice of the output, so the images are always in the order of the points
+and do not depend on the number of workers. The base plane angle is either a scalar or an array of angles
+of the points, which is split into chunks along with the points.
+"""
+from __future__ import annotations
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+import functools
+import os
+
+import numpy as np
+import numpy.typing as npt
+
+from .projection import Projector, PointArray
+
+
+DEFAULT_CHUNK_SIZE = 262144
+MODES = ("process", "thread")
+
+
+class ParallelProjector:
+    """Projects point arrays with the given projector on `workers` cores, `chunk_size` points at a time.
+
+    The pool of workers is started on first use and kept until `close` is called.
+    """
+
+    def __init__(
+        self,
+        projector: Projector,
+        workers: int | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        mode: str = "process"
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {MODES}.")
+        if chunk_size<1:
+            raise ValueError("Chunk size must be positive.")
+        self._projector = projector
+        self._workers = workers or os.cpu_count() or 1
+        self._chunk_size = chunk_size
+        self._mode = mode
+        self._executor: Executor | None = None
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @property
+    def chunk_size(self) -> int:
+        return self._chunk_size
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    def points(
+        self,
+        xyz: npt.ArrayLike,
+        rev: npt.ArrayLike | None = None,
+        base: npt.ArrayLike = 0.0,
+        dtype: npt.DTypeLike = np.float64
+    ) -> tuple[npt.NDArray[np.floating], npt.NDArray[np.int32]]:
+        """Project a batch of points given as an (N,3) array of cartesian coordinates. See `Projector.points`."""
+        images = self.point_array(PointArray.from_xyz(xyz, rev, dtype), base)
+        return images.xyz, images.rev
+
+    def point_array(self, points: PointArray, base: npt.ArrayLike = 0.0) -> PointArray:
+        """Project a point array. See `Projector.point_array`. The images have the type of the points."""
+        base = np.asarray(base, dtype=np.float64)
+        if base.ndim>0 and base.shape!=(len(points),):
+            raise ValueError("Base plane angles must be a scalar or an array with an angle for each point.")
+        bounds = [(i, min(i+self._chunk_size, len(points))) for i in range(0, len(points), self._chunk_size)]
+        if self._mode=="thread":
+            return self._project_in_threads(points, base, bounds)
+        return self._project_in_processes(points, base, bounds)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> ParallelProjector:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            pool = ThreadPoolExecutor if self._mode=="thread" else ProcessPoolExecutor
+            self._executor = pool(max_workers=self._workers)
+        return self._executor
+
+    def _project_in_threads(
+        self,
+        points: PointArray,
+        base: npt.NDArray[np.float64],
+        bounds: list[tuple[int,int]]
+    ) -> PointArray:
+        images = PointArray.empty(len(points), points.dtype)
+
+        def project_chunk(start: int, stop: int) -> None:
+            _project_into(images, points, self._projector, base, start, stop)
+
+        for future in [self._pool().submit(project_chunk, start, stop) for start, stop in bounds]:
+            future.result()
+        return images
+
+    def _project_in_processes(
+        self,
+        points: PointArray,
+        base: npt.NDArray[np.float64],
+        bounds: list[tuple[int,int]]
+    ) -> PointArray:
+        n, dtype = len(points), points.dtype.str
+        table = self._projector.kappa_table
+        kappa_error = None if table is None else table.max_error
+        # an array of base angles is shared with the points, None tells the workers to read it
+        scalar_base = float(base) if base.ndim==0 else None
+        with _SharedPointArray(n, dtype) as target:
+            with _SharedPointArray(n, dtype, with_base=scalar_base is None) as source:
+                source.points.x[:], source.points.y[:], source.points.z[:] = points.x, points.y, points.z
+                source.points.rev[:] = points.rev
+                if source.base is not None:
+                    source.base[:] = base
+                futures = [
+                    self._pool().submit(
+                        _project_shared,
+                        source.name, target.name, n, dtype, start, stop,
+                        self._projector.lambda_, scalar_base, kappa_error
+                    )
+                    for start, stop in bounds
+                ]
+                for future in futures:
+                    future.result()
+            # the block of the points is released before the images are allocated
+            images = PointArray.empty(n, dtype)
+            images.x[:], images.y[:], images.z[:] = target.points.x, target.points.y, target.points.z
+            images.rev[:] = target.points.rev
+        return images
+
+
+class _SharedPointArray:
+    """Point array with coordinates of the type `dtype` in a block of shared memory, optionally with a column
+    of base plane angles.
+
+    The owner creates and finally removes the block, the workers only attach to it by its name.
+    """
+
+    def __init__(self, n: int, dtype: npt.DTypeLike, name: str | None = None, with_base: bool = False) -> None:
+        itemsize = np.dtype(dtype).itemsize
+        # the angles are always float64 and go first, so that all the columns are aligned
+        offset = n*8 if with_base else 0
+        size = max(offset + n*(3*itemsize + 4), 1)
+        self._memory = shared_memory.SharedMemory(name, create=name is None, size=size if name is None else 0)
+        self._owner = name is None
+        buffer = self._memory.buf
+        self.base = np.frombuffer(buffer, np.float64, n, 0) if with_base else None
+        x, y, z = (np.frombuffer(buffer, dtype, n, offset + k*n*itemsize) for k in range(3))
+        self.points = PointArray(x, y, z, np.frombuffer(buffer, np.int32, n, offset + 3*n*itemsize), dtype)
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    def close(self) -> None:
+        # the views must be released before the memory can be closed
+        del self.points, self.base
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+    def __enter__(self) -> _SharedPointArray:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def _project_into(
+    images: PointArray,
+    points: PointArray,
+    projector: Projector,
+    base: npt.NDArray[np.float64],
+    start: int,
+    stop: int
+) -> None:
+    k = slice(start, stop)
+    projector.point_array(points[k], base if base.ndim==0 else base[k], out=images[k])
+
+
+@functools.lru_cache(maxsize=16)
+def _worker_projector(lambda_: float, kappa_error: float | None) -> Projector:
+    # the kappa table is built once per worker process and not sent with every chunk
+    return Projector(lambda_, kappa_error=kappa_error)
+
+
+def _project_shared(
+    source_name: str,
+    target_name: str,
+    n: int,
+    dtype: str,
+    start: int,
+    stop: int,
+    lambda_: float,
+    base: float | None,
+    kappa_error: float | None
+) -> None:
+    projector = _worker_projector(lambda_, kappa_error)
+    source = _SharedPointArray(n, dtype, source_name, with_base=base is None)
+    with source, _SharedPointArray(n, dtype, target_name) as target:
+        _project_into(
+            target.points, source.points, projector, np.asarray(base) if base is not None else source.base, start, stop
+        )
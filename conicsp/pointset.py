@@ -0,0 +1,106 @@
+"""Set operations on points with the equality of `Point.__eq__`, i.e., up to a distance tolerance.
+
+The hash of a point is given by its exact coordinates, so that sets and dicts of points do not merge points
+equal within the tolerance. Here the points are hashed into cells of twice the size of the tolerance,
+separately for each revolution, and each point is compared only with the points in the eight cells
+around the nearest corner of its cell, so the operations run in time close to linear in the number of points.
+
+The operations accept lists of points or point arrays and return the same kind of container.
+"""
+from __future__ import annotations
+from typing import Sequence, TypeVar
+
+import numpy as np
+import numpy.typing as npt
+
+from .index import PointIndex
+from .projection import Point, PointArray, TOLERANCE
+
+
+IntArray = npt.NDArray[np.int64]
+Points = TypeVar("Points", PointArray, Sequence[Point])
+
+
+def match(
+    points: PointArray | Sequence[Point],
+    others: PointArray | Sequence[Point],
+    tolerance: float = TOLERANCE
+) -> IntArray:
+    """For each of the points, get the index of the nearest of the other points equal to it, or -1 if there is none."""
+    points, others = _as_point_array(points), _as_point_array(others)
+    q, i, squared = _equal_pairs(points, others, tolerance)
+    order = np.lexsort((i, squared, q))
+    q, i = q[order], i[order]
+    first = np.flatnonzero(np.diff(q, prepend=-1))
+    matches = np.full(len(points), -1, dtype=np.int64)
+    matches[q[first]] = i[first]
+    return matches
+
+
+def unique(points: Points, tolerance: float = TOLERANCE) -> Points:
+    """Points not equal to any preceding point kept.
+
+    The equality is not transitive, so the result is the same as of the pairwise comparison in a single pass,
+    keeping each point if no previously kept point is equal to it.
+    """
+    array = _as_point_array(points)
+    q, i, _ = _equal_pairs(array, array, tolerance)
+    earlier = i<q
+    q, i = q[earlier], i[earlier]
+    order = np.argsort(q, kind="stable")
+    q, i = q[order], i[order]
+    kept = np.ones(len(array), dtype=bool)
+    if len(q)==0:
+        return _select(points, kept)
+    # the pairs are grouped by the later point, each group is decided by its preceding points
+    starts = np.flatnonzero(np.diff(q, prepend=-1))
+    ends = np.append(starts[1:], len(q))
+    # points with no equal preceding point are kept, so the points equal to them are not
+    first = np.ones(len(array), dtype=bool)
+    first[q] = False
+    settled = np.logical_or.reduceat(first[i], starts)
+    kept[q[starts[settled]]] = False
+    # the other groups are decided in a single pass in the order of the points
+    decided, preceding = kept.tolist(), i.tolist()
+    for start, end, point in zip(starts[~settled].tolist(), ends[~settled].tolist(), q[starts[~settled]].tolist()):
+        decided[point] = not any(decided[k] for k in preceding[start:end])
+    return _select(points, np.array(decided, dtype=bool))
+
+
+def intersect(points: Points, others: PointArray | Sequence[Point], tolerance: float = TOLERANCE) -> Points:
+    """Points equal to some of the other points, in their original order."""
+    return _select(points, match(points, others, tolerance)>=0)
+
+
+def difference(points: Points, others: PointArray | Sequence[Point], tolerance: float = TOLERANCE) -> Points:
+    """Points not equal to any of the other points, in their original order."""
+    return _select(points, match(points, others, tolerance)<0)
+
+
+def _equal_pairs(
+    points: PointArray,
+    others: PointArray,
+    tolerance: float
+) -> tuple[IntArray, IntArray, npt.NDArray[np.float64]]:
+    # indices of the pairs of equal points and their squared distances
+    if tolerance<=0:
+        raise ValueError("Tolerance must be positive.")
+    # the pairs are searched slightly beyond the tolerance, so that the pairs at the distance of the tolerance
+    # are found despite the rounding of the distances, and the equality is decided as by `Point.__eq__`
+    reach = tolerance*(1 + 1e-9)
+    q, i, _ = PointIndex(others, cell_size=2*reach).pairs(points, reach)
+    squared = (
+        (others.x[i] - points.x[q])**2 + (others.y[i] - points.y[q])**2 + (others.z[i] - points.z[q])**2
+    )
+    equal = squared<=tolerance**2
+    return q[equal], i[equal], squared[equal]
+
+
+def _as_point_array(points: PointArray | Sequence[Point]) -> PointArray:
+    return points if isinstance(points, PointArray) else PointArray.from_points(points)
+
+
+def _select(points: Points, mask: npt.NDArray[np.bool_]) -> Points:
+    if isinstance(points, PointArray):
+        return points[mask]
+    return [points[k] for k in np.flatnonzero(mask).tolist()]
@@ -1,38 +1,74 @@
 from __future__ import annotations
 from math import sqrt, acos, sin, cos, pi, floor, atan
+from typing import TYPE_CHECKING, Iterable, Iterator, overload
+import collections
 import dataclasses
+import operator
+import time
+
+import numpy as np
+import numpy.typing as npt
+
+from . import instrumentation, vectorized
+from .kappa_table import KappaTable
+
+if TYPE_CHECKING:
+    from .spherical import SphericalPoint, SphericalPointArray
 
 
 Xyz = tuple[float,float,float]
 
 
 TOLERANCE = 1e-07
+PLAN_CACHE_SIZE = 64
 
 
-@dataclasses.dataclass(frozen=True)
 class Point:
-    x: float
-    y: float
-    z: float
-    rev: int = 0
+    """Point given by cartesian coordinates and number of revolutions.
+
+    Points are immutable. The distance from the origin and the angles are evaluated on first access and cached.
+    """
+
+    __slots__ = ("_x", "_y", "_z", "_rev", "_r", "_omega", "_phi")
+    __match_args__ = ("x", "y", "z", "rev")
+
+    def __init__(self, x: float, y: float, z: float, rev: int = 0) -> None:
+        self._x = x
+        self._y = y
+        self._z = z
+        self._rev = rev
+
+    x = property(operator.attrgetter("_x"))
+    y = property(operator.attrgetter("_y"))
+    z = property(operator.attrgetter("_z"))
+    rev = property(operator.attrgetter("_rev"))
 
     @property
     def xyz(self) -> tuple[float,float,float]:
         """Cartesian coordinates with respect to a base plane."""
-        return self.x, self.y, self.z
+        return self._x, self._y, self._z
 
     @property
     def r(self) -> float:
         """Distance from the origin"""
-        return sqrt(self.x**2 + self.y**2 + self.z**2)
+        try:
+            return self._r
+        except AttributeError:
+            self._r = r = sqrt(self._x**2 + self._y**2 + self._z**2)
+            return r
 
     @property
     def omega(self) -> float:
         """Angle between base plane and the plane defined by this point and the x axis."""
-        if self.z==0:
-            return 0 if self.y>=0 else pi
-        else:
-            return  sgn(self.z)*acos(self.y/sqrt(self.y**2+self.z**2))
+        try:
+            return self._omega
+        except AttributeError:
+            if self._z==0:
+                omega = 0 if self._y>=0 else pi
+            else:
+                omega = sgn(self._z)*acos(self._y/sqrt(self._y**2+self._z**2))
+            self._omega = omega
+            return omega
 
     @property
     def phi(self) -> float:
@@ -43,26 +79,38 @@ class Point:
         For points with nonzero y coordinate the pi/2 angle corresponds to the positive y direction,
         for zero y coordinate the point has always nonnegative azimuth.
         """
-        phi = 0.0
-        if self.y==0 and self.z==0:
-            phi = 0 if self.x>=0 else -pi
-        else:
-            phi = sgn_0plus(self.y) * acos(self.x/self.r)
-        return phi + 2*pi*self.rev
-
+        try:
+            return self._phi
+        except AttributeError:
+            phi = 0.0
+            if self._y==0 and self._z==0:
+                phi = 0 if self._x>=0 else -pi
+            else:
+                phi = sgn_0plus(self._y) * acos(self._x/self.r)
+            self._phi = phi = phi + 2*pi*self._rev
+            return phi
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Point):
             raise TypeError(f"Equality between point and {type(other)} is not defined.")
-        dist_squared = (other.x-self.x)**2 + (other.y-self.y)**2 + (other.z-self.z)**2
-        return dist_squared <= TOLERANCE**2 and self.rev==other.rev
+        dist_squared = (other._x-self._x)**2 + (other._y-self._y)**2 + (other._z-self._z)**2
+        return dist_squared <= TOLERANCE**2 and self._rev==other._rev
+
+    def __hash__(self) -> int:
+        return hash((self._x, self._y, self._z, self._rev))
 
     def __sub__(self, other: object) -> float:
         if not isinstance(other, Point):
             raise TypeError(f"Cannot subtract {type(other)} from Point.")
-        dist_squared = (other.x-self.x)**2 + (other.y-self.y)**2 + (other.z-self.z)**2
+        dist_squared = (other._x-self._x)**2 + (other._y-self._y)**2 + (other._z-self._z)**2
         return sqrt(dist_squared)
 
+    def __repr__(self) -> str:
+        return f"Point(x={self._x!r}, y={self._y!r}, z={self._z!r}, rev={self._rev!r})"
+
+    def __reduce__(self) -> tuple[type[Point], tuple[float, float, float, int]]:
+        return Point, (self._x, self._y, self._z, self._rev)
+
     @staticmethod
     def from_xyz(*xyz: Xyz) -> list[Point]:
         """Get point from cartesian coordinates.
@@ -72,6 +120,127 @@ class Point:
         return [Point(*coords) for coords in xyz]
 
 
+class PointArray:
+    """Columnar (struct-of-arrays) container of points.
+
+    Coordinates are stored in separate float64 columns and revolutions in an int32 column,
+    i.e., 28 bytes per point. Slicing returns a view sharing the columns with the original array.
+
+    With `dtype=np.float32`, the coordinates are stored in float32 columns (16 bytes per point)
+    and the point array is projected in single precision. See `vectorized` for the accuracy.
+    """
+
+    __slots__ = ("x", "y", "z", "rev")
+
+    def __init__(
+        self,
+        x: npt.ArrayLike,
+        y: npt.ArrayLike,
+        z: npt.ArrayLike,
+        rev: npt.ArrayLike | None = None,
+        dtype: npt.DTypeLike = np.float64
+    ) -> None:
+
+        dtype = _coordinate_dtype(dtype)
+        self.x = np.asarray(x, dtype=dtype)
+        self.y = np.asarray(y, dtype=dtype)
+        self.z = np.asarray(z, dtype=dtype)
+        if rev is None:
+            rev = np.zeros(self.x.shape, dtype=np.int32)
+        self.rev = np.asarray(rev, dtype=np.int32)
+        if not self.x.ndim==1 or not self.x.shape==self.y.shape==self.z.shape==self.rev.shape:
+            raise ValueError("Point array columns must be one-dimensional and of equal length.")
+
+    @staticmethod
+    def empty(n: int, dtype: npt.DTypeLike = np.float64) -> PointArray:
+        return PointArray(np.empty(n, dtype), np.empty(n, dtype), np.empty(n, dtype), np.empty(n, dtype=np.int32), dtype)
+
+    @staticmethod
+    def from_xyz(xyz: npt.ArrayLike, rev: npt.ArrayLike | None = None, dtype: npt.DTypeLike = np.float64) -> PointArray:
+        """Get point array from an (N,3) array of cartesian coordinates.
+
+        Revolutions default to zero.
+        """
+        x, y, z = np.ascontiguousarray(np.asarray(xyz, dtype=_coordinate_dtype(dtype)).reshape(-1, 3).T)
+        if rev is not None:
+            rev = np.array(np.broadcast_to(np.asarray(rev, dtype=np.int32), x.shape))
+        return PointArray(x, y, z, rev, x.dtype)
+
+    @staticmethod
+    def from_points(points: Iterable[Point], dtype: npt.DTypeLike = np.float64) -> PointArray:
+        points = list(points)
+        return PointArray(
+            [p.x for p in points],
+            [p.y for p in points],
+            [p.z for p in points],
+            [p.rev for p in points],
+            dtype
+        )
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Type of the coordinates, float32 or float64."""
+        return self.x.dtype
+
+    def astype(self, dtype: npt.DTypeLike) -> PointArray:
+        """Point array with coordinates of the given type. Returns the array itself if the type is the same."""
+        if np.dtype(dtype)==self.dtype:
+            return self
+        return PointArray(self.x, self.y, self.z, self.rev, dtype)
+
+    def to_points(self) -> list[Point]:
+        return [Point(*coords) for coords in zip(self.x.tolist(), self.y.tolist(), self.z.tolist(), self.rev.tolist())]
+
+    @property
+    def xyz(self) -> npt.NDArray[np.float64]:
+        """(N,3) array of cartesian coordinates with respect to a base plane."""
+        return np.stack((self.x, self.y, self.z), axis=-1)
+
+    @property
+    def r(self) -> npt.NDArray[np.float64]:
+        """Distances from the origin"""
+        return np.sqrt(self.x**2 + self.y**2 + self.z**2)
+
+    @property
+    def omega(self) -> npt.NDArray[np.float64]:
+        """Angles between base plane and the planes defined by the points and the x axis."""
+        return vectorized.omega(self.y, self.z)
+
+    @property
+    def phi(self) -> npt.NDArray[np.float64]:
+        """Azimuths measured in the planes defined by the points and the x axis."""
+        return vectorized.phi(self.x, self.y, self.z, self.rev)
+
+    @property
+    def nbytes(self) -> int:
+        return self.x.nbytes + self.y.nbytes + self.z.nbytes + self.rev.nbytes
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __iter__(self) -> Iterator[Point]:
+        return iter(self.to_points())
+
+    @overload
+    def __getitem__(self, key: int) -> Point: ...
+    @overload
+    def __getitem__(self, key: slice | npt.ArrayLike) -> PointArray: ...
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return Point(float(self.x[key]), float(self.y[key]), float(self.z[key]), int(self.rev[key]))
+        return PointArray(self.x[key], self.y[key], self.z[key], self.rev[key], self.dtype)
+
+    def __repr__(self) -> str:
+        return f"PointArray(n={len(self)})"
+
+
+def _coordinate_dtype(dtype: npt.DTypeLike) -> np.dtype:
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError(f"Coordinates can be only float32 or float64, got {dtype}.")
+    return dtype
+
+
 def sgn(x: float) -> int:
     """Signum function."""
     return 1 if x>0 else (-1 if x<0 else 0)
@@ -83,34 +252,113 @@ def sgn_0plus(x: float) -> int:
 
 class Projector:
 
-    def __init__(self, lambda_: float = 1.0) -> None:
+    def __init__(
+        self,
+        lambda_: float = 1.0,
+        plan_cache_size: int = PLAN_CACHE_SIZE,
+        kappa_error: float | None = None
+    ) -> None:
+        """Projector with the given lambda.
+
+        If `kappa_error` is set, kappa is evaluated by interpolating in a table with the given
+        maximum absolute error instead of being evaluated exactly.
+        """
         self._lambda = lambda_
+        self._plans: collections.OrderedDict[float, ProjectionPlan] = collections.OrderedDict()
+        self._plan_cache_size = plan_cache_size
+        self._kappa_table = None if kappa_error is None else KappaTable(lambda_, kappa_error)
 
     @property
     def lambda_(self) -> float:
         return self._lambda
 
-    def point(self, point: Point, base: float = 0) -> Point:
-        # align to base
-        point1 = rot_yz(point, -base)
-        # align to points plane
-        omega = point1.omega
-        phi = point1.phi
-        point2 = rot_yz(point1, -omega)
-        if point2.y==0:
-            kappa = 1.0
-        else:
-            kappa = self.kappa(point2.x, abs(point2.y))
-
-        # limit phi
-        point3 = rot_xy(point2, -phi)
-        phi = limit_azimuth(phi, 2*pi*self._lambda)
-        point4 = rot_xy(point3, phi)
+    @property
+    def kappa_table(self) -> KappaTable | None:
+        return self._kappa_table
+
+    @overload
+    def point(self, point: Point, base: float = 0) -> Point: ...
+    @overload
+    def point(self, point: SphericalPoint, base: float = 0) -> SphericalPoint: ...
+    def point(self, point, base=0):
+        """Project a point. Points given by spherical coordinates are projected without converting them."""
+        if not isinstance(point, Point):
+            return point.project(self._lambda, base, self._kappa_table)
+        return Point(*project(point.x, point.y, point.z, point.rev, self._lambda, base, self._kappa_table))
+
+    def points(
+        self,
+        xyz: npt.ArrayLike,
+        rev: npt.ArrayLike | None = None,
+        base: npt.ArrayLike = 0.0,
+        dtype: npt.DTypeLike = np.float64
+    ) -> tuple[npt.NDArray[np.floating], npt.NDArray[np.int32]]:
+        """Project a batch of points given as an (N,3) array of cartesian coordinates.
+
+        Revolutions default to zero. The base plane angle is either a scalar shared by all points
+        or an array with one angle per point. The points are projected in the precision of `dtype`,
+        float64 or float32.
+
+        Return the (N,3) array of projected coordinates and the array of their revolutions.
+        """
+        images = self.point_array(PointArray.from_xyz(xyz, rev, dtype), base)
+        return images.xyz, images.rev
+
+    @overload
+    def point_array(self, points: PointArray, base: npt.ArrayLike = 0.0, out: PointArray | None = None) -> PointArray: ...
+    @overload
+    def point_array(self, points: SphericalPointArray, base: npt.ArrayLike = 0.0) -> SphericalPointArray: ...
+    def point_array(self, points, base=0.0, out=None):
+        """Project a point array. The base plane angle is either a scalar or an array with one angle per point.
+
+        The images are written to `out` if given, a point array of the same length, and it is returned.
+        Arrays of points given by spherical coordinates are projected without converting them.
+        """
+        if not isinstance(points, PointArray):
+            if out is not None:
+                raise ValueError("Images of points given by spherical coordinates cannot be written to a point array.")
+            return points.project(self._lambda, base, self._kappa_table)
+        return _project_array(points, self._lambda, base, self._kappa_table, out)
+
+    def unproject(self, point: Point, base: float = 0) -> Point | None:
+        """Get the point projected to the given image, or None if it is not unique. See `unproject_array`."""
+        points, valid = self.unproject_array(PointArray.from_points([point]), base)
+        return points[0] if valid[0] else None
+
+    def unproject_array(self, points: PointArray, base: npt.ArrayLike = 0.0) -> tuple[PointArray, npt.NDArray[np.bool_]]:
+        """Get the points projected to the images in a point array. Inverse of `point_array`.
+
+        Return the points and the mask of valid results. The images of points with the azimuth changed
+        by the azimuth limit, images out of the range of the projection and images of more than one plane
+        are not valid and their coordinates are NaN. See `vectorized.unproject`.
+        """
+        return _unproject_array(points, self._lambda, base, self._kappa_table)
 
-        point1a = rot_yz(point4, omega/kappa)
-        return rot_yz(point1a, base)
+    def plan(self, base: float = 0) -> ProjectionPlan:
+        """Get projection with fixed base plane angle.
 
-    def kappa(self, x: float, radius: float) -> float:
+        The plans are kept in a cache bounded by `plan_cache_size`, where the least recently used plan
+        is dropped first.
+        """
+        plan = self._plans.get(base)
+        if plan is None:
+            plan = ProjectionPlan.create(self._lambda, base, self._kappa_table)
+            self._plans[base] = plan
+            if len(self._plans) > self._plan_cache_size:
+                self._plans.popitem(last=False)
+        else:
+            self._plans.move_to_end(base)
+        return plan
+
+    @overload
+    def kappa(self, x: float, radius: float) -> float: ...
+    @overload
+    def kappa(self, x: npt.NDArray[np.float64], radius: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]: ...
+    def kappa(self, x, radius):
+        if self._kappa_table is not None:
+            return self._kappa_table(x, radius)
+        if np.ndim(x) or np.ndim(radius):
+            return vectorized.kappa(np.asarray(x, dtype=np.float64), np.asarray(radius, dtype=np.float64), self._lambda)
         if radius == 0:
             if x > 0:
                 return 1
@@ -123,6 +371,222 @@ class Projector:
             return self._lambda*c*sin(acos(s)/self._lambda)
 
 
+@dataclasses.dataclass(frozen=True)
+class ProjectionPlan:
+    """Projection with fixed lambda and base plane angle.
+
+    Holds the constants shared by all the projected points, i.e., the cosine and sine of the base plane angle
+    and the azimuth limit gamma, and optionally the table of kappa.
+    """
+    lambda_: float
+    base: float
+    cos_base: float
+    sin_base: float
+    gamma: float
+    kappa_table: KappaTable | None = None
+
+    @staticmethod
+    def create(lambda_: float, base: float = 0, kappa_table: KappaTable | None = None) -> ProjectionPlan:
+        return ProjectionPlan(lambda_, base, cos(base), sin(base), 2*pi*lambda_, kappa_table)
+
+    @overload
+    def point(self, point: Point) -> Point: ...
+    @overload
+    def point(self, point: SphericalPoint) -> SphericalPoint: ...
+    def point(self, point):
+        if not isinstance(point, Point):
+            return point.project(self.lambda_, self.base, self.kappa_table)
+        return Point(*_project(
+            point.x, point.y, point.z, point.rev, self.lambda_, self.gamma, self.cos_base, self.sin_base, self.kappa_table
+        ))
+
+    def coordinates(
+        self,
+        x: float,
+        y: float,
+        z: float,
+        rev: int = 0,
+        azimuth: float | None = None
+    ) -> tuple[float, float, float, int]:
+        """Project a point given by its coordinates. Return the coordinates and revolutions of the image.
+
+        The azimuth of the point relative to the base plane without the revolutions (see `azimuth`) is evaluated
+        unless it is given.
+        """
+        return _project(
+            x, y, z, rev, self.lambda_, self.gamma, self.cos_base, self.sin_base, self.kappa_table, azimuth
+        )
+
+    def azimuth(self, x: float, y: float, z: float) -> float:
+        """Azimuth of a point relative to the base plane without revolutions, as evaluated by the projection."""
+        return _azimuth(x, self.cos_base*y + self.sin_base*z, self.cos_base*z - self.sin_base*y)
+
+    def points(
+        self,
+        xyz: npt.ArrayLike,
+        rev: npt.ArrayLike | None = None,
+        dtype: npt.DTypeLike = np.float64
+    ) -> tuple[npt.NDArray[np.floating], npt.NDArray[np.int32]]:
+        """Project a batch of points given as an (N,3) array of cartesian coordinates. See `Projector.points`."""
+        images = self.point_array(PointArray.from_xyz(xyz, rev, dtype))
+        return images.xyz, images.rev
+
+    @overload
+    def point_array(self, points: PointArray) -> PointArray: ...
+    @overload
+    def point_array(self, points: SphericalPointArray) -> SphericalPointArray: ...
+    def point_array(self, points):
+        if not isinstance(points, PointArray):
+            return points.project(self.lambda_, self.base, self.kappa_table)
+        return _project_array(points, self.lambda_, self.base, self.kappa_table)
+
+    def unproject_array(self, points: PointArray) -> tuple[PointArray, npt.NDArray[np.bool_]]:
+        """Get the points projected to the images in a point array. See `Projector.unproject_array`."""
+        return _unproject_array(points, self.lambda_, self.base, self.kappa_table)
+
+
+def project(
+    x: float,
+    y: float,
+    z: float,
+    rev: int,
+    lambda_: float,
+    base: float = 0,
+    kappa_table: KappaTable | None = None
+) -> tuple[float, float, float, int]:
+    """Project a point given by its coordinates and revolutions. Return the coordinates and revolutions of the image.
+
+    Evaluates the chain of rotations of `Projector.point` without creating the intermediate points.
+    Sine and cosine of each angle are evaluated only once and reused for the rotation back
+    (both functions are symmetric), so the results are identical to those of the chain.
+    """
+    return _project(x, y, z, rev, lambda_, 2*pi*lambda_, cos(base), sin(base), kappa_table)
+
+
+def _project(
+    x: float,
+    y: float,
+    z: float,
+    rev: int,
+    lambda_: float,
+    gamma: float,
+    cb: float,
+    sb: float,
+    kappa_table: KappaTable | None = None,
+    azimuth: float | None = None
+) -> tuple[float, float, float, int]:
+    # with an active recorder, the clock is read between the stages (see `instrumentation`)
+    recorder = instrumentation.active.get()
+    if recorder is not None:
+        clock = time.perf_counter
+        t0 = clock()
+    # align to base
+    y1, z1 = cb*y + sb*z, cb*z - sb*y
+    y1_sq, z1_sq = y1**2, z1**2
+    if recorder is not None:
+        t1 = clock()
+
+    # align to points plane
+    if z1==0:
+        omega = 0 if y1>=0 else pi
+    else:
+        omega = sgn(z1)*acos(y1/sqrt(y1_sq+z1_sq))
+    # the expression of `_azimuth`, inlined in the hot path
+    if azimuth is not None:
+        phi = azimuth
+    elif y1==0 and z1==0:
+        phi = 0 if x>=0 else -pi
+    else:
+        phi = sgn_0plus(y1)*acos(x/sqrt(x**2 + y1_sq + z1_sq))
+    phi = phi + 2*pi*rev
+    c, s = cos(omega), sin(omega)
+    y2, z2 = c*y1 + s*z1, c*z1 - s*y1
+    c, s = cos(phi), sin(phi)
+    x3, y3 = c*x + s*y2, c*y2 - s*x
+    if recorder is not None:
+        t2 = clock()
+
+    if y2==0:
+        kappa = 1.0
+    elif kappa_table is not None:
+        kappa = kappa_table.scalar(x, abs(y2))
+    else:
+        radius = abs(y2)
+        q = sqrt(radius**2 + x**2)
+        kappa = lambda_*(q/radius)*sin(acos(x/q)/lambda_)
+    if recorder is not None:
+        t3 = clock()
+
+    # limit phi
+    phi_limited = limit_azimuth(phi, gamma)
+    if phi_limited!=phi:
+        c, s = cos(phi_limited), sin(phi_limited)
+    x4, y4 = c*x3 - s*y3, s*x3 + c*y3
+    if z2==0:
+        omega3 = 0 if y3>=0 else pi
+    else:
+        omega3 = sgn(z2)*acos(y3/sqrt(y3**2+z2**2))
+    n = floor((omega3 + phi_limited + pi)/(2*pi))
+    if recorder is not None:
+        t4 = clock()
+
+    c, s = cos(omega/kappa), sin(omega/kappa)
+    y5, z5 = c*y4 - s*z2, s*y4 + c*z2
+    image = x4, cb*y5 - sb*z5, sb*y5 + cb*z5, n
+    if recorder is not None:
+        recorder.add_point(
+            (t0, t1, t2, t3, t4, clock()), (y2==0, y1==0 and z1==0, phi_limited!=phi), kappa, n
+        )
+    return image
+
+
+def _azimuth(x: float, y1: float, z1: float) -> float:
+    # azimuth without revolutions of a point aligned to the base plane
+    if y1==0 and z1==0:
+        return 0 if x>=0 else -pi
+    return sgn_0plus(y1)*acos(x/sqrt(x**2 + y1**2 + z1**2))
+
+
+def _project_array(
+    points: PointArray,
+    lambda_: float,
+    base: npt.ArrayLike,
+    kappa_table: KappaTable | None = None,
+    out: PointArray | None = None
+) -> PointArray:
+    base = np.asarray(base, dtype=np.float64)
+    if out is not None and len(out)!=len(points):
+        raise ValueError("Output must have as many points as the projected array.")
+    images = PointArray.empty(len(points), points.dtype) if out is None else out
+    recorder = instrumentation.active.get()
+    # chunks small enough for the temporaries to stay in cache
+    for i in range(0, len(points), vectorized.CHUNK_SIZE):
+        k = slice(i, i+vectorized.CHUNK_SIZE)
+        images.x[k], images.y[k], images.z[k], images.rev[k] = vectorized.project(
+            points.x[k], points.y[k], points.z[k], points.rev[k], lambda_, base if base.ndim==0 else base[k],
+            kappa_table, recorder
+        )
+    return images
+
+
+def _unproject_array(
+    points: PointArray,
+    lambda_: float,
+    base: npt.ArrayLike,
+    kappa_table: KappaTable | None = None
+) -> tuple[PointArray, npt.NDArray[np.bool_]]:
+    base = np.asarray(base, dtype=np.float64)
+    sources = PointArray.empty(len(points), points.dtype)
+    valid = np.empty(len(points), dtype=bool)
+    for i in range(0, len(points), vectorized.CHUNK_SIZE):
+        k = slice(i, i+vectorized.CHUNK_SIZE)
+        sources.x[k], sources.y[k], sources.z[k], sources.rev[k], valid[k] = vectorized.unproject(
+            points.x[k], points.y[k], points.z[k], points.rev[k], lambda_, base if base.ndim==0 else base[k],
+            kappa_table, TOLERANCE
+        )
+    return sources, valid
+
+
 def limit_azimuth(phi: float, gamma: float) -> float:
     s = sgn(phi)
     phi_0 = phi
@@ -0,0 +1,267 @@
+"""Warping of raster images by remap tables computed once per projection and pair of grids.
+
+A raster grid places the pixels of an image in a plane in the space: the center of the pixel in the row i
+and column j lies at `origin + j*u + i*v`. For every pixel of the target grid, the remap table holds the
+position in the source grid of the point projected to the pixel center, so that the warped frame shows
+the source frame moved by the projection. Warping a frame is then only a gather from the source frame,
+whose cost does not depend on the projection.
+
+The tables are computed and applied in tiles of bounded size, optionally in parallel, and kept in a cache
+in memory and optionally on disk, keyed by the projection and the grids.
+"""
+from __future__ import annotations
+from concurrent.futures import Executor
+from typing import Iterator
+import collections
+import dataclasses
+import hashlib
+import os
+
+import numpy as np
+import numpy.typing as npt
+
+from .projection import Projector, ProjectionPlan, PointArray, Xyz
+
+
+DEFAULT_TILE_SIZE = 256
+TABLE_CACHE_SIZE = 8
+METHODS = ("nearest", "bilinear")
+
+
+@dataclasses.dataclass(frozen=True)
+class RasterGrid:
+    """Pixels of an image with `shape` (rows, columns) placed in a plane."""
+    shape: tuple[int,int]
+    origin: Xyz = (0.0, 0.0, 0.0)
+    u: Xyz = (1.0, 0.0, 0.0)
+    v: Xyz = (0.0, 1.0, 0.0)
+
+    def points(self, rows: slice, cols: slice) -> npt.NDArray[np.float64]:
+        """Centers of the pixels in the given rows and columns as an (R,C,3) array."""
+        i = np.arange(*rows.indices(self.shape[0]), dtype=np.float64)
+        j = np.arange(*cols.indices(self.shape[1]), dtype=np.float64)
+        return (
+            np.asarray(self.origin) + j[None,:,None]*np.asarray(self.u) + i[:,None,None]*np.asarray(self.v)
+        )
+
+    def pixels(self, xyz: npt.NDArray[np.float64]) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """Rows and columns (not rounded) of points given by an (...,3) array, projected orthogonally to the plane."""
+        axes = np.column_stack((self.u, self.v))
+        coefficients = (np.asarray(xyz) - np.asarray(self.origin)) @ np.linalg.pinv(axes).T
+        return coefficients[...,1], coefficients[...,0]
+
+
+class RemapTable:
+    """Rows and columns of the source pixels sampled by the pixels of the target grid.
+
+    Target pixels which are not valid images of a single point with zero revolutions
+    (see `Projector.unproject_array`) have NaN position and are never sampled.
+    """
+
+    def __init__(self, rows: npt.NDArray[np.float32], cols: npt.NDArray[np.float32]) -> None:
+        if rows.shape!=cols.shape or rows.ndim!=2:
+            raise ValueError("Rows and columns of a remap table must be two-dimensional arrays of equal shape.")
+        self.rows = rows
+        self.cols = cols
+
+    @property
+    def shape(self) -> tuple[int,int]:
+        return self.rows.shape
+
+    @staticmethod
+    def compute(
+        projector: Projector,
+        base: float,
+        target: RasterGrid,
+        source: RasterGrid,
+        tile_size: int = DEFAULT_TILE_SIZE,
+        executor: Executor | None = None
+    ) -> RemapTable:
+        rows = np.empty(target.shape, dtype=np.float32)
+        cols = np.empty(target.shape, dtype=np.float32)
+        plan = projector.plan(base)
+
+        def compute_tile(tile: tuple[slice,slice]) -> None:
+            xyz = target.points(*tile)
+            r, c = source.pixels(_preimages(plan, xyz.reshape(-1, 3)).reshape(xyz.shape))
+            rows[tile], cols[tile] = r, c
+
+        _run(compute_tile, _tiles(target.shape, tile_size), executor)
+        return RemapTable(rows, cols)
+
+    def warp(
+        self,
+        frame: npt.ArrayLike,
+        method: str = "bilinear",
+        fill: float = 0,
+        tile_size: int = DEFAULT_TILE_SIZE,
+        executor: Executor | None = None
+    ) -> np.ndarray:
+        """Sample a source frame of shape (rows, columns) or (rows, columns, channels).
+
+        Target pixels sampling outside the source frame are set to `fill`.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown sampling method '{method}', expected one of {METHODS}.")
+        frame = np.asarray(frame)
+        output = np.empty(self.shape + frame.shape[2:], dtype=frame.dtype if method=="nearest" else np.float64)
+        sample = _nearest if method=="nearest" else _bilinear
+
+        def warp_tile(tile: tuple[slice,slice]) -> None:
+            output[tile] = sample(frame, np.asarray(self.rows[tile]), np.asarray(self.cols[tile]), fill)
+
+        _run(warp_tile, _tiles(self.shape, tile_size), executor)
+        return output
+
+
+class RemapCache:
+    """Remap tables kept in memory, at most `size` of them, and in the `directory` if given.
+
+    The least recently used table is dropped from memory first. Tables stored on disk are memory mapped
+    when loaded, so that warping a large grid does not need the whole table in memory.
+    """
+
+    def __init__(self, directory: str | None = None, size: int = TABLE_CACHE_SIZE) -> None:
+        self._directory = directory
+        self._size = size
+        self._tables: collections.OrderedDict[str, RemapTable] = collections.OrderedDict()
+
+    def table(
+        self,
+        projector: Projector,
+        base: float,
+        target: RasterGrid,
+        source: RasterGrid,
+        tile_size: int = DEFAULT_TILE_SIZE,
+        executor: Executor | None = None
+    ) -> RemapTable:
+        key = _key(projector, base, target, source)
+        table = self._tables.get(key)
+        if table is not None:
+            self._tables.move_to_end(key)
+            return table
+        path = None if self._directory is None else os.path.join(self._directory, f"remap-{key}.npy")
+        if path is not None and os.path.exists(path):
+            stored = np.load(path, mmap_mode="r")
+            table = RemapTable(stored[0], stored[1])
+        else:
+            table = RemapTable.compute(projector, base, target, source, tile_size, executor)
+            if path is not None:
+                _save(path, table)
+        self._tables[key] = table
+        if len(self._tables) > self._size:
+            self._tables.popitem(last=False)
+        return table
+
+
+class Warper:
+    """Warps frames from the source grid to the target grid by the projection with the given base plane angle.
+
+    The remap table is taken from the cache on the first warped frame.
+    """
+
+    def __init__(
+        self,
+        projector: Projector,
+        source: RasterGrid,
+        target: RasterGrid,
+        base: float = 0.0,
+        cache: RemapCache | None = None,
+        tile_size: int = DEFAULT_TILE_SIZE,
+        executor: Executor | None = None
+    ) -> None:
+        self._projector = projector
+        self._source = source
+        self._target = target
+        self._base = base
+        self._cache = RemapCache() if cache is None else cache
+        self._tile_size = tile_size
+        self._executor = executor
+        self._table: RemapTable | None = None
+
+    @property
+    def table(self) -> RemapTable:
+        if self._table is None:
+            self._table = self._cache.table(
+                self._projector, self._base, self._target, self._source, self._tile_size, self._executor
+            )
+        return self._table
+
+    def __call__(self, frame: npt.ArrayLike, method: str = "bilinear", fill: float = 0) -> np.ndarray:
+        return self.table.warp(frame, method, fill, self._tile_size, self._executor)
+
+
+def _preimages(plan: ProjectionPlan, xyz: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    # points with zero revolutions projected to the given points, NaN where there is none or more than one;
+    # their images have revolutions -1, 0 or 1
+    targets = PointArray.from_xyz(xyz)
+    preimages = np.full(xyz.shape, np.nan)
+    found = np.zeros(len(xyz), dtype=np.int64)
+    for rev in (0, -1, 1):
+        targets.rev[:] = rev
+        with np.errstate(invalid="ignore", divide="ignore"):
+            points, valid = plan.unproject_array(targets)
+        valid &= points.rev==0
+        preimages[valid] = points.xyz[valid]
+        found += valid
+    preimages[found>1] = np.nan
+    return preimages
+
+
+def _key(projector: Projector, base: float, target: RasterGrid, source: RasterGrid) -> str:
+    kappa_error = None if projector.kappa_table is None else projector.kappa_table.max_error
+    description = repr((projector.lambda_, kappa_error, float(base), target, source))
+    return hashlib.sha1(description.encode()).hexdigest()
+
+
+def _save(path: str, table: RemapTable) -> None:
+    # written under a temporary name first, so that a table interrupted while saving is never loaded
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        np.save(file, np.stack((table.rows, table.cols)))
+    os.replace(temporary, path)
+
+
+def _tiles(shape: tuple[int,int], tile_size: int) -> Iterator[tuple[slice,slice]]:
+    for i in range(0, shape[0], tile_size):
+        for j in range(0, shape[1], tile_size):
+            yield slice(i, i+tile_size), slice(j, j+tile_size)
+
+
+def _run(function, tiles: Iterator[tuple[slice,slice]], executor: Executor | None) -> None:
+    if executor is None:
+        for tile in tiles:
+            function(tile)
+    else:
+        # the results are consumed to raise the exceptions of the tiles
+        list(executor.map(function, tiles))
+
+
+def _nearest(frame: np.ndarray, rows: np.ndarray, cols: np.ndarray, fill: float) -> np.ndarray:
+    with np.errstate(invalid="ignore"):
+        valid = (rows>=-0.5) & (rows<frame.shape[0]-0.5) & (cols>=-0.5) & (cols<frame.shape[1]-0.5)
+    i, j = np.rint(rows), np.rint(cols)
+    i = np.where(valid, i, 0).astype(np.intp).clip(0, frame.shape[0]-1)
+    j = np.where(valid, j, 0).astype(np.intp).clip(0, frame.shape[1]-1)
+    values = frame[i, j]
+    values[~valid] = fill
+    return values
+
+
+def _bilinear(frame: np.ndarray, rows: np.ndarray, cols: np.ndarray, fill: float) -> np.ndarray:
+    # as for the nearest pixel, positions up to half a pixel outside the frame are sampled at its border
+    with np.errstate(invalid="ignore"):
+        valid = (rows>=-0.5) & (rows<frame.shape[0]-0.5) & (cols>=-0.5) & (cols<frame.shape[1]-0.5)
+    rows = np.where(valid, rows, 0).clip(0, frame.shape[0]-1)
+    cols = np.where(valid, cols, 0).clip(0, frame.shape[1]-1)
+    i = np.minimum(np.floor(rows).astype(np.intp), frame.shape[0]-2).clip(0)
+    j = np.minimum(np.floor(cols).astype(np.intp), frame.shape[1]-2).clip(0)
+    i1, j1 = np.minimum(i+1, frame.shape[0]-1), np.minimum(j+1, frame.shape[1]-1)
+    extra = (slice(None),)*2 + (None,)*(frame.ndim-2)
+    di, dj = (rows - i)[extra], (cols - j)[extra]
+    values = (
+        (frame[i,j]*(1-dj) + frame[i,j1]*dj)*(1-di)
+        + (frame[i1,j]*(1-dj) + frame[i1,j1]*dj)*di
+    )
+    values[~valid] = fill
+    return values
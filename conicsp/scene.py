@@ -0,0 +1,132 @@
+"""Live scene of points whose images are kept up to date by re-projecting only what changed.
+
+The scene stores the source points together with the intermediate state of their projection in the spherical
+representation (see `conicsp.spherical`): the distance r, the angle theta from the x axis and the angle omega
+of the plane of the point and the x axis, measured from the y axis, and kappa. These do not depend on the base
+plane. The state depending on the base plane, i.e., the angle omega relative to it, the azimuth phi and the
+image, is evaluated from them by a few wraps and a single sine and cosine per point.
+
+Moving points marks them dirty; the next refresh evaluates the whole state of the dirty points only.
+Changing the base plane re-evaluates the base-dependent state of all the points, but none of the rest.
+
+The images equal those of `Projector.point_array` up to rounding. The revolutions are those of the limited
+azimuth, as by `SphericalPointArray.project`. Those of `Projector.point_array` add the rounded angle of
+the points rotated on the x axis and differ by one for about a quarter of points in general position,
+see `conicsp.spherical`.
+"""
+from __future__ import annotations
+
+import numpy as np
+import numpy.typing as npt
+
+from .projection import Projector, PointArray
+from .spherical import SphericalPointArray, kappa_array, project_angles
+
+
+class Scene:
+    """Points projected by the projector with the base plane angle `base`, re-projected incrementally."""
+
+    def __init__(self, projector: Projector, points: PointArray, base: float = 0.0) -> None:
+        n = len(points)
+        self._projector = projector
+        self._base = float(base)
+        self._points = PointArray(points.x.copy(), points.y.copy(), points.z.copy(), points.rev.copy(), points.dtype)
+        self._r, self._theta, self._omega_abs, self._kappa, self._omega, self._phi = (
+            np.empty(n, dtype=np.float64) for _ in range(6)
+        )
+        self._images = PointArray.empty(n, points.dtype)
+        self._dirty: list[npt.NDArray[np.intp]] = [np.arange(n)]
+        self._base_changed = False
+
+    @property
+    def projector(self) -> Projector:
+        return self._projector
+
+    @property
+    def base(self) -> float:
+        return self._base
+
+    @base.setter
+    def base(self, base: float) -> None:
+        if base!=self._base:
+            self._base = float(base)
+            self._base_changed = True
+
+    @property
+    def points(self) -> PointArray:
+        """Source points. Change them with `move` only."""
+        return self._points
+
+    @property
+    def omega(self) -> npt.NDArray[np.float64]:
+        """Angles omega of the source points relative to the base plane (as `Point.omega`)."""
+        self.refresh()
+        return self._omega
+
+    @property
+    def phi(self) -> npt.NDArray[np.float64]:
+        """Azimuths of the source points (as `Point.phi`)."""
+        self.refresh()
+        return self._phi
+
+    @property
+    def kappa(self) -> npt.NDArray[np.float64]:
+        self.refresh()
+        return self._kappa
+
+    @property
+    def images(self) -> PointArray:
+        """Images of the source points, re-projected where needed. Do not modify."""
+        self.refresh()
+        return self._images
+
+    @property
+    def n_dirty(self) -> int:
+        """Upper bound on the number of the points to be re-projected by the next refresh."""
+        return len(self) if self._base_changed else sum(len(k) for k in self._dirty)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def move(self, indices: npt.ArrayLike, points: PointArray) -> None:
+        """Replace the source points at the indices by the points and mark them dirty."""
+        indices = np.asarray(indices, dtype=np.intp).reshape(-1)
+        if len(indices)!=len(points):
+            raise ValueError("Number of the indices must equal the number of the points.")
+        indices = np.where(indices<0, indices + len(self), indices)
+        self._points.x[indices], self._points.y[indices], self._points.z[indices] = points.x, points.y, points.z
+        self._points.rev[indices] = points.rev
+        self._dirty.append(indices)
+
+    def refresh(self) -> int:
+        """Re-project the dirty points, or all of them if the base plane changed. Return their number."""
+        if not self._dirty and not self._base_changed:
+            return 0
+        if self._dirty:
+            dirty = np.sort(np.concatenate(self._dirty))
+            dirty = dirty[np.diff(dirty, prepend=-1)!=0]
+            self._dirty.clear()
+            spherical = SphericalPointArray.from_point_array(self._points[dirty])
+            self._r[dirty], self._theta[dirty], self._omega_abs[dirty] = (
+                spherical.r, spherical.theta, spherical.omega
+            )
+            self._kappa[dirty] = kappa_array(spherical.theta, self._projector.lambda_, self._projector.kappa_table)
+        if self._base_changed:
+            self._base_changed = False
+            self._project(slice(None))
+            return len(self)
+        self._project(dirty)
+        return len(dirty)
+
+    def _project(self, key: slice | npt.NDArray[np.intp]) -> None:
+        r, theta = self._r[key], self._theta[key]
+        omega, phi, image_omega, image_theta, n = project_angles(
+            self._omega_abs[key], theta, self._points.rev[key], self._kappa[key], self._projector.lambda_, self._base
+        )
+        self._omega[key], self._phi[key] = omega, phi
+        radius = r*np.sin(image_theta)
+        images = self._images
+        images.x[key], images.y[key], images.z[key] = (
+            r*np.cos(image_theta), radius*np.cos(image_omega), radius*np.sin(image_omega)
+        )
+        images.rev[key] = n
@@ -0,0 +1,434 @@
+"""Local projection service collecting the requests of many clients into batches projected at once.
+
+The server listens on a Unix socket or a TCP port. The requests with the same lambda and base plane angle
+are collected into a micro-batch, which is projected by a single call of the batch projection when it reaches
+`max_batch_size` points or `max_delay` seconds after its first request arrived.
+
+Framing (all values little-endian):
+
+    request   header: request id (uint32), lambda (float64), base (float64), number of points n (uint32),
+              followed by n records of x, y, z (float64) and rev (int32)
+    response  header: request id (uint32), status (uint8), length n (uint32), followed by n records
+              of the images for status OK, or by an error message of n bytes (UTF-8) for status ERROR
+
+A connection can carry any number of requests without waiting for the responses, which are matched
+to the requests by their ids. The client keeps a pool of connections and sends each request through
+the connection with the fewest pending requests.
+
+Example:
+    python -m conicsp.service serve --unix /tmp/conicsp.sock
+    python -m conicsp.service load --unix /tmp/conicsp.sock --requests 100000 --concurrency 256
+"""
+from __future__ import annotations
+from math import isfinite
+from typing import Iterable
+import argparse
+import asyncio
+import collections
+import dataclasses
+import itertools
+import struct
+import sys
+import time
+
+import numpy as np
+import numpy.typing as npt
+
+from .projection import Projector, Point, PointArray
+
+
+REQUEST_HEADER = struct.Struct("<IddI")
+RESPONSE_HEADER = struct.Struct("<IBI")
+POINT_DTYPE = np.dtype([("x", "<f8"), ("y", "<f8"), ("z", "<f8"), ("rev", "<i4")])
+OK = 0
+ERROR = 1
+MAX_REQUEST_POINTS = 1 << 20
+DEFAULT_MAX_DELAY = 0.001
+DEFAULT_MAX_BATCH_SIZE = 4096
+DEFAULT_CONNECTIONS = 4
+PROJECTOR_CACHE_SIZE = 16
+
+
+@dataclasses.dataclass
+class ServerStats:
+    requests: int = 0
+    points: int = 0
+    batches: int = 0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.points/self.batches if self.batches>0 else 0.0
+
+
+@dataclasses.dataclass
+class _Batch:
+    records: list[np.ndarray] = dataclasses.field(default_factory=list)
+    requests: list[tuple[asyncio.StreamWriter, int, int]] = dataclasses.field(default_factory=list)
+    size: int = 0
+    timer: asyncio.TimerHandle | None = None
+
+
+class ProjectionServer:
+    """Projects the points received from clients in micro-batches grouped by lambda and base plane angle.
+
+    If `kappa_error` is set, the projectors evaluate kappa from tables, see `Projector`. The projectors
+    of the requested lambdas are kept in a cache bounded by `projector_cache_size`, where the least recently
+    used projector is dropped first.
+    """
+
+    def __init__(
+        self,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        kappa_error: float | None = None,
+        projector_cache_size: int = PROJECTOR_CACHE_SIZE
+    ) -> None:
+        if max_delay<0:
+            raise ValueError("Maximum delay must not be negative.")
+        if max_batch_size<1:
+            raise ValueError("Maximum batch size must be positive.")
+        self._max_delay = max_delay
+        self._max_batch_size = max_batch_size
+        self._kappa_error = kappa_error
+        self._projector_cache_size = projector_cache_size
+        self._projectors: collections.OrderedDict[float, Projector] = collections.OrderedDict()
+        self._batches: dict[tuple[float, float], _Batch] = {}
+        self._server: asyncio.Server | None = None
+        self.stats = ServerStats()
+
+    async def start_unix(self, path: str) -> None:
+        self._server = await asyncio.start_unix_server(self._serve, path)
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Listen on the TCP port, a free port if it is zero. See `port`."""
+        self._server = await asyncio.start_server(self._serve, host, port)
+
+    @property
+    def port(self) -> int:
+        """Port the server listens on."""
+        if self._server is None:
+            raise ValueError("Server is not started.")
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            raise ValueError("Server is not started.")
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        for key in list(self._batches):
+            self._flush(key)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> ProjectionServer:
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_id, lambda_, base, n = REQUEST_HEADER.unpack(await reader.readexactly(REQUEST_HEADER.size))
+                if n>MAX_REQUEST_POINTS:
+                    # the rest of the stream cannot be parsed
+                    _respond_error(writer, request_id, f"Request has {n} points, at most {MAX_REQUEST_POINTS} are allowed.")
+                    break
+                records = np.frombuffer(await reader.readexactly(n*POINT_DTYPE.itemsize), POINT_DTYPE)
+                if lambda_==0 or not isfinite(lambda_) or not isfinite(base):
+                    _respond_error(writer, request_id, f"Invalid lambda {lambda_} or base {base}.")
+                    continue
+                self._add((lambda_, base), records, writer, request_id)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _add(self, key: tuple[float, float], records: np.ndarray, writer: asyncio.StreamWriter, request_id: int) -> None:
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch()
+            batch.timer = asyncio.get_running_loop().call_later(self._max_delay, self._flush, key)
+        batch.records.append(records)
+        batch.requests.append((writer, request_id, len(records)))
+        batch.size += len(records)
+        if batch.size>=self._max_batch_size:
+            self._flush(key)
+
+    def _flush(self, key: tuple[float, float]) -> None:
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        lambda_, base = key
+        try:
+            images = self._projector(lambda_).plan(base).point_array(_to_point_array(np.concatenate(batch.records)))
+        except Exception as error:
+            for writer, request_id, _ in batch.requests:
+                _respond_error(writer, request_id, str(error))
+            return
+        self.stats.requests += len(batch.requests)
+        self.stats.points += batch.size
+        self.stats.batches += 1
+        data = _to_records(images)
+        start = 0
+        for writer, request_id, n in batch.requests:
+            if not writer.is_closing():
+                writer.write(RESPONSE_HEADER.pack(request_id, OK, n) + data[start:start+n].tobytes())
+            start += n
+
+    def _projector(self, lambda_: float) -> Projector:
+        projector = self._projectors.get(lambda_)
+        if projector is None:
+            projector = Projector(lambda_, kappa_error=self._kappa_error)
+            self._projectors[lambda_] = projector
+            if len(self._projectors) > self._projector_cache_size:
+                self._projectors.popitem(last=False)
+        else:
+            self._projectors.move_to_end(lambda_)
+        return projector
+
+
+class ProjectionClient:
+    """Client of a projection server listening on the Unix socket at `path` or on the TCP port.
+
+    Opens up to `connections` connections on demand, each of them carrying any number of concurrent requests.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        host: str = "127.0.0.1",
+        port: int | None = None,
+        connections: int = DEFAULT_CONNECTIONS
+    ) -> None:
+        if (path is None)==(port is None):
+            raise ValueError("Either the path of a Unix socket or a TCP port must be given.")
+        if connections<1:
+            raise ValueError("Number of connections must be positive.")
+        self._path = path
+        self._host = host
+        self._port = port
+        self._max_connections = connections
+        self._connections: list[_Connection] = []
+        self._opening: asyncio.Lock | None = None
+
+    async def point(self, point: Point, lambda_: float, base: float = 0.0) -> Point:
+        images = await self.point_array(PointArray.from_points([point]), lambda_, base)
+        return images[0]
+
+    async def point_array(self, points: PointArray, lambda_: float, base: float = 0.0) -> PointArray:
+        """Project the points on the server. Raise ValueError if the server rejects the request."""
+        connection = await self._connection()
+        return _to_point_array(await connection.request(lambda_, base, _to_records(points)))
+
+    async def close(self) -> None:
+        for connection in self._connections:
+            await connection.close()
+        self._connections.clear()
+
+    async def __aenter__(self) -> ProjectionClient:
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def _connection(self) -> _Connection:
+        self._connections = [c for c in self._connections if not c.closed]
+        idle = min(self._connections, key=lambda c: len(c.pending), default=None)
+        if idle is not None and (not idle.pending or len(self._connections)>=self._max_connections):
+            return idle
+        if self._opening is None:
+            self._opening = asyncio.Lock()
+        async with self._opening:
+            if len(self._connections)<self._max_connections:
+                if self._path is not None:
+                    streams = await asyncio.open_unix_connection(self._path)
+                else:
+                    streams = await asyncio.open_connection(self._host, self._port)
+                self._connections.append(_Connection(*streams))
+        return min(self._connections, key=lambda c: len(c.pending))
+
+
+class _Connection:
+    """Connection of a client, matching the responses to the pending requests by their ids."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count()
+        self.pending: dict[int, asyncio.Future[np.ndarray]] = {}
+        self.closed = False
+        self._receiving = asyncio.get_running_loop().create_task(self._receive())
+
+    async def request(self, lambda_: float, base: float, records: np.ndarray) -> np.ndarray:
+        if self.closed:
+            raise ConnectionError("Connection to the projection server is closed.")
+        request_id = next(self._ids) % (1 << 32)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self._writer.write(REQUEST_HEADER.pack(request_id, lambda_, base, len(records)) + records.tobytes())
+        await self._writer.drain()
+        return await future
+
+    async def close(self) -> None:
+        self.closed = True
+        self._writer.close()
+        self._receiving.cancel()
+        try:
+            await self._receiving
+        except asyncio.CancelledError:
+            pass
+        self._fail(ConnectionError("Connection to the projection server is closed."))
+
+    async def _receive(self) -> None:
+        try:
+            while True:
+                request_id, status, n = RESPONSE_HEADER.unpack(await self._reader.readexactly(RESPONSE_HEADER.size))
+                if status==OK:
+                    data = await self._reader.readexactly(n*POINT_DTYPE.itemsize)
+                    result: np.ndarray | Exception = np.frombuffer(data, POINT_DTYPE)
+                else:
+                    result = ValueError((await self._reader.readexactly(n)).decode())
+                future = self.pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.closed = True
+            self._fail(ConnectionError("Connection to the projection server was lost."))
+
+    def _fail(self, error: Exception) -> None:
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self.pending.clear()
+
+
+@dataclasses.dataclass
+class LoadReport:
+    """Latencies of the requests sent under load, in seconds, and the throughput."""
+    latencies: npt.NDArray[np.float64]
+    points: int
+    seconds: float
+
+    @property
+    def p50(self) -> float:
+        return float(np.quantile(self.latencies, 0.5))
+
+    @property
+    def p99(self) -> float:
+        return float(np.quantile(self.latencies, 0.99))
+
+    @property
+    def requests_per_second(self) -> float:
+        return len(self.latencies)/self.seconds
+
+    @property
+    def points_per_second(self) -> float:
+        return self.points/self.seconds
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self.latencies)} requests, {self.points} points in {self.seconds:.3f} s: "
+            f"{self.requests_per_second:.0f} requests/s, {self.points_per_second:.0f} points/s, "
+            f"latency p50 {self.p50*1e3:.3f} ms, p99 {self.p99*1e3:.3f} ms"
+        )
+
+
+async def load_test(
+    client: ProjectionClient,
+    points: PointArray,
+    lambda_: float,
+    bases: Iterable[float] = (0.0,),
+    concurrency: int = 64
+) -> LoadReport:
+    """Project each of the points by a separate request, keeping `concurrency` requests in flight.
+
+    The requests use the base plane angles in turn. Return the latencies of the requests and the throughput.
+    """
+    bases = list(bases)
+    latencies = np.empty(len(points))
+    indices = iter(range(len(points)))
+
+    async def send() -> None:
+        for k in indices:
+            start = time.perf_counter()
+            await client.point_array(points[k:k+1], lambda_, bases[k % len(bases)])
+            latencies[k] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send() for _ in range(concurrency)))
+    return LoadReport(latencies, len(points), time.perf_counter() - start)
+
+
+def _to_records(points: PointArray) -> np.ndarray:
+    records = np.empty(len(points), POINT_DTYPE)
+    records["x"], records["y"], records["z"], records["rev"] = points.x, points.y, points.z, points.rev
+    return records
+
+
+def _to_point_array(records: np.ndarray) -> PointArray:
+    return PointArray(records["x"], records["y"], records["z"], records["rev"])
+
+
+def _respond_error(writer: asyncio.StreamWriter, request_id: int, message: str) -> None:
+    data = message.encode()
+    writer.write(RESPONSE_HEADER.pack(request_id, ERROR, len(data)) + data)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parser().parse_args(argv)
+    asyncio.run(_serve(args) if args.command=="serve" else _load(args))
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    server = ProjectionServer(args.max_delay, args.max_batch_size, args.kappa_error)
+    if args.unix is not None:
+        await server.start_unix(args.unix)
+        print(f"Serving on {args.unix}", file=sys.stderr)
+    else:
+        await server.start_tcp(args.host, args.port)
+        print(f"Serving on {args.host}:{server.port}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+async def _load(args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(0)
+    points = PointArray.from_xyz(rng.normal(size=(args.requests, 3)), rng.integers(-2, 3, args.requests))
+    port = None if args.unix is not None else args.port
+    async with ProjectionClient(args.unix, args.host, port, args.connections) as client:
+        print(await load_test(client, points, args.lambda_, args.bases, args.concurrency))
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m conicsp.service", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the projection server")
+    load = commands.add_parser("load", help="send single point requests to a running server and report the latencies")
+    for command in (serve, load):
+        command.add_argument("--unix", help="path of the Unix socket, a TCP port is used if omitted")
+        command.add_argument("--host", default="127.0.0.1", help="host of the TCP port")
+        command.add_argument("--port", type=int, default=8470, help="TCP port")
+    serve.add_argument("--max-delay", type=float, default=DEFAULT_MAX_DELAY, help="maximum delay of a request in a batch in seconds")
+    serve.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE, help="number of points flushing a batch")
+    serve.add_argument("--kappa-error", type=float, help="maximum error of kappa evaluated from a table, exact kappa if omitted")
+    load.add_argument("--requests", type=int, default=10000, help="number of requests, one point each")
+    load.add_argument("--concurrency", type=int, default=64, help="number of requests in flight")
+    load.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS, help="size of the connection pool")
+    load.add_argument("--lambda", dest="lambda_", type=float, default=2.0, help="lambda of the projection")
+    load.add_argument("--bases", type=float, nargs="+", default=[0.0], help="base plane angles used by the requests in turn")
+    return parser
+
+
+if __name__=="__main__":  # pragma: no cover
+    main()
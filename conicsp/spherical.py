@@ -0,0 +1,240 @@
+"""Points given by spherical coordinates, for pipelines rotating and projecting points many times.
+
+A spherical point is given by its distance r from the origin, the angle omega between the base plane and
+the plane defined by the point and the x axis (as `Point.omega`), the angle theta between the point and
+the positive x axis, and the revolutions. The azimuth `Point.phi` is theta with the sign given by the side
+of the base plane the point lies on, plus the revolutions.
+
+Rotating about the x axis (`rot_yz`), i.e., changing the base plane, only adds to omega, and the projection
+changes only omega and theta. Omega is not reduced to the interval (-pi, pi] after rotations, the angles
+are reduced only where needed. Cartesian coordinates are evaluated only on demand.
+
+The revolutions of an image are those of the limited azimuth, floor((phi + pi)/(2*pi)). The projection of
+cartesian points evaluates them as floor((omega3 + phi + pi)/(2*pi)), where omega3 is the angle omega of the point
+rotated on the positive x axis (see `vectorized`). It is zero in exact arithmetic, but given by the rounding
+of the coordinates y and z of the rotated point otherwise, e.g., pi if y rounds to a negative value. The
+revolutions of the images of `Projector.point` therefore differ by one where the rounded omega3 moves omega3 + phi
+across an odd multiple of pi, for about a quarter of points in general position, and agree elsewhere.
+"""
+from __future__ import annotations
+from math import pi, acos, sin, cos, floor
+from typing import Iterator, overload
+import operator
+
+import numpy as np
+import numpy.typing as npt
+
+from . import vectorized
+from .kappa_table import KappaTable
+from .projection import Point, PointArray, limit_azimuth
+
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+
+
+class SphericalPoint:
+    """Point given by spherical coordinates and number of revolutions. Immutable."""
+
+    __slots__ = ("_r", "_omega", "_theta", "_rev")
+    __match_args__ = ("r", "omega", "theta", "rev")
+
+    def __init__(self, r: float, omega: float, theta: float, rev: int = 0) -> None:
+        self._r = r
+        self._omega = omega
+        self._theta = theta
+        self._rev = rev
+
+    r = property(operator.attrgetter("_r"))
+    omega = property(operator.attrgetter("_omega"))
+    theta = property(operator.attrgetter("_theta"))
+    rev = property(operator.attrgetter("_rev"))
+
+    @staticmethod
+    def from_point(point: Point) -> SphericalPoint:
+        r = point.r
+        return SphericalPoint(r, point.omega, acos(point.x/r) if r>0 else 0.0, point.rev)
+
+    @property
+    def phi(self) -> float:
+        """Azimuth measured in the plane defined by this point and the x axis, as `Point.phi`."""
+        if self.theta==0 or self.theta==pi:
+            return -self.theta + 2*pi*self.rev
+        sign = 1 if -pi/2<=_wrap(self.omega)<=pi/2 else -1
+        return sign*self.theta + 2*pi*self.rev
+
+    @property
+    def xyz(self) -> tuple[float,float,float]:
+        radius = self.r*sin(self.theta)
+        return self.r*cos(self.theta), radius*cos(self.omega), radius*sin(self.omega)
+
+    def to_point(self) -> Point:
+        return Point(*self.xyz, self.rev)
+
+    def rotated(self, angle: float) -> SphericalPoint:
+        """Rotate about the x axis, as `rot_yz`."""
+        return SphericalPoint(self.r, self.omega + angle, self.theta, self.rev)
+
+    def project(self, lambda_: float, base: float = 0, kappa_table: KappaTable | None = None) -> SphericalPoint:
+        """Project the point as `Projector.point`, with the revolutions of the limited azimuth (see the module)."""
+        on_axis = self.theta==0 or self.theta==pi
+        omega = 0.0 if on_axis else _wrap(self.omega - base)
+        positive = not on_axis and -pi/2<=omega<=pi/2
+        phi = (self.theta if positive else -self.theta) + 2*pi*self.rev
+        if on_axis:
+            kappa = 1.0
+        elif kappa_table is not None:
+            kappa = kappa_table.scalar(cos(self.theta), sin(self.theta))
+        else:
+            kappa = lambda_*sin(self.theta/lambda_)/sin(self.theta)
+        limited = limit_azimuth(phi, 2*pi*lambda_)
+        theta, turn = _image_in_plane(self.theta, positive, limited!=phi)
+        n = floor((limited + pi)/(2*pi))
+        return SphericalPoint(self.r, _wrap(omega/kappa + turn + base), theta, n)
+
+    def __repr__(self) -> str:
+        return f"SphericalPoint(r={self.r!r}, omega={self.omega!r}, theta={self.theta!r}, rev={self.rev!r})"
+
+
+class SphericalPointArray:
+    """Columnar container of points given by spherical coordinates. See `SphericalPoint`."""
+
+    __slots__ = ("r", "omega", "theta", "rev")
+
+    def __init__(
+        self,
+        r: npt.ArrayLike,
+        omega: npt.ArrayLike,
+        theta: npt.ArrayLike,
+        rev: npt.ArrayLike | None = None
+    ) -> None:
+        self.r = np.asarray(r, dtype=np.float64)
+        self.omega = np.asarray(omega, dtype=np.float64)
+        self.theta = np.asarray(theta, dtype=np.float64)
+        if rev is None:
+            rev = np.zeros(self.r.shape, dtype=np.int32)
+        self.rev = np.asarray(rev, dtype=np.int32)
+        if not self.r.ndim==1 or not self.r.shape==self.omega.shape==self.theta.shape==self.rev.shape:
+            raise ValueError("Point array columns must be one-dimensional and of equal length.")
+
+    @staticmethod
+    def from_point_array(points: PointArray) -> SphericalPointArray:
+        r = points.r
+        with np.errstate(invalid="ignore", divide="ignore"):
+            theta = np.arccos(np.clip(points.x/r, -1.0, 1.0))
+        theta[r==0] = 0.0
+        return SphericalPointArray(r, points.omega, theta, points.rev)
+
+    @property
+    def phi(self) -> FloatArray:
+        on_axis = (self.theta==0) | (self.theta==pi)
+        sign = np.where((np.abs(_wrap(self.omega))<=pi/2) & ~on_axis, 1.0, -1.0)
+        return sign*self.theta + 2*pi*self.rev
+
+    def to_point_array(self) -> PointArray:
+        radius = self.r*np.sin(self.theta)
+        return PointArray(self.r*np.cos(self.theta), radius*np.cos(self.omega), radius*np.sin(self.omega), self.rev)
+
+    def rotated(self, angle: npt.ArrayLike) -> SphericalPointArray:
+        """Rotate about the x axis by an angle common to all the points or given for each of them."""
+        return SphericalPointArray(self.r, self.omega + angle, self.theta, self.rev)
+
+    def project(
+        self,
+        lambda_: float,
+        base: npt.ArrayLike = 0.0,
+        kappa_table: KappaTable | None = None
+    ) -> SphericalPointArray:
+        """Project the points as `Projector.point_array`."""
+        kappa = kappa_array(self.theta, lambda_, kappa_table)
+        _, _, omega, theta, n = project_angles(self.omega, self.theta, self.rev, kappa, lambda_, base)
+        return SphericalPointArray(self.r, omega, theta, n)
+
+    def __len__(self) -> int:
+        return len(self.r)
+
+    def __iter__(self) -> Iterator[SphericalPoint]:
+        for k in range(len(self)):
+            yield self[k]
+
+    @overload
+    def __getitem__(self, key: int) -> SphericalPoint: ...
+    @overload
+    def __getitem__(self, key: slice | npt.ArrayLike) -> SphericalPointArray: ...
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return SphericalPoint(float(self.r[key]), float(self.omega[key]), float(self.theta[key]), int(self.rev[key]))
+        return SphericalPointArray(self.r[key], self.omega[key], self.theta[key], self.rev[key])
+
+    def __repr__(self) -> str:
+        return f"SphericalPointArray(n={len(self)})"
+
+
+def kappa_array(theta: FloatArray, lambda_: float, kappa_table: KappaTable | None = None) -> FloatArray:
+    """Kappa of the points with the angles theta from the x axis. It does not depend on the base plane angle."""
+    on_axis = (theta==0) | (theta==pi)
+    sin_theta = np.where(on_axis, 1.0, np.sin(theta))
+    if kappa_table is not None:
+        kappa = kappa_table.array(np.cos(theta), sin_theta)
+    else:
+        with np.errstate(invalid="ignore"):
+            kappa = lambda_*np.sin(theta/lambda_)/sin_theta
+    kappa[on_axis] = 1.0
+    return kappa
+
+
+def project_angles(
+    omega: FloatArray,
+    theta: FloatArray,
+    rev: IntArray,
+    kappa: FloatArray,
+    lambda_: float,
+    base: npt.ArrayLike
+) -> tuple[FloatArray, FloatArray, FloatArray, FloatArray, npt.NDArray[np.int32]]:
+    """Project the points given by the angles omega and theta, the revolutions and kappa (see `kappa_array`).
+
+    Return the angle omega relative to the base plane and the azimuth of the points, and the angles omega
+    and theta and the revolutions of the images.
+    """
+    base = np.asarray(base, dtype=np.float64)
+    on_axis = (theta==0) | (theta==pi)
+    relative = np.where(on_axis, 0.0, _wrap(omega - base))
+    positive = ~on_axis & (np.abs(relative)<=pi/2)
+    phi = np.where(positive, theta, -theta) + 2*pi*rev
+    limited = vectorized.limit_azimuth(phi, 2*pi*lambda_)
+    image_theta, turn = _image_in_plane_array(theta, positive, limited!=phi)
+    n = np.floor((limited + pi)/(2*pi)).astype(np.int32)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        image_omega = _wrap(relative/kappa + turn + base)
+    return relative, phi, image_omega, image_theta, n
+
+
+def _image_in_plane(theta: float, positive: bool, clamped: bool) -> tuple[float, float]:
+    # Angle of the image from the x axis and turn of its plane. A point with a kept azimuth is kept
+    # in its plane. A clamped point with positive azimuth is rotated to the negative x axis, one with
+    # negative azimuth to the azimuth 2*theta + pi, i.e., to the opposite half of the plane for theta below pi/2.
+    if not clamped:
+        return theta, 0.0
+    if positive:
+        return pi, 0.0
+    return abs(pi - 2*theta), (0.0 if theta>pi/2 else pi)
+
+
+def _image_in_plane_array(
+    theta: FloatArray,
+    positive: npt.NDArray[np.bool_],
+    clamped: npt.NDArray[np.bool_]
+) -> tuple[FloatArray, FloatArray]:
+    beyond_right_angle = theta>pi/2
+    image = np.where(clamped, np.where(positive, pi, np.abs(pi - 2*theta)), theta)
+    turn = np.where(clamped & ~positive & ~beyond_right_angle, pi, 0.0)
+    return image, turn
+
+
+@overload
+def _wrap(angle: float) -> float: ...
+@overload
+def _wrap(angle: FloatArray) -> FloatArray: ...
+def _wrap(angle):
+    # angle in the interval (-pi, pi]
+    return pi - (pi - angle) % (2*pi)
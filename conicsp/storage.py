@@ -0,0 +1,179 @@
+"""Binary point cloud files with a chunk index, read through memory mapping.
+
+Layout of the file (all values little-endian):
+
+    header       64 bytes: magic, version, size of the coordinate values (4 or 8 bytes),
+                 number of points, number of chunks and offset of the chunk table
+    chunks       for each chunk the columns x, y, z (float32 or float64) and rev (int32),
+                 each chunk starting at a multiple of 64 bytes
+    chunk table  for each chunk its offset and number of points (two uint64 values)
+
+The chunks are written one after another, so a file can be written from a stream without knowing
+its length in advance. The chunk table gives access to any chunk in constant time.
+"""
+from __future__ import annotations
+from typing import BinaryIO, Iterator
+import struct
+
+import numpy as np
+import numpy.typing as npt
+
+from .projection import Projector, PointArray
+
+
+MAGIC = b"CONICSP\x00"
+VERSION = 1
+HEADER_SIZE = 64
+ALIGNMENT = 64
+REV_DTYPE = np.dtype("<i4")
+COORDINATE_DTYPES = (np.dtype("<f4"), np.dtype("<f8"))
+
+_HEADER = struct.Struct("<8sIIQQQ")
+_TABLE_DTYPE = np.dtype("<u8")
+
+
+class PointFileWriter:
+    """Writes chunks of points to a file, one chunk per call of `write`."""
+
+    def __init__(self, path: str, dtype: npt.DTypeLike = np.float64) -> None:
+        self._dtype = np.dtype(dtype).newbyteorder("<")
+        if self._dtype not in COORDINATE_DTYPES:
+            raise ValueError(f"Coordinates can be stored only as float32 or float64, got {np.dtype(dtype)}.")
+        self._file: BinaryIO = open(path, "wb")
+        self._file.write(bytes(HEADER_SIZE))
+        self._table: list[tuple[int,int]] = []
+        self._n_points = 0
+
+    def write(self, points: PointArray) -> None:
+        offset = self._file.tell()
+        for column in (points.x, points.y, points.z):
+            self._file.write(column.astype(self._dtype, copy=False).tobytes())
+        self._file.write(points.rev.astype(REV_DTYPE, copy=False).tobytes())
+        self._file.write(bytes(-self._file.tell() % ALIGNMENT))
+        self._table.append((offset, len(points)))
+        self._n_points += len(points)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        table_offset = self._file.tell()
+        self._file.write(np.array(self._table, dtype=_TABLE_DTYPE).tobytes())
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(
+            MAGIC, VERSION, self._dtype.itemsize, self._n_points, len(self._table), table_offset
+        ))
+        self._file.close()
+
+    def __enter__(self) -> PointFileWriter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class PointFile:
+    """Memory mapped point cloud file.
+
+    The chunks are point arrays whose columns are views of the mapped file, so that nothing is read
+    until the values are used. The coordinates of the chunks are of the type `chunk_dtype`, coordinates stored
+    with another type are converted when a chunk is taken. With `chunk_dtype=None`, the chunks keep the stored type.
+    """
+
+    def __init__(self, path: str, chunk_dtype: npt.DTypeLike | None = np.float64) -> None:
+        self._mmap: np.memmap | None = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(self._mmap) < HEADER_SIZE:
+            raise ValueError(f"File '{path}' is too short to be a point file.")
+        magic, version, itemsize, n_points, n_chunks, table_offset = _HEADER.unpack_from(self._mmap, 0)
+        if magic!=MAGIC:
+            raise ValueError(f"File '{path}' is not a point file.")
+        if version!=VERSION:
+            raise ValueError(f"Unsupported version {version} of point file '{path}'.")
+        self._dtype = np.dtype(f"<f{itemsize}")
+        self._chunk_dtype = self._dtype.newbyteorder("=") if chunk_dtype is None else np.dtype(chunk_dtype)
+        self._n_points = n_points
+        self._table = np.frombuffer(self._mmap, _TABLE_DTYPE, 2*n_chunks, table_offset).reshape(n_chunks, 2)
+
+    def close(self) -> None:
+        """Release the mapping of the file. Chunks taken before keep their views until they are released."""
+        self._mmap = None
+        self._table = np.empty((0, 2), _TABLE_DTYPE)
+
+    def __enter__(self) -> PointFile:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Type of the stored coordinates."""
+        return self._dtype
+
+    @property
+    def chunk_dtype(self) -> np.dtype:
+        """Type of the coordinates of the chunks."""
+        return self._chunk_dtype
+
+    @property
+    def n_chunks(self) -> int:
+        return len(self._table)
+
+    def __len__(self) -> int:
+        return self._n_points
+
+    def chunk_size(self, k: int) -> int:
+        return int(self._table[k,1])
+
+    def chunk(self, k: int) -> PointArray:
+        offset, n = (int(v) for v in self._table[k])
+        columns = []
+        for _ in range(3):
+            columns.append(np.frombuffer(self._mmap, self._dtype, n, offset))
+            offset += n*self._dtype.itemsize
+        rev = np.frombuffer(self._mmap, REV_DTYPE, n, offset)
+        return PointArray(*columns, rev, self._chunk_dtype)
+
+    def chunks(self, start: int = 0, stop: int | None = None) -> Iterator[PointArray]:
+        """Iterate over the chunks with indices from `start` up to `stop` (excluded)."""
+        for k in range(*slice(start, stop).indices(self.n_chunks)):
+            yield self.chunk(k)
+
+    def __iter__(self) -> Iterator[PointArray]:
+        return self.chunks()
+
+    def read(self) -> PointArray:
+        """Read all the points into memory."""
+        chunks = list(self.chunks())
+        if not chunks:
+            return PointArray.empty(0, self._chunk_dtype)
+        return PointArray(
+            *(np.concatenate([getattr(c, name) for c in chunks]) for name in ("x", "y", "z", "rev")), self._chunk_dtype
+        )
+
+
+def write_points(path: str, points: PointArray, chunk_size: int, dtype: npt.DTypeLike = np.float64) -> None:
+    """Write point array to a file split into chunks of `chunk_size` points."""
+    with PointFileWriter(path, dtype) as writer:
+        for i in range(0, len(points), chunk_size):
+            writer.write(points[i:i+chunk_size])
+
+
+def project_file(
+    source: str,
+    target: str,
+    projector: Projector,
+    base: float = 0.0,
+    dtype: npt.DTypeLike | None = None,
+    chunk_dtype: npt.DTypeLike | None = np.float64
+) -> None:
+    """Project a point file chunk by chunk into another point file with the same chunks.
+
+    The coordinates of the images are stored with the type of the source unless `dtype` is given.
+    The points are projected in the precision of `chunk_dtype`, see `PointFile`. With `chunk_dtype=None`,
+    a float32 file is projected in single precision without converting the chunks.
+    """
+    points = PointFile(source, chunk_dtype)
+    plan = projector.plan(base)
+    with PointFileWriter(target, points.dtype if dtype is None else dtype) as writer:
+        for chunk in points:
+            writer.write(plan.point_array(chunk))
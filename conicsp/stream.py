@@ -0,0 +1,141 @@
+"""Projection of point streams in chunks of bounded size.
+
+Points are read, projected and written chunk by chunk, so the memory used does not depend
+on the length of the stream. Text input holds a point per line with the columns x, y, z and optionally rev,
+separated by commas (csv) or whitespace (txt). Binary input is a raw sequence of float64 values,
+three or four per point.
+"""
+from __future__ import annotations
+from typing import BinaryIO, Iterable, Iterator, Sequence, TextIO
+import dataclasses
+import itertools
+import time
+
+import numpy as np
+
+from .projection import Projector, PointArray
+
+
+DEFAULT_CHUNK_SIZE = 65536
+BINARY_DTYPE = np.dtype("<f8")
+
+
+@dataclasses.dataclass
+class StreamStats:
+    """Throughput of a projected stream."""
+    points: int = 0
+    bytes_read: int = 0
+    seconds: float = 0.0
+
+    @property
+    def points_per_second(self) -> float:
+        return self.points/self.seconds if self.seconds>0 else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes_read/1e6/self.seconds if self.seconds>0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.points} points, {self.bytes_read/1e6:.2f} MB in {self.seconds:.3f} s: "
+            f"{self.points_per_second:.0f} points/s, {self.megabytes_per_second:.2f} MB/s"
+        )
+
+
+def project_stream(
+    rows: Iterable[Sequence[float]],
+    lambda_: float,
+    base: float = 0.0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[PointArray]:
+    """Project rows (x, y, z) or (x, y, z, rev) in chunks of at most `chunk_size` points.
+
+    Yield the images of each chunk.
+    """
+    return project_chunks(_row_chunks(iter(rows), chunk_size), Projector(lambda_), base)
+
+
+def project_chunks(
+    chunks: Iterable[PointArray],
+    projector: Projector,
+    base: float = 0.0,
+    stats: StreamStats | None = None
+) -> Iterator[PointArray]:
+    """Project each of the point arrays. If given, count the projected points in `stats`."""
+    plan = projector.plan(base)
+    start = time.perf_counter()
+    for chunk in chunks:
+        images = plan.point_array(chunk)
+        if stats is not None:
+            stats.points += len(chunk)
+            stats.seconds = time.perf_counter() - start
+        yield images
+
+
+def read_text(
+    file: TextIO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    delimiter: str | None = None,
+    stats: StreamStats | None = None
+) -> Iterator[PointArray]:
+    """Read points from lines of text, `chunk_size` lines at a time.
+
+    Columns are separated by `delimiter`, or by whitespace if it is None.
+    """
+    while True:
+        lines = list(itertools.islice(file, chunk_size))
+        if not lines:
+            return
+        if stats is not None:
+            stats.bytes_read += sum(len(line) for line in lines)
+        lines = [line for line in lines if line.strip()]
+        if lines:
+            yield _from_columns(np.loadtxt(lines, delimiter=delimiter, ndmin=2))
+
+
+def read_binary(
+    file: BinaryIO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    with_rev: bool = False,
+    stats: StreamStats | None = None
+) -> Iterator[PointArray]:
+    """Read points stored as raw little-endian float64 values, three or (with revolutions) four per point."""
+    columns = 4 if with_rev else 3
+    record_size = columns*BINARY_DTYPE.itemsize
+    while True:
+        data = file.read(chunk_size*record_size)
+        if not data:
+            return
+        if len(data) % record_size:
+            raise ValueError(f"Binary input ends with an incomplete record of {len(data) % record_size} bytes.")
+        if stats is not None:
+            stats.bytes_read += len(data)
+        yield _from_columns(np.frombuffer(data, dtype=BINARY_DTYPE).reshape(-1, columns))
+
+
+def write_text(file: TextIO, points: PointArray, delimiter: str | None = None) -> None:
+    """Write points as lines of x, y, z and rev."""
+    sep = " " if delimiter is None else delimiter
+    columns = np.column_stack((points.xyz, points.rev))
+    np.savetxt(file, columns, fmt=["%.17g", "%.17g", "%.17g", "%d"], delimiter=sep)
+
+
+def write_binary(file: BinaryIO, points: PointArray) -> None:
+    """Write points as raw little-endian float64 values x, y, z and rev."""
+    columns = np.column_stack((points.xyz, points.rev)).astype(BINARY_DTYPE)
+    file.write(columns.tobytes())
+
+
+def _row_chunks(rows: Iterator[Sequence[float]], chunk_size: int) -> Iterator[PointArray]:
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield _from_columns(np.asarray(chunk, dtype=np.float64).reshape(len(chunk), -1))
+
+
+def _from_columns(columns: np.ndarray) -> PointArray:
+    if columns.shape[1] not in (3, 4):
+        raise ValueError(f"Expected 3 or 4 columns (x, y, z and optionally rev), got {columns.shape[1]}.")
+    rev = None if columns.shape[1]==3 else np.rint(columns[:,3])
+    return PointArray.from_xyz(columns[:,:3], rev)
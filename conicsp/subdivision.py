@@ -0,0 +1,191 @@
+"""Projection of polylines and triangle meshes with edges subdivided where their images are curved.
+
+Images of straight edges are curves. Instead of sampling every edge uniformly, the edges are bisected level
+by level and only the edges whose image is not close enough to its chord are split further. An edge is split if
+
+- the image of its midpoint is farther than `tolerance` from the chord between the images of its end points,
+- the images of its end points have different revolutions, or
+- the azimuth of one of its end points is limited by the projection and of the other is not,
+
+so that the discontinuities of the images are localized up to the `max_depth` of bisection. All the midpoints
+of one level are projected at once by the vectorized projection.
+"""
+from __future__ import annotations
+from math import pi
+
+import numpy as np
+import numpy.typing as npt
+
+from . import vectorized
+from .projection import Projector, ProjectionPlan, PointArray
+
+
+DEFAULT_TOLERANCE = 1e-3
+DEFAULT_MAX_DEPTH = 12
+
+
+def project_polyline(
+    vertices: npt.ArrayLike,
+    projector: Projector,
+    base: float = 0.0,
+    tolerance: float = DEFAULT_TOLERANCE,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    rev: npt.ArrayLike | None = None
+) -> tuple[PointArray, PointArray]:
+    """Project a polyline given by an (N,3) array of vertices, subdividing its segments where needed.
+
+    Return the points of the subdivided polyline in their order along the polyline and their images.
+    """
+    curve = _Subdivision(PointArray.from_xyz(vertices, rev), projector.plan(base), tolerance)
+    n = len(curve.sources)
+    edges = np.column_stack((np.arange(n-1), np.arange(1, n)))
+    unsettled = np.ones(len(edges), dtype=bool)
+    for _ in range(max_depth):
+        i = np.flatnonzero(unsettled)
+        if len(i)==0:
+            break
+        split, midpoints = curve.split(edges[i])
+        unsettled[i[~split]] = False
+        # each split edge is replaced by its two halves
+        i = i[split]
+        counts = np.ones(len(edges), dtype=np.int64)
+        counts[i] = 2
+        start = np.cumsum(counts) - counts
+        edges, unsettled = np.repeat(edges, counts, axis=0), np.repeat(unsettled, counts)
+        edges[start[i],1] = midpoints
+        edges[start[i]+1,0] = midpoints
+    order = np.append(edges[:,0], edges[-1,1]) if len(edges) else np.arange(n)
+    return curve.sources[order], curve.images[order]
+
+
+def project_mesh(
+    vertices: npt.ArrayLike,
+    triangles: npt.ArrayLike,
+    projector: Projector,
+    base: float = 0.0,
+    tolerance: float = DEFAULT_TOLERANCE,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    rev: npt.ArrayLike | None = None
+) -> tuple[PointArray, PointArray, npt.NDArray[np.int64]]:
+    """Project a triangle mesh given by an (N,3) array of vertices and a (T,3) array of vertex indices.
+
+    Edges shared by triangles are evaluated and split once, so the subdivided mesh has no cracks.
+    Triangles with one, two or three split edges are divided into two, three or four triangles
+    with the orientation of the original triangle.
+
+    Return the vertices of the subdivided mesh, their images and the array of triangles.
+    """
+    mesh = _Subdivision(PointArray.from_xyz(vertices, rev), projector.plan(base), tolerance)
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    done: list[npt.NDArray[np.int64]] = []
+    settled = np.empty(0, dtype=np.int64)
+    for _ in range(max_depth):
+        if len(triangles)==0:
+            break
+        edges = np.sort(np.stack((triangles, np.roll(triangles, -1, axis=1)), axis=2), axis=2).reshape(-1, 2)
+        keys = _edge_keys(edges)
+        unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        # edges kept by earlier levels are not evaluated again
+        split = np.zeros(len(unique_keys), dtype=bool)
+        midpoints = np.full(len(unique_keys), -1, dtype=np.int64)
+        unknown = np.flatnonzero(~np.isin(unique_keys, settled))
+        flags, new_points = mesh.split(edges[first[unknown]])
+        split[unknown] = flags
+        midpoints[unknown[flags]] = new_points
+        settled = np.union1d(settled, unique_keys[unknown[~flags]])
+        split_edges = split[inverse].reshape(-1, 3)
+        edge_midpoints = midpoints[inverse].reshape(-1, 3)
+        kept = ~split_edges.any(axis=1)
+        done.append(triangles[kept])
+        triangles = _split_triangles(triangles[~kept], split_edges[~kept], edge_midpoints[~kept])
+    done.append(triangles)
+    return mesh.sources, mesh.images, np.concatenate(done)
+
+
+class _Subdivision:
+    """Points and their images, extended by the midpoints of split edges."""
+
+    def __init__(self, points: PointArray, plan: ProjectionPlan, tolerance: float) -> None:
+        self._plan = plan
+        self._tolerance = tolerance
+        self._gamma = 2*pi*plan.lambda_
+        self.sources = points
+        self.images = plan.point_array(points)
+        self._azimuth = self._base_azimuth(points)
+        self._clamped = self._is_clamped(self._azimuth, points.rev)
+
+    def split(self, edges: npt.NDArray[np.int64]) -> tuple[npt.NDArray[np.bool_], npt.NDArray[np.int64]]:
+        """Decide which of the edges given by pairs of point indices are split.
+
+        Add the midpoints of the split edges and return their indices.
+        """
+        a, b = edges[:,0], edges[:,1]
+        s = self.sources
+        x, y, z = (s.x[a]+s.x[b])/2, (s.y[a]+s.y[b])/2, (s.z[a]+s.z[b])/2
+        # the midpoint continues the azimuth of the first end point
+        azimuth = self._base_azimuth(PointArray(x, y, z))
+        rev = s.rev[a] - np.floor((azimuth - self._azimuth[a])/(2*pi) + 0.5)
+        midpoints = PointArray(x, y, z, rev)
+        images = self._plan.point_array(midpoints)
+        split = (
+            (_distance_to_chord(images, self.images[a], self.images[b]) > self._tolerance)
+            | (self.images.rev[a]!=self.images.rev[b])
+            | (self._clamped[a]!=self._clamped[b])
+        )
+        first = len(self.sources)
+        self.sources = _concatenate(self.sources, midpoints[split])
+        self.images = _concatenate(self.images, images[split])
+        self._azimuth = np.concatenate((self._azimuth, azimuth[split]))
+        self._clamped = np.concatenate((self._clamped, self._is_clamped(azimuth[split], midpoints.rev[split])))
+        return split, np.arange(first, len(self.sources))
+
+    def _base_azimuth(self, points: PointArray) -> npt.NDArray[np.float64]:
+        y1, z1 = vectorized.rot_yz(points.y, points.z, -self._plan.base)
+        return vectorized.phi(points.x, y1, z1)
+
+    def _is_clamped(self, azimuth: npt.NDArray[np.float64], rev: npt.NDArray[np.int32]) -> npt.NDArray[np.bool_]:
+        phi = azimuth + 2*pi*rev
+        return vectorized.limit_azimuth(phi, self._gamma)!=phi
+
+
+def _split_triangles(
+    triangles: npt.NDArray[np.int64],
+    split: npt.NDArray[np.bool_],
+    midpoints: npt.NDArray[np.int64]
+) -> npt.NDArray[np.int64]:
+    # The k-th edge joins the vertices k and k+1. The triangles are rotated so that a single split edge
+    # is the edge 0 and a single kept edge is the edge 2.
+    count = split.sum(axis=1)
+    shift = np.where(count==1, np.argmax(split, axis=1), np.where(count==2, (np.argmin(split, axis=1)+1) % 3, 0))
+    k = (shift[:,None] + np.arange(3)) % 3
+    v, m = np.take_along_axis(triangles, k, axis=1), np.take_along_axis(midpoints, k, axis=1)
+    v0, v1, v2, m0, m1, m2 = v[:,0], v[:,1], v[:,2], m[:,0], m[:,1], m[:,2]
+    one, two, three = count==1, count==2, count==3
+    return np.concatenate((
+        np.column_stack((v0, m0, v2))[one],
+        np.column_stack((m0, v1, v2))[one],
+        np.column_stack((v0, m0, m1))[two],
+        np.column_stack((m0, v1, m1))[two],
+        np.column_stack((v0, m1, v2))[two],
+        np.column_stack((v0, m0, m2))[three],
+        np.column_stack((m0, v1, m1))[three],
+        np.column_stack((m2, m1, v2))[three],
+        np.column_stack((m0, m1, m2))[three],
+    ))
+
+
+def _edge_keys(edges: npt.NDArray[np.int64]) -> npt.NDArray[np.int64]:
+    return edges[:,0]*(1 << 32) + edges[:,1]
+
+
+def _distance_to_chord(points: PointArray, a: PointArray, b: PointArray) -> npt.NDArray[np.float64]:
+    p, a_, d = points.xyz, a.xyz, b.xyz - a.xyz
+    length_sq = np.einsum("ij,ij->i", d, d)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.clip(np.einsum("ij,ij->i", p - a_, d)/length_sq, 0.0, 1.0)
+    t[length_sq==0] = 0.0
+    return np.linalg.norm(p - a_ - t[:,None]*d, axis=1)
+
+
+def _concatenate(a: PointArray, b: PointArray) -> PointArray:
+    return PointArray(*(np.concatenate((getattr(a, c), getattr(b, c))) for c in ("x", "y", "z", "rev")))
@@ -0,0 +1,112 @@
+"""Projection of one point array under many values of lambda and base plane angle.
+
+Aligning the points to the base plane and to their own planes does not depend on lambda, so it is done once
+per base plane angle and reused for all the lambdas. Only kappa, the azimuth limit and the final rotations
+are evaluated for each pair of parameters. The images are identical to those of `Projector.point_array`.
+"""
+from __future__ import annotations
+from typing import Iterator, Sequence, overload
+
+import numpy as np
+import numpy.typing as npt
+
+from . import vectorized
+from .projection import PointArray
+
+
+class Sweep(Sequence[PointArray]):
+    """Images of a point array for every pair of lambda and base plane angle.
+
+    The pairs are ordered by the base angle first and by lambda second, i.e., the image for the i-th base angle
+    and j-th lambda has the index i*len(lambdas) + j. The images are evaluated lazily when accessed;
+    the aligned points are kept for the most recently used base angle.
+    """
+
+    def __init__(self, points: PointArray, lambdas: npt.ArrayLike, bases: npt.ArrayLike = 0.0) -> None:
+        self._points = points
+        self._lambdas = np.atleast_1d(np.asarray(lambdas, dtype=np.float64))
+        self._bases = np.atleast_1d(np.asarray(bases, dtype=np.float64))
+        if self._lambdas.ndim!=1 or self._bases.ndim!=1:
+            raise ValueError("Lambdas and base angles must be scalars or one-dimensional arrays.")
+        self._aligned_base: float | None = None
+        self._aligned: list[vectorized.Aligned] = []
+
+    @property
+    def lambdas(self) -> npt.NDArray[np.float64]:
+        return self._lambdas
+
+    @property
+    def bases(self) -> npt.NDArray[np.float64]:
+        return self._bases
+
+    @property
+    def params(self) -> list[tuple[float,float]]:
+        """Pairs (lambda, base) in the order of the images."""
+        return [(float(lambda_), float(base)) for base in self._bases for lambda_ in self._lambdas]
+
+    def __len__(self) -> int:
+        return len(self._lambdas)*len(self._bases)
+
+    @overload
+    def __getitem__(self, key: int) -> PointArray: ...
+    @overload
+    def __getitem__(self, key: slice) -> list[PointArray]: ...
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[k] for k in range(*key.indices(len(self)))]
+        if not -len(self) <= key < len(self):
+            raise IndexError("Sweep index out of range.")
+        i, j = divmod(key % len(self), len(self._lambdas))
+        base, lambda_ = float(self._bases[i]), float(self._lambdas[j])
+        images = PointArray.empty(len(self._points))
+        for k, aligned in zip(self._chunks(), self._aligned_chunks(base)):
+            images.x[k], images.y[k], images.z[k], images.rev[k] = vectorized.project_aligned(aligned, lambda_, base)
+        return images
+
+    def __iter__(self) -> Iterator[PointArray]:
+        for k in range(len(self)):
+            yield self[k]
+
+    def arrays(self) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.int32]]:
+        """Evaluate all the images at once.
+
+        Return the (P,N,3) array of projected coordinates and the (P,N) array of their revolutions,
+        where P is the number of parameter pairs.
+        """
+        n = len(self._points)
+        xyz = np.empty((len(self), n, 3))
+        revs = np.empty((len(self), n), dtype=np.int32)
+        p = self._points
+        for i, base in enumerate(self._bases):
+            for k in self._chunks():
+                # the aligned chunk stays in cache while it is projected with all the lambdas
+                aligned = vectorized.align(p.x[k], p.y[k], p.z[k], p.rev[k], base)
+                for j, lambda_ in enumerate(self._lambdas):
+                    m = i*len(self._lambdas) + j
+                    xyz[m,k,0], xyz[m,k,1], xyz[m,k,2], revs[m,k] = vectorized.project_aligned(aligned, lambda_, base)
+        return xyz, revs
+
+    def _chunks(self) -> Iterator[slice]:
+        for i in range(0, len(self._points), vectorized.CHUNK_SIZE):
+            yield slice(i, i+vectorized.CHUNK_SIZE)
+
+    def _aligned_chunks(self, base: float) -> list[vectorized.Aligned]:
+        if base!=self._aligned_base:
+            p = self._points
+            self._aligned = [vectorized.align(p.x[k], p.y[k], p.z[k], p.rev[k], base) for k in self._chunks()]
+            self._aligned_base = base
+        return self._aligned
+
+
+def sweep(
+    xyz: npt.ArrayLike,
+    lambdas: npt.ArrayLike,
+    bases: npt.ArrayLike = 0.0,
+    rev: npt.ArrayLike | None = None
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.int32]]:
+    """Project an (N,3) array of points for every pair of lambda and base plane angle.
+
+    Return the (P,N,3) array of projected coordinates and the (P,N) array of their revolutions
+    ordered as the pairs in `Sweep.params`.
+    """
+    return Sweep(PointArray.from_xyz(xyz, rev), lambdas, bases).arrays()
@@ -0,0 +1,82 @@
+"""Projection of ordered sequences of positions with revolutions tracked from sample to sample.
+
+The positions of a trajectory are given by cartesian coordinates only. The revolutions of each sample are chosen
+so that its azimuth (measured with respect to the base plane) differs from the azimuth of the previous sample
+by at most pi, which keeps the azimuth continuous when the trajectory winds around and crosses the branch cut
+of the azimuth at -pi and pi. Only the azimuth of the last sample is kept, so tracking is O(1) per sample.
+
+Only the revolutions are carried over from sample to sample. Each sample is projected with the same results
+as `Projector.point` and `Projector.point_array`, reusing the azimuth evaluated for the tracking, so appending
+a sample costs about as much as projecting a point.
+"""
+from __future__ import annotations
+from math import pi, floor
+
+import numpy as np
+import numpy.typing as npt
+
+from . import vectorized
+from .projection import Projector, Point, PointArray
+
+
+class Trajectory:
+    """Projection of a trajectory which can be extended sample by sample or by batches of samples.
+
+    The first sample has `rev` revolutions.
+    """
+
+    def __init__(self, projector: Projector, base: float = 0.0, rev: int = 0) -> None:
+        self._plan = projector.plan(base)
+        # azimuth of the last sample without revolutions
+        self._azimuth: float | None = None
+        self._rev = rev
+        self._length = 0
+
+    @property
+    def rev(self) -> int:
+        """Revolutions of the last sample."""
+        return self._rev
+
+    @property
+    def phi(self) -> float | None:
+        """Azimuth of the last sample including its revolutions, None if the trajectory is empty."""
+        return None if self._azimuth is None else self._azimuth + 2*pi*self._rev
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, x: float, y: float, z: float) -> Point:
+        """Add a sample to the trajectory and return its image."""
+        azimuth = self._plan.azimuth(x, y, z)
+        if self._azimuth is not None:
+            self._rev -= floor((azimuth - self._azimuth)/(2*pi) + 0.5)
+        self._azimuth = azimuth
+        self._length += 1
+        return Point(*self._plan.coordinates(x, y, z, self._rev, azimuth))
+
+    def extend(self, xyz: npt.ArrayLike) -> PointArray:
+        """Add an (N,3) array of samples to the trajectory and return their images."""
+        points = PointArray.from_xyz(xyz)
+        points.rev[:] = self.unwrap(points)
+        return self._plan.point_array(points)
+
+    def unwrap(self, points: PointArray) -> npt.NDArray[np.int32]:
+        """Add samples to the trajectory without projecting them. Return their revolutions.
+
+        The revolutions of the points are ignored.
+        """
+        if len(points)==0:
+            return np.empty(0, dtype=np.int32)
+        y1, z1 = vectorized.rot_yz(points.y, points.z, -self._plan.base)
+        azimuth = vectorized.phi(points.x, y1, z1)
+        steps = np.diff(azimuth, prepend=azimuth[0] if self._azimuth is None else self._azimuth)
+        revs = (self._rev - np.cumsum(np.floor(steps/(2*pi) + 0.5))).astype(np.int32)
+        self._rev = int(revs[-1])
+        self._azimuth = float(azimuth[-1])
+        self._length += len(points)
+        return revs
+
+
+def project_trajectory(xyz: npt.ArrayLike, lambda_: float, base: float = 0.0, rev: int = 0) -> PointArray:
+    """Project an (N,3) array of samples of a trajectory whose first sample has `rev` revolutions."""
+    return Trajectory(Projector(lambda_), base, rev).extend(xyz)
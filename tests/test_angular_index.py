@@ -0,0 +1,65 @@
+import unittest
+from math import pi
+
+import numpy as np
+
+import conicsp
+from conicsp import Point, PointArray
+from conicsp.angular_index import AngularIndex, image_angles
+
+
+class Test_Angular_Index(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        xyz = rng.normal(size=(5000,3))
+        # points on the x axis and in the plane z=0
+        xyz[:20,1:] = 0
+        xyz[20:40,2] = 0
+        self.points = PointArray.from_xyz(xyz, rev=rng.integers(-2, 3, 5000))
+        self.index = AngularIndex(self.points)
+
+    def assert_query_equals_brute_force(self, projector: conicsp.Projector, omega, phi, base: float) -> None:
+        image_omega, image_phi = image_angles(self.points, projector, base)
+        inside = (image_omega>=omega[0]) & (image_omega<=omega[1]) & (image_phi>=phi[0]) & (image_phi<=phi[1])
+        np.testing.assert_array_equal(self.index.query(projector, omega, phi, base), np.flatnonzero(inside))
+
+    def test_query_equals_filtering_all_projected_points(self):
+        windows = [((-0.3, 0.2), (0.5, 1.5)), ((1.0, 3.0), (-9.0, -2.0)), ((-4.0, 4.0), (pi, pi)), ((-0.1, 0.1), (-0.1, 0.1))]
+        for lambda_ in (2.0, 1.3, 1.0, 0.5, -1.5):
+            for base in (0.0, 2.5):
+                for omega, phi in windows:
+                    with self.subTest(lambda_=lambda_, base=base, omega=omega, phi=phi):
+                        self.assert_query_equals_brute_force(conicsp.Projector(lambda_), omega, phi, base)
+
+    def test_query_with_kappa_table(self):
+        projector = conicsp.Projector(2.0, kappa_error=1e-6)
+        self.assert_query_equals_brute_force(projector, (-0.3, 0.2), (0.5, 1.5), 1.0)
+
+    def test_images_of_points_with_kept_azimuth_lie_in_planes_given_by_image_omega(self):
+        projector = conicsp.Projector(2.0)
+        image_omega, image_phi = image_angles(self.points, projector, 0.7)
+        kept = image_phi==conicsp.vectorized.phi(self.points.x, self.points.y, self.points.z, self.points.rev)
+        kept[:20] = False
+        points, image_omega = self.points[kept], image_omega[kept]
+        images = projector.point_array(points, 0.7)
+        radius = np.hypot(points.y, points.z)
+        np.testing.assert_allclose(images.x, points.x, atol=1e-9)
+        np.testing.assert_allclose(images.y, radius*np.cos(image_omega + 0.7), atol=1e-9)
+        np.testing.assert_allclose(images.z, radius*np.sin(image_omega + 0.7), atol=1e-9)
+
+    def test_small_window_touches_small_fraction_of_points(self):
+        candidates = self.index.candidates(conicsp.Projector(2.0), (0.1, 0.2), (0.4, 0.6))
+        self.assertLess(len(candidates), 0.05*len(self.points))
+
+    def test_empty_index(self):
+        index = AngularIndex([])
+        self.assertEqual(len(index.query(conicsp.Projector(2.0), (-1, 1), (-1, 1))), 0)
+
+    def test_index_of_points(self):
+        index = AngularIndex([Point(1, 1, 0), Point(1, -1, 0)])
+        np.testing.assert_array_equal(index.query(conicsp.Projector(2.0), (-0.1, 0.1), (0, 1)), [0])
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
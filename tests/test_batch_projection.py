@@ -0,0 +1,170 @@
+import unittest
+from math import pi, sqrt
+
+import numpy as np
+
+import conicsp
+from conicsp import Point, limit_azimuth, rot_xy, rot_yz, vectorized
+from conicsp.projection import TOLERANCE, rev
+
+
+def random_cloud(n: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-2, 2, (n,3)), rng.integers(-2, 3, n)
+
+
+class Test_Vectorized_Functions(unittest.TestCase):
+
+    def setUp(self) -> None:
+        xyz = [(0,0,0), (1,0,0), (-1,0,0), (0,1,0), (0,-1,0), (0,0,1), (0,0,-1), (0,1,1), (0,-1,1),
+               (0,1,-1), (0,-1,-1), (1,0,1), (1,0,-1), (1,1,0), (1,-1,0)]
+        xyz_random, _ = random_cloud(100)
+        self.xyz = np.vstack((np.array(xyz, dtype=float), xyz_random))
+        self.points = Point.from_xyz(*map(tuple, self.xyz))
+
+    def test_omega_matches_scalar_omega(self):
+        omega = vectorized.omega(self.xyz[:,1], self.xyz[:,2])
+        for p, w in zip(self.points, omega):
+            with self.subTest(point=p):
+                self.assertAlmostEqual(w, p.omega)
+
+    def test_phi_matches_scalar_phi_for_any_revolution(self):
+        for n in (-2, 0, 1):
+            phi = vectorized.phi(*self.xyz.T, np.full(len(self.xyz), n))
+            for p, f in zip(self.points, phi):
+                with self.subTest(point=p, rev=n):
+                    self.assertAlmostEqual(f, Point(p.x, p.y, p.z, n).phi)
+
+    def test_limiting_azimuth_matches_scalar_function(self):
+        az = np.linspace(-11*pi, 11*pi, 89)
+        for gamma in (-pi, pi, 2*pi, 4*pi, 5*pi):
+            limited = vectorized.limit_azimuth(az, gamma)
+            for a, a_lim in zip(az, limited):
+                with self.subTest(az=a, gamma=gamma):
+                    self.assertEqual(a_lim, limit_azimuth(a, gamma))
+
+    def test_revolutions_match_scalar_function(self):
+        angles = np.linspace(-7*pi, 7*pi, 57)
+        n, rest = vectorized.rev(angles)
+        for a, n_, r_ in zip(angles, n, rest):
+            self.assertEqual((n_, r_), rev(a))
+
+    def test_kappa_matches_scalar_kappa(self):
+        x = np.array([-100, -1, -0.01, 0, 0.01, 1, 100, 1, 2])
+        radius = np.array([0.0001, 1, 1000, 1, 12, 0.5, 1, 0, 0])
+        for lambda_ in (-0.5, 0.3, 0.7, 1, 3.6):
+            proj = conicsp.Projector(lambda_)
+            kappa = vectorized.kappa(x, radius, lambda_)
+            for x_, r_, k in zip(x, radius, kappa):
+                with self.subTest(x=x_, radius=r_, lambda_=lambda_):
+                    self.assertAlmostEqual(k, proj.kappa(x_, r_))
+
+    def test_kappa_for_zero_radius_and_nonpositive_x_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            vectorized.kappa(np.array([1.0, 0.0]), np.array([1.0, 0.0]), 2.0)
+
+
+class Test_Batch_Projection(unittest.TestCase):
+
+    def assert_matches_scalar_projection(
+        self,
+        proj: conicsp.Projector,
+        xyz: np.ndarray,
+        rev: np.ndarray,
+        base: np.ndarray
+    ) -> None:
+
+        images, _ = proj.points(xyz, rev, base)
+        for p, n, b, image in zip(xyz, rev, base, images):
+            expected = proj.point(Point(*p, int(n)), base=b)
+            self.assertLessEqual(np.max(np.abs(image - expected.xyz)), TOLERANCE)
+
+    def test_projection_of_random_cloud_matches_scalar_projection(self):
+        xyz, rev = random_cloud(500)
+        base = np.random.default_rng(1).uniform(-pi, pi, 500)
+        for lambda_ in (-0.5, 1.0, 2.0, 3.6):
+            with self.subTest(lambda_=lambda_):
+                self.assert_matches_scalar_projection(conicsp.Projector(lambda_), xyz, rev, base)
+
+    def test_projection_for_lambda_between_half_and_one_matches_scalar_projection(self):
+        xyz, rev = random_cloud(500)
+        xyz[:,0] = np.abs(xyz[:,0])
+        base = np.random.default_rng(1).uniform(-pi, pi, 500)
+        self.assert_matches_scalar_projection(conicsp.Projector(0.7), xyz, rev, base)
+
+    def test_scalar_base_is_shared_by_all_points(self):
+        xyz, rev = random_cloud(50)
+        proj = conicsp.Projector(2.0)
+        images, revs = proj.points(xyz, rev, pi/3)
+        images_, revs_ = proj.points(xyz, rev, np.full(50, pi/3))
+        np.testing.assert_array_equal(images, images_)
+        np.testing.assert_array_equal(revs, revs_)
+
+    def test_revolutions_default_to_zero(self):
+        xyz, _ = random_cloud(50)
+        proj = conicsp.Projector(2.0)
+        images, revs = proj.points(xyz)
+        images_, revs_ = proj.points(xyz, np.zeros(50, dtype=int))
+        np.testing.assert_array_equal(images, images_)
+        np.testing.assert_array_equal(revs, revs_)
+
+    def test_points_on_x_axis_are_projected_on_themselves_including_revolutions(self):
+        xyz = np.array([(2,0,0), (1,0,0), (0,0,0), (-1,0,0)], dtype=float)
+        for lambda_ in (0.5, 2.0):
+            images, revs = conicsp.Projector(lambda_).points(xyz, [0, 0, 0, 2])
+            np.testing.assert_allclose(images, xyz, atol=TOLERANCE)
+            np.testing.assert_array_equal(revs, [0, 0, 0, 2])
+
+    def test_points_falling_into_unobservable_section_of_the_space_are_projected_behind_origin(self):
+        xyz = np.array([(-sqrt(2)/2, -sqrt(2)/2, 0), (-sqrt(2)/2, sqrt(2)/2, 0)])
+        images, _ = conicsp.Projector(2.0).points(xyz, [1, 1], [pi, 0])
+        np.testing.assert_allclose(images[:,1], 0, atol=TOLERANCE)
+
+    def test_images_are_written_to_given_point_array(self):
+        xyz, rev = random_cloud(50)
+        proj, points = conicsp.Projector(2.0), conicsp.PointArray.from_xyz(xyz, rev)
+        out = conicsp.PointArray.empty(60)
+        images = proj.point_array(points, 0.3, out=out[5:55])
+        np.testing.assert_array_equal(out[5:55].xyz, proj.point_array(points, 0.3).xyz)
+        np.testing.assert_array_equal(images.rev, proj.point_array(points, 0.3).rev)
+        with self.assertRaises(ValueError):
+            proj.point_array(points, 0.3, out=out)
+
+    def test_empty_batch(self):
+        images, revs = conicsp.Projector(2.0).points(np.empty((0,3)))
+        self.assertEqual(images.shape, (0,3))
+        self.assertEqual(revs.shape, (0,))
+
+    def test_images_and_revolutions_agree_with_scalar_path_for_points_in_observable_section(self):
+        xyz = np.array([(0,1,0), (0,5,0), (1,1,0), (2,0,1), (-1,0,-2)], dtype=float)
+        proj = conicsp.Projector(2.0)
+        images, revs = proj.points(xyz, 0, pi/3)
+        for p, image, n in zip(xyz, images, revs):
+            with self.subTest(point=p):
+                self.assertEqual(Point(*image, int(n)), proj.point(Point(*p), base=pi/3))
+
+    def test_revolutions_differ_from_scalar_path_only_by_rounding_of_points_rotated_on_x_axis(self):
+        xyz, revs = random_cloud(2000)
+        proj, base = conicsp.Projector(2.0), 0.3
+        _, batch = proj.points(xyz, revs, base)
+        a = vectorized.align(*xyz.T, revs, base)
+        limited = vectorized.limit_azimuth(a.phi, 4*pi)
+        np.testing.assert_array_equal(batch, vectorized.rev(a.omega3 + limited)[0])
+
+        scalar, omega3, limited_ = [], [], []
+        for p, n in zip(xyz.tolist(), revs.tolist()):
+            scalar.append(proj.point(Point(*p, n), base).rev)
+            point1 = rot_yz(Point(*p, n), -base)
+            omega3.append(rot_xy(rot_yz(point1, -point1.omega), -point1.phi).omega)
+            limited_.append(limit_azimuth(point1.phi, 4*pi))
+        scalar, omega3, limited_ = np.array(scalar), np.array(omega3), np.array(limited_)
+        np.testing.assert_array_equal(scalar, vectorized.rev(omega3 + limited_)[0])
+        # in exact arithmetic the points are rotated on the positive x axis, where omega3 is zero
+        np.testing.assert_array_equal(vectorized.rev(limited)[0], vectorized.rev(limited_)[0])
+        same_rounding = a.omega3==omega3
+        np.testing.assert_array_equal(batch[same_rounding], scalar[same_rounding])
+        self.assertLessEqual(np.max(np.abs(batch - scalar)), 1)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
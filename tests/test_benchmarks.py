@@ -0,0 +1,75 @@
+import io
+import contextlib
+import os
+import tempfile
+import unittest
+
+from benchmarks import suite
+from benchmarks.__main__ import main
+
+
+def run_with(results: list[tuple[str,int,float,int]]) -> dict:
+    return {"results": [{"case": c, "size": n, "throughput": t, "peak_bytes": m} for c, n, t, m in results]}
+
+
+class Test_Benchmark_Runs(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.history = os.path.join(self.dir.name, "history.json")
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_every_case_runs_for_small_sizes(self):
+        results = suite.run(suite.cases(workers=[]), sizes=(1, 10), repeat=1, min_time=0)
+        self.assertEqual({r.case for r in results}, {c.name for c in suite.cases(workers=[])})
+        for r in results:
+            self.assertGreater(r.throughput, 0)
+            self.assertGreater(r.peak_bytes, 0)
+
+    def test_scalar_and_parallel_cases_are_limited_in_size(self):
+        scalar, parallel = suite.cases(workers=[2])[0], suite.cases(workers=[2])[-1]
+        self.assertEqual(scalar.sizes(suite.SIZES), [n for n in suite.SIZES if n<=suite.SCALAR_MAX_SIZE])
+        self.assertEqual(parallel.sizes(suite.SIZES), [n for n in suite.SIZES if n>=suite.PARALLEL_MIN_SIZE])
+
+    def test_scaling_efficiency_is_relative_to_single_worker(self):
+        results = [suite.Result("w1", 100, 1.0, 10.0, 0), suite.Result("w2", 100, 1.0, 15.0, 0)]
+        suite._set_efficiency(results, {"w1": 1, "w2": 2})
+        self.assertEqual([r.efficiency for r in results], [1.0, 0.75])
+
+    def test_runs_are_appended_to_history(self):
+        results = suite.run(suite.cases(workers=[])[:2], sizes=(10,), repeat=1, min_time=0)
+        suite.record(results, self.history)
+        suite.record(results, self.history)
+        runs = suite.load(self.history)
+        self.assertEqual(len(runs), 2)
+        self.assertEqual(runs[1]["results"][0]["case"], "Point")
+        self.assertIn("numpy", runs[1]["environment"])
+
+
+class Test_Comparison_Of_Runs(unittest.TestCase):
+
+    def test_lower_throughput_or_higher_memory_beyond_threshold_are_regressions(self):
+        baseline = run_with([("a", 1, 100.0, 10**6), ("b", 1, 100.0, 10**6), ("c", 1, 100.0, 10**6), ("d", 1, 100.0, 100)])
+        current = run_with([("a", 1, 95.0, 10**6), ("b", 1, 80.0, 10**6), ("c", 1, 100.0, 2*10**6), ("d", 1, 100.0, 1000)])
+        regressions = [c.regression for c in suite.compare(baseline, current, threshold=0.1)]
+        # the growth of a small peak memory is noise
+        self.assertEqual(regressions, [False, True, True, False])
+
+    def test_cases_missing_in_baseline_are_skipped(self):
+        comparisons = suite.compare(run_with([("a", 1, 1.0, 1)]), run_with([("a", 10, 1.0, 1), ("a", 1, 2.0, 1)]))
+        self.assertEqual([(c.case, c.size, c.throughput_ratio) for c in comparisons], [("a", 1, 2.0)])
+
+    def test_compare_command_fails_without_two_runs(self):
+        with tempfile.TemporaryDirectory() as dir:
+            history = os.path.join(dir, "history.json")
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                self.assertEqual(main(["--history", history, "compare"]), 1)
+                self.assertEqual(main(["--history", history, "run", "--sizes", "10", "--filter", "rot_yz", "--repeat", "1"]), 0)
+                self.assertEqual(main(["--history", history, "run", "--sizes", "10", "--filter", "rot_yz", "--repeat", "1"]), 0)
+                self.assertEqual(main(["--history", history, "compare", "--threshold", "0.9"]), 0)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
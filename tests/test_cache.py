@@ -0,0 +1,128 @@
+import threading
+import unittest
+
+import numpy as np
+
+import conicsp
+from conicsp import Point, PointArray
+from conicsp.cache import ProjectionCache, ENTRY_BYTES
+from conicsp.projection import TOLERANCE
+
+
+class Test_Projection_Cache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.projector = conicsp.Projector(2.0)
+        self.cache = ProjectionCache()
+        rng = np.random.default_rng(0)
+        self.points = PointArray.from_xyz(rng.normal(size=(1000,3)), rng.integers(-2, 3, 1000))
+
+    def test_cached_images_equal_projected_images(self):
+        point = Point(0.3, -0.2, 0.5, 1)
+        expected = self.projector.point(point, 0.4)
+        self.assertEqual(self.cache.point(self.projector, point, 0.4), expected)
+        self.assertEqual(self.cache.point(self.projector, point, 0.4), expected)
+        self.assertEqual((self.cache.stats.hits, self.cache.stats.misses), (1, 1))
+
+    def test_nearly_equal_points_share_image(self):
+        point = Point(0.3, -0.2, 0.5)
+        image = self.cache.point(self.projector, point, 0.4)
+        self.assertEqual(self.cache.point(self.projector, Point(0.3 + 0.1*TOLERANCE, -0.2, 0.5), 0.4), image)
+        self.assertEqual(self.cache.stats.hits, 1)
+
+    def test_images_are_keyed_by_revolutions_base_and_projection(self):
+        point = Point(0.3, -0.2, 0.5)
+        self.cache.point(self.projector, point, 0.4)
+        self.cache.point(self.projector, Point(0.3, -0.2, 0.5, 1), 0.4)
+        self.cache.point(self.projector, point, 0.5)
+        self.cache.point(conicsp.Projector(1.5), point, 0.4)
+        self.cache.point(conicsp.Projector(2.0, kappa_error=1e-9), point, 0.4)
+        self.assertEqual(self.cache.stats.hits, 0)
+        self.assertEqual(len(self.cache), 5)
+
+    def test_batch_lookup_projects_only_misses(self):
+        expected = self.projector.point_array(self.points, 0.3)
+        first = self.cache.point_array(self.projector, self.points[:600], 0.3)
+        images = self.cache.point_array(self.projector, self.points, 0.3)
+        np.testing.assert_array_equal(first.xyz, expected[:600].xyz)
+        np.testing.assert_array_equal(images.xyz, expected.xyz)
+        np.testing.assert_array_equal(images.rev, expected.rev)
+        self.assertEqual((self.cache.stats.hits, self.cache.stats.misses), (600, 1000))
+
+    def test_scalar_and_batch_lookups_share_images(self):
+        bases = np.linspace(0, 1, 1000)
+        images = self.cache.point_array(self.projector, self.points, bases)
+        for k in range(0, 1000, 37):
+            self.assertEqual(self.cache.point(self.projector, self.points[k], float(bases[k])), images[k])
+        self.assertEqual(self.cache.stats.hits, 28)
+
+    def test_least_recently_used_images_are_evicted_beyond_byte_budget(self):
+        cache = ProjectionCache(max_bytes=100*ENTRY_BYTES)
+        cache.point_array(self.projector, self.points[:100])
+        cache.point(self.projector, self.points[0])
+        cache.point_array(self.projector, self.points[100:150])
+        # the images are evicted down to seven eighths of the budget
+        self.assertEqual(len(cache), 88)
+        self.assertEqual(cache.stats.evictions, 62)
+        self.assertLessEqual(cache.stats.nbytes, 100*ENTRY_BYTES)
+        # the recently used first point is kept, the following ones are evicted
+        cache.point(self.projector, self.points[0])
+        cache.point(self.projector, self.points[1])
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (2, 151))
+
+    def test_cache_shared_by_threads(self):
+        expected = self.projector.point_array(self.points, 0.3)
+        cache = ProjectionCache(max_bytes=500*ENTRY_BYTES)
+        points, arrays = [], []
+
+        def project(seed: int) -> None:
+            for k in np.random.default_rng(seed).permutation(1000)[:300]:
+                points.append((k, cache.point(self.projector, self.points[k], 0.3)))
+            arrays.append(cache.point_array(self.projector, self.points, 0.3))
+
+        threads = [threading.Thread(target=project, args=(seed,)) for seed in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((len(points), len(arrays)), (1200, 4))
+        # the images of the scalar and batch projections differ by rounding
+        for k, image in points:
+            np.testing.assert_allclose(image.xyz, expected.xyz[k], atol=1e-12)
+        for images in arrays:
+            np.testing.assert_allclose(images.xyz, expected.xyz, atol=1e-12)
+        stats = cache.stats
+        self.assertEqual(stats.hits + stats.misses, 4*1300)
+        self.assertLessEqual(stats.entries, 500)
+
+    def test_points_beyond_range_of_keys_are_projected_without_cache(self):
+        points = PointArray.from_xyz([(2e12, 3e12, -4e12), (5e12, 1e12, 9e12), (np.nan, 0, 0), (0.3, 0.2, 0.1)])
+        expected = self.projector.point_array(points)
+        for _ in range(2):
+            images = self.cache.point_array(self.projector, points)
+            np.testing.assert_array_equal(images.xyz[[0, 1, 3]], expected.xyz[[0, 1, 3]])
+            self.assertTrue(np.all(np.isnan(images.xyz[2])))
+        self.assertEqual(len(self.cache), 1)
+        for k in (0, 1, 3):
+            self.assertEqual(self.cache.point(self.projector, points[k]), self.projector.point(points[k]))
+        self.assertEqual(self.cache.stats.hits, 2)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_cache_grows_and_keeps_images_over_many_batches(self):
+        rng = np.random.default_rng(1)
+        points = PointArray.from_xyz(rng.normal(size=(20000,3)))
+        for start in range(0, 20000, 3000):
+            self.cache.point_array(self.projector, points[start:start+3000])
+        images = self.cache.point_array(self.projector, points)
+        np.testing.assert_array_equal(images.xyz, self.projector.point_array(points).xyz)
+        self.assertEqual(self.cache.stats.hits, 20000)
+
+    def test_invalid_budget_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            ProjectionCache(max_bytes=ENTRY_BYTES - 1)
+        with self.assertRaises(ValueError):
+            ProjectionCache(quantum=0)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import conicsp
+from conicsp import PointArray, vectorized
+from conicsp.storage import PointFile, write_points, project_file
+
+
+LAMBDAS = (2.0, 1.3, 1.0, 0.8, 0.5, -1.5, 3.0)
+
+
+class Test_Single_Precision_Projection(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        xyz = rng.normal(size=(20000,3))
+        # points on the x axis and close to it
+        xyz[:100,1:] = 0
+        xyz[100:200,1:] *= 1e-6
+        self.points = PointArray.from_xyz(xyz, rev=rng.integers(-2, 3, len(xyz)))
+        self.single = self.points.astype(np.float32)
+
+    def test_images_are_within_error_envelope_of_double_precision(self):
+        for lambda_ in LAMBDAS:
+            for kappa_error in (None, 1e-9):
+                with self.subTest(lambda_=lambda_, kappa_error=kappa_error):
+                    projector = conicsp.Projector(lambda_, kappa_error=kappa_error)
+                    expected = projector.point_array(self.points, 0.3)
+                    images = projector.point_array(self.single, 0.3)
+                    self.assertEqual(images.dtype, np.float32)
+                    aligned = vectorized.align(self.points.x, self.points.y, self.points.z, self.points.rev, 0.3)
+                    kappa = vectorized.aligned_kappa(aligned, lambda_)
+                    envelope = 1e-5*self.points.r*(1 + np.abs(aligned.omega)/kappa**2)
+                    error = np.linalg.norm(images.xyz - expected.xyz, axis=1)
+                    self.assertTrue(np.all(error<=envelope))
+
+    def test_revolutions_differ_at_most_by_one_away_from_negative_x_axis(self):
+        theta = np.arccos(np.clip(self.points.x/self.points.r, -1, 1))
+        away = np.pi - theta > 1e-5
+        for lambda_ in LAMBDAS:
+            with self.subTest(lambda_=lambda_):
+                projector = conicsp.Projector(lambda_)
+                difference = projector.point_array(self.single, 0.3).rev - projector.point_array(self.points, 0.3).rev
+                self.assertLessEqual(np.abs(difference[away]).max(), 1)
+
+    def test_points_on_x_axis_are_projected_as_in_double_precision(self):
+        for lambda_ in LAMBDAS:
+            with self.subTest(lambda_=lambda_):
+                projector = conicsp.Projector(lambda_)
+                images = projector.point_array(self.single[:100], 0.3)
+                expected = projector.point_array(self.points[:100], 0.3)
+                np.testing.assert_allclose(images.xyz, expected.xyz, atol=1e-6)
+                # the revolutions depend on the sign of the rounding error of sin(2*pi*rev)
+                self.assertLessEqual(np.abs(images.rev - expected.rev).max(), 1)
+                self.assertFalse(np.any(np.isnan(projector.point_array(self.single, 0.3).xyz)))
+
+    def test_batch_of_coordinates_in_single_precision(self):
+        projector = conicsp.Projector(2.0)
+        xyz, rev = projector.points(self.points.xyz, self.points.rev, 0.3, dtype=np.float32)
+        self.assertEqual(xyz.dtype, np.float32)
+        images = projector.point_array(self.single, 0.3)
+        np.testing.assert_array_equal(xyz, images.xyz)
+        np.testing.assert_array_equal(rev, images.rev)
+
+
+class Test_Single_Precision_Point_Array(unittest.TestCase):
+
+    def test_point_array_keeps_type_of_coordinates(self):
+        points = PointArray.from_xyz(np.ones((10,3)), dtype=np.float32)
+        self.assertEqual(points.dtype, np.float32)
+        self.assertEqual(points.nbytes, 10*16)
+        self.assertEqual(points[2:5].dtype, np.float32)
+        self.assertEqual(points.astype(np.float64).dtype, np.float64)
+        self.assertIs(points.astype(np.float32), points)
+        self.assertEqual(PointArray.empty(3, np.float32).dtype, np.float32)
+
+    def test_default_type_is_double_precision(self):
+        points = PointArray(np.ones(3, dtype=np.float32), np.ones(3), np.ones(3))
+        self.assertEqual(points.dtype, np.float64)
+
+    def test_other_types_raise_value_error(self):
+        with self.assertRaises(ValueError):
+            PointArray.from_xyz(np.ones((3,3)), dtype=np.float16)
+
+
+class Test_Single_Precision_Files(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.dir.name, "source.bin")
+        self.target = os.path.join(self.dir.name, "target.bin")
+        rng = np.random.default_rng(0)
+        self.points = PointArray.from_xyz(rng.normal(size=(1000,3)), dtype=np.float32)
+        write_points(self.source, self.points, 300, np.float32)
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_chunks_keep_stored_type(self):
+        chunk = PointFile(self.source, chunk_dtype=None).chunk(0)
+        self.assertEqual(chunk.dtype, np.float32)
+        self.assertEqual(PointFile(self.source).chunk(0).dtype, np.float64)
+        np.testing.assert_array_equal(PointFile(self.source, chunk_dtype=None).read().xyz, self.points.xyz)
+
+    def test_file_projected_in_single_precision(self):
+        projector = conicsp.Projector(2.0)
+        project_file(self.source, self.target, projector, 0.3, chunk_dtype=None)
+        expected = projector.point_array(self.points, 0.3)
+        np.testing.assert_array_equal(PointFile(self.target, chunk_dtype=None).read().xyz, expected.xyz)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import itertools
+import random
+from math import pi
+
+import conicsp
+from conicsp import Point, rot_yz, rot_xy, limit_azimuth
+from conicsp.projection import project
+
+
+def project_by_chain_of_rotations(proj: conicsp.Projector, point: Point, base: float = 0) -> Point:
+    point1 = rot_yz(point, -base)
+    omega = point1.omega
+    phi = point1.phi
+    point2 = rot_yz(point1, -omega)
+    if point2.y==0:
+        kappa = 1.0
+    else:
+        kappa = proj.kappa(point2.x, abs(point2.y))
+    point3 = rot_xy(point2, -phi)
+    phi = limit_azimuth(phi, 2*pi*proj.lambda_)
+    point4 = rot_xy(point3, phi)
+    point1a = rot_yz(point4, omega/kappa)
+    return rot_yz(point1a, base)
+
+
+class Test_Fused_Projection(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(0)
+        grid = (-2, -1, 0, 1, 2)
+        self.cases = [
+            (Point(*xyz, rev), base)
+            for xyz in itertools.product(grid, grid, grid)
+            for rev in (-1, 0, 2)
+            for base in (0, -0.0, pi/2, -pi, 0.4)
+        ]
+        self.cases.extend(
+            (Point(random.uniform(-3,3), random.uniform(-3,3), random.uniform(-3,3), random.randint(-3,3)), random.uniform(-4,4))
+            for _ in range(2000)
+        )
+
+    def test_fused_projection_is_identical_to_chain_of_rotations(self):
+        for lambda_ in (-0.5, 0.3, 0.7, 1.0, 2.0, 3.6):
+            proj = conicsp.Projector(lambda_)
+            mismatches = []
+            for point, base in self.cases:
+                expected = project_by_chain_of_rotations(proj, point, base)
+                image = proj.point(point, base)
+                if (image.x, image.y, image.z, image.rev) != (expected.x, expected.y, expected.z, expected.rev):
+                    mismatches.append((point, base))
+            with self.subTest(lambda_=lambda_):
+                self.assertEqual(mismatches, [])
+
+    def test_projecting_coordinates_returns_coordinates_and_revolutions_of_image(self):
+        proj = conicsp.Projector(2.0)
+        point = Point(-1, 0.5, 2, 1)
+        self.assertEqual(project(-1, 0.5, 2, 1, 2.0, pi/3), proj.point(point, pi/3).xyz + (proj.point(point, pi/3).rev,))
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
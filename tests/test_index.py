@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+
+import conicsp
+from conicsp import Point, PointArray
+from conicsp.index import PointIndex
+
+
+class Test_Point_Index(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.points = PointArray.from_xyz(rng.uniform(-1, 1, (3000,3)), rev=rng.integers(0, 2, 3000))
+        self.queries = PointArray.from_xyz(rng.uniform(-1.2, 1.2, (200,3)), rev=rng.integers(0, 2, 200))
+        self.index = PointIndex(self.points)
+
+    def brute_force_distances(self, query: Point) -> np.ndarray:
+        distances = np.linalg.norm(self.points.xyz - query.xyz, axis=1)
+        distances[self.points.rev!=query.rev] = np.inf
+        return distances
+
+    def test_nearest_neighbours_equal_brute_force(self):
+        distances, ids = self.index.nearest(self.queries, k=4)
+        for q in range(len(self.queries)):
+            expected = self.brute_force_distances(self.queries[q])
+            nearest = np.argsort(expected, kind="stable")[:4]
+            np.testing.assert_allclose(distances[q], expected[nearest])
+            np.testing.assert_array_equal(np.sort(ids[q]), np.sort(nearest))
+
+    def test_range_query_equals_brute_force(self):
+        found = self.index.range(self.queries, 0.15)
+        for q in range(len(self.queries)):
+            expected = self.brute_force_distances(self.queries[q])
+            self.assertEqual(set(found[q].tolist()), set(np.flatnonzero(expected<=0.15).tolist()))
+            self.assertTrue(np.all(np.diff(expected[found[q]])>=0))
+
+    def test_points_with_other_revolutions_are_not_neighbours(self):
+        index = PointIndex([Point(0, 0, 0, 1), Point(5, 0, 0, 0)])
+        distances, ids = index.nearest([Point(0, 0, 0, 0)], k=2)
+        np.testing.assert_array_equal(ids, [[1, -1]])
+        self.assertEqual(distances[0,1], np.inf)
+
+    def test_inserted_points_are_found(self):
+        index = PointIndex(self.points[:100])
+        for i in range(100, 3000, 150):
+            ids = index.insert(self.points[i:i+150])
+            self.assertEqual(ids[0], i)
+        self.assertEqual(len(index), 3000)
+        np.testing.assert_array_equal(index.nearest(self.queries, 3)[1], self.index.nearest(self.queries, 3)[1])
+
+    def test_matching_is_consistent_with_point_equality(self):
+        tolerance = conicsp.projection.TOLERANCE
+        queries = [
+            Point(self.points.x[7] + 0.5*tolerance, self.points.y[7], self.points.z[7], int(self.points.rev[7])),
+            Point(self.points.x[7] + 2*tolerance, self.points.y[7], self.points.z[7], int(self.points.rev[7])),
+            Point(self.points.x[7], self.points.y[7], self.points.z[7], int(self.points.rev[7]) + 1),
+        ]
+        matches = self.index.match(queries)
+        np.testing.assert_array_equal(matches, [7, -1, -1])
+        self.assertEqual([q==self.points[7] for q in queries], [True, False, False])
+
+    def test_empty_index(self):
+        index = PointIndex()
+        self.assertEqual(index.match([Point(0, 0, 0)]).tolist(), [-1])
+        np.testing.assert_array_equal(index.nearest([Point(0, 0, 0)])[1], [[-1]])
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
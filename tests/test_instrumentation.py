@@ -0,0 +1,128 @@
+import threading
+import unittest
+
+import numpy as np
+
+import conicsp
+from conicsp import Point, PointArray, instrumentation
+
+
+class Test_Instrumented_Projection(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        xyz = rng.normal(size=(5000,3))
+        xyz[:10,1:] = 0
+        self.points = PointArray.from_xyz(xyz, rev=rng.integers(-2, 3, 5000))
+
+    def test_recorded_projection_gives_same_images(self):
+        for lambda_ in (2.0, 0.5, -1.5):
+            for kappa_error in (None, 1e-9):
+                with self.subTest(lambda_=lambda_, kappa_error=kappa_error):
+                    projector = conicsp.Projector(lambda_, kappa_error=kappa_error)
+                    expected = projector.point_array(self.points, 0.3)
+                    points = [projector.point(p, 0.3) for p in self.points[:500]]
+                    with instrumentation.record():
+                        images = projector.point_array(self.points, 0.3)
+                        self.assertEqual([projector.point(p, 0.3) for p in self.points[:500]], points)
+                    np.testing.assert_array_equal(images.xyz, expected.xyz)
+                    np.testing.assert_array_equal(images.rev, expected.rev)
+
+    def test_scalar_and_batch_projections_record_same_counts(self):
+        projector = conicsp.Projector(2.0)
+        with instrumentation.record() as scalar:
+            for p in self.points:
+                projector.point(p, 0.3)
+        with instrumentation.record() as batch:
+            projector.point_array(self.points, 0.3)
+        self.assertEqual(scalar.points, 5000)
+        self.assertEqual(batch.points, 5000)
+        self.assertEqual(scalar.calls["kappa"], 5000)
+        self.assertEqual(batch.calls["kappa"], -(-5000//conicsp.vectorized.CHUNK_SIZE))
+        self.assertEqual(scalar.branches["zero_radius"], 10)
+        self.assertEqual(batch.branches, scalar.branches)
+        self.assertGreater(batch.branches["clamped"], 0)
+        self.assertEqual(sum(batch.revs.values()), 5000)
+        # the revolutions of the scalar and batch projections may differ in degenerate cases
+        self.assertLessEqual(sum(abs(batch.revs[r] - scalar.revs[r]) for r in batch.revs), 50)
+        self.assertEqual(sum(batch.kappa_counts), 5000)
+        self.assertAlmostEqual(batch.kappa_sum, scalar.kappa_sum)
+        self.assertTrue(all(t>0 for t in batch.seconds.values()))
+
+    def test_nothing_is_recorded_outside_of_block(self):
+        projector = conicsp.Projector(2.0)
+        with instrumentation.record() as recorder:
+            projector.point(Point(1, 1, 1))
+            with instrumentation.record() as inner:
+                projector.plan(0.5).point(Point(1, 1, 1))
+            projector.points([(1, 1, 1), (0, 1, 0)])
+        projector.point(Point(1, 1, 1))
+        self.assertIsNone(instrumentation.active.get())
+        self.assertEqual(recorder.points, 3)
+        self.assertEqual(inner.points, 1)
+
+    def test_overlapping_blocks_of_threads_record_their_own_projections(self):
+        projector = conicsp.Projector(2.0)
+        first_in, second_in, first_out = threading.Event(), threading.Event(), threading.Event()
+        recorders: dict[str, instrumentation.Recorder] = {}
+        after: dict[str, instrumentation.Recorder | None] = {}
+
+        def first() -> None:
+            with instrumentation.record() as recorders["first"]:
+                first_in.set()
+                second_in.wait(5)
+                projector.point(Point(1, 1, 1))
+            first_out.set()
+            projector.point(Point(1, 1, 1))
+            after["first"] = instrumentation.active.get()
+
+        def second() -> None:
+            first_in.wait(5)
+            with instrumentation.record() as recorders["second"]:
+                second_in.set()
+                first_out.wait(5)
+                projector.points([(1, 1, 1), (0, 1, 0)])
+            projector.point(Point(1, 1, 1))
+            after["second"] = instrumentation.active.get()
+
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        projector.point(Point(1, 1, 1))
+        self.assertEqual(recorders["first"].points, 1)
+        self.assertEqual(recorders["second"].points, 2)
+        self.assertEqual(after, {"first": None, "second": None})
+        self.assertIsNone(instrumentation.active.get())
+
+
+class Test_Export(unittest.TestCase):
+
+    def setUp(self) -> None:
+        with instrumentation.record() as self.recorder:
+            conicsp.Projector(0.5).point_array(PointArray.from_xyz([(1, 0, 0), (1, 1, 0), (-1, -1, 1)], [0, 1, 0]))
+
+    def test_dict_export(self):
+        exported = self.recorder.to_dict()
+        self.assertEqual(exported["points"], 3)
+        self.assertEqual(set(exported["stages"]), set(instrumentation.STAGES))
+        self.assertEqual(exported["branches"]["y2_zero"], 1)
+        self.assertEqual(sum(exported["revs"].values()), 3)
+        self.assertEqual(len(exported["kappa"]["counts"]), len(exported["kappa"]["buckets"]) + 1)
+
+    def test_prometheus_export(self):
+        lines = self.recorder.to_prometheus().splitlines()
+        self.assertIn("conicsp_points_total 3", lines)
+        self.assertIn('conicsp_branch_hits_total{branch="y2_zero"} 1', lines)
+        self.assertIn('conicsp_kappa_bucket{le="+Inf"} 3', lines)
+        self.assertIn("conicsp_kappa_count 3", lines)
+        buckets = [int(line.split()[-1]) for line in lines if line.startswith("conicsp_kappa_bucket")]
+        self.assertEqual(buckets, sorted(buckets))
+        for line in lines:
+            if not line.startswith("#"):
+                float(line.split()[-1])
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
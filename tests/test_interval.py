@@ -0,0 +1,173 @@
+import unittest
+from math import pi
+
+import numpy as np
+
+import conicsp
+from conicsp import PointArray, interval
+from conicsp.interval import Box, Wedge
+
+
+def _random_boxes(rng: np.random.Generator, n: int) -> Box:
+    center = rng.normal(size=(n,3))
+    size = rng.exponential(0.3, size=(n,3))
+    # boxes touching the x axis and crossing the half plane z=0, y<0
+    center[:n//8,1:] = 0
+    center[n//8:n//4,1], center[n//8:n//4,2] = -np.abs(center[n//8:n//4,1]), 0
+    low, high = center - size, center + size
+    rev = rng.integers(-2, 3, n)
+    return Box((low[:,0], high[:,0]), (low[:,1], high[:,1]), (low[:,2], high[:,2]), (rev, rev + rng.integers(0, 2, n)))
+
+
+def _points_in(rng: np.random.Generator, boxes: Box, per_box: int) -> tuple[PointArray, np.ndarray]:
+    owner = np.repeat(np.arange(len(boxes)), per_box)
+    t = rng.random((len(owner),3))
+    # include the corners of the boxes
+    t[::4] = np.round(t[::4])
+    xyz = [low[owner] + t[:,k]*(high[owner] - low[owner]) for k, (low, high) in enumerate((boxes.x, boxes.y, boxes.z))]
+    rev = rng.integers(boxes.rev[0][owner], boxes.rev[1][owner] + 1)
+    return PointArray(*xyz, rev), owner
+
+
+class Test_Interval_Functions(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.rng = np.random.default_rng(0)
+        self.boxes = _random_boxes(self.rng, 400)
+        self.points, self.owner = _points_in(self.rng, self.boxes, 50)
+
+    def assert_within(self, values, bounds, owner=None) -> None:
+        owner = self.owner if owner is None else owner
+        low, high = bounds
+        self.assertTrue(np.all(low[owner]<=values), "value below lower bound")
+        self.assertTrue(np.all(values<=high[owner]), "value above upper bound")
+
+    def test_angles_of_points_lie_within_bounds(self):
+        b = self.boxes
+        omega = np.array([p.omega for p in self.points])
+        low, high = interval.omega(b.y, b.z)
+        # the bounds are not reduced where the boxes cross the half plane z=0, y<0
+        omega = np.where(omega<low[self.owner], omega + 2*pi, omega)
+        self.assert_within(omega, (low, high))
+        self.assert_within(np.array([p.phi for p in self.points]), interval.phi(b.x, b.y, b.z, b.rev))
+
+    def test_kappa_of_points_lies_within_bounds(self):
+        b = self.boxes
+        radius = interval._distance(b.y, b.z)
+        for lambda_ in (2.0, 1.0, 0.7, -1.5):
+            for kappa_error in (None, 1e-6):
+                with self.subTest(lambda_=lambda_, kappa_error=kappa_error):
+                    projector = conicsp.Projector(lambda_, kappa_error=kappa_error)
+                    off_axis = np.hypot(self.points.y, self.points.z)>0
+                    values = projector.kappa(self.points.x[off_axis], np.hypot(self.points.y, self.points.z)[off_axis])
+                    self.assert_within(values, interval.kappa(projector, b.x, radius), self.owner[off_axis])
+
+    def test_limited_azimuth_lies_within_bounds(self):
+        phi = self.rng.uniform(-30, 30, (2, 300))
+        low, high = phi.min(axis=0), phi.max(axis=0)
+        values = np.clip(low[:,None] + (high - low)[:,None]*np.linspace(0, 1, 101), low[:,None], high[:,None])
+        for lambda_ in (3.0, 1.2, 0.5, -2.0):
+            with self.subTest(lambda_=lambda_):
+                limited = np.vectorize(conicsp.limit_azimuth)(values, 2*pi*lambda_)
+                bounds = interval.limit_azimuth((low, high), 2*pi*lambda_)
+                self.assertTrue(np.all(bounds[0][:,None]<=limited) and np.all(limited<=bounds[1][:,None]))
+
+    def test_rotated_points_lie_within_bounds(self):
+        b = self.boxes
+        for angle in (0.3, (-0.2, 0.9)):
+            with self.subTest(angle=angle):
+                samples = np.linspace(*angle, 5) if isinstance(angle, tuple) else [angle]
+                y, z = interval.rot_yz(b.y, b.z, angle)
+                x_xy, y_xy, rev = interval.rot_xy(b.x, b.y, b.z, angle)
+                for a in samples:
+                    rotated = [conicsp.rot_yz(p, a) for p in self.points]
+                    self.assert_within(np.array([p.y for p in rotated]), y)
+                    self.assert_within(np.array([p.z for p in rotated]), z)
+                    rotated = [conicsp.rot_xy(p, a) for p in self.points]
+                    self.assert_within(np.array([p.x for p in rotated]), x_xy)
+                    self.assert_within(np.array([p.y for p in rotated]), y_xy)
+                    self.assert_within(np.array([p.rev for p in rotated]), rev)
+
+
+class Test_Image_Bounds(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.rng = np.random.default_rng(1)
+        self.boxes = _random_boxes(self.rng, 400)
+        self.points, self.owner = _points_in(self.rng, self.boxes, 50)
+
+    def test_images_lie_within_image_boxes(self):
+        for lambda_ in (2.0, 1.3, 1.0, 0.5, -1.5):
+            for base in (0.0, 2.5):
+                for kappa_error in (None, 1e-6):
+                    with self.subTest(lambda_=lambda_, base=base, kappa_error=kappa_error):
+                        projector = conicsp.Projector(lambda_, kappa_error=kappa_error)
+                        images = projector.point_array(self.points, base)
+                        bounds = interval.image_box(projector, self.boxes, base)
+                        for name in ("x", "y", "z", "rev"):
+                            low, high = getattr(bounds, name)
+                            values = getattr(images, name)
+                            self.assertTrue(np.all(low[self.owner]<=values), name)
+                            self.assertTrue(np.all(values<=high[self.owner]), name)
+
+    def test_images_of_wedges_lie_within_image_wedges(self):
+        projector = conicsp.Projector(2.0)
+        wedge = Wedge.of_box(self.boxes)
+        images = projector.point_array(self.points, 0.4)
+        bounds = interval.image_wedge(projector, wedge, 0.4)
+        r = np.sqrt(images.x**2 + images.y**2 + images.z**2)
+        self.assertTrue(np.all(bounds.r[0][self.owner]<=r) and np.all(r<=bounds.r[1][self.owner]))
+        theta = np.arccos(np.clip(images.x/r, -1, 1))
+        self.assertTrue(np.all(bounds.theta[0][self.owner]<=theta) and np.all(theta<=bounds.theta[1][self.owner]))
+
+    def test_bounds_of_small_boxes_far_from_axis_are_tight(self):
+        box = Box.of_bounds((0.5, 1.0, 0.2), (0.51, 1.01, 0.21), rev=(0, 0))
+        image = interval.image_box(conicsp.Projector(2.0), box)
+        for low, high in (image.x, image.y, image.z):
+            self.assertLess(high[0] - low[0], 0.05)
+        self.assertEqual((image.rev[0][0], image.rev[1][0]), (0, 1))
+
+
+class Test_Culling(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(2)
+        # spatially coherent chunks, as of a sorted point file
+        xyz = np.cumsum(rng.normal(scale=0.05, size=(20000,3)), axis=0)
+        xyz -= xyz.mean(axis=0)
+        self.points = PointArray.from_xyz(xyz, rng.integers(0, 2, 20000))
+        self.region = Box.of_bounds((-0.5, -1.0, -1.0), (1.0, 0.5, 0.5), rev=(0, 0))
+
+    def test_visible_chunks_hold_all_images_in_region(self):
+        chunk_size = 500
+        boxes = Box.of_points(self.points, chunk_size)
+        for lambda_ in (2.0, 0.5):
+            with self.subTest(lambda_=lambda_):
+                projector = conicsp.Projector(lambda_)
+                images = projector.point_array(self.points, 0.3)
+                inside = (images.rev==0)
+                for name in "xyz":
+                    low, high = getattr(self.region, name)
+                    inside &= (getattr(images, name)>=low[0]) & (getattr(images, name)<=high[0])
+                mask = interval.visible(projector, boxes, self.region, 0.3)
+                kept = np.repeat(mask, chunk_size)
+                self.assertTrue(np.all(kept[inside]))
+                self.assertLess(np.count_nonzero(mask), len(mask))
+
+    def test_chunks_of_iterable(self):
+        chunks = [self.points[:100], self.points[100:100], self.points[100:250]]
+        boxes = Box.of_chunks(chunks)
+        self.assertEqual(len(boxes), 3)
+        self.assertTrue(boxes.empty[1])
+        np.testing.assert_array_equal(boxes.x[0][[0, 2]], Box.of_chunks([self.points[:100], self.points[100:250]]).x[0])
+        self.assertFalse(interval.visible(conicsp.Projector(2.0), boxes, Box.of_bounds((-9,)*3, (9,)*3))[1])
+
+    def test_invalid_box_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            Box.of_bounds((0, 0, 0), (1, -1, 1))
+        with self.assertRaises(ValueError):
+            Box.of_points(self.points, 0)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
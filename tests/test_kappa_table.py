@@ -0,0 +1,101 @@
+import unittest
+from math import pi
+
+import numpy as np
+
+import conicsp
+from conicsp import Point, vectorized
+from conicsp.kappa_table import KappaTable
+from conicsp.projection import TOLERANCE
+
+
+def reference_kappa(x: np.ndarray, radius: np.ndarray, lambda_: float) -> np.ndarray:
+    # well conditioned even for x much larger than radius
+    angle = np.arctan2(radius, x)
+    return lambda_*np.sin(angle/lambda_)/np.sin(angle)
+
+
+class Test_Kappa_Table(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.x = rng.uniform(-3, 3, 5000)
+        self.radius = rng.uniform(0.001, 3, 5000)
+
+    def test_error_of_tabulated_kappa_is_within_the_maximum_error(self):
+        for lambda_ in (-0.5, 0.3, 0.7, 1.0, 2.0, 3.6):
+            for max_error in (1e-6, 1e-10):
+                table = KappaTable(lambda_, max_error)
+                error = np.abs(table(self.x, self.radius) - reference_kappa(self.x, self.radius, lambda_))
+                tabulated = self.x/np.hypot(self.x, self.radius) >= table.s_min
+                with self.subTest(lambda_=lambda_, max_error=max_error):
+                    self.assertLessEqual(np.max(error[tabulated]), max_error)
+
+    def test_points_below_the_table_are_evaluated_exactly(self):
+        table = KappaTable(2.0)
+        x, radius = np.array([-10.0, -1.0, -100.0]), np.array([1.0, 0.1, 1.0])
+        np.testing.assert_array_equal(table(x, radius), vectorized.kappa(x, radius, 2.0))
+        self.assertEqual(table(-10.0, 1.0), conicsp.Projector(2.0).kappa(-10.0, 1.0))
+
+    def test_scalar_and_array_lookups_agree(self):
+        table = KappaTable(0.7)
+        values = table(self.x[:200], self.radius[:200])
+        for x, radius, value in zip(self.x[:200], self.radius[:200], values):
+            self.assertAlmostEqual(table(x, radius), value, 12)
+
+    def test_kappa_for_zero_radius_and_positive_x_is_equal_to_one(self):
+        table = KappaTable(3.6)
+        self.assertEqual(table(1.0, 0.0), 1.0)
+        np.testing.assert_array_equal(table(np.array([0.01, 100]), np.array([0.0, 0.0])), [1.0, 1.0])
+
+    def test_kappa_for_zero_radius_and_nonpositive_x_raises_value_error(self):
+        table = KappaTable(3.6)
+        for x in (0, -0.01, -100):
+            with self.subTest(x=x):
+                with self.assertRaises(ValueError):
+                    table(x, 0)
+                with self.assertRaises(ValueError):
+                    table(np.array([1.0, x]), np.array([1.0, 0.0]))
+
+    def test_unreachable_error_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            KappaTable(0.3, 1e-14, max_size=256)
+        with self.assertRaises(ValueError):
+            KappaTable(0.3, 0)
+
+
+class Test_Projecting_With_Kappa_Table(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.exact = conicsp.Projector(2.0)
+        self.tabulated = conicsp.Projector(2.0, kappa_error=1e-10)
+
+    def test_projector_kappa_uses_the_table(self):
+        self.assertIsNotNone(self.tabulated.kappa_table)
+        self.assertIsNone(self.exact.kappa_table)
+        self.assertEqual(self.tabulated.kappa(0.5, 1.0), self.tabulated.kappa_table(0.5, 1.0))
+
+    def test_projector_kappa_accepts_arrays(self):
+        x, radius = np.array([0.5, -1.0]), np.array([1.0, 2.0])
+        for proj in (self.exact, self.tabulated):
+            kappa = proj.kappa(x, radius)
+            self.assertAlmostEqual(kappa[0], self.exact.kappa(0.5, 1.0))
+            self.assertAlmostEqual(kappa[1], self.exact.kappa(-1.0, 2.0))
+
+    def test_batch_projection_with_tabulated_kappa_matches_exact_projection(self):
+        rng = np.random.default_rng(0)
+        xyz, rev = rng.uniform(-2, 2, (1000,3)), rng.integers(-2, 3, 1000)
+        images, _ = self.tabulated.points(xyz, rev, pi/3)
+        images_, _ = self.exact.points(xyz, rev, pi/3)
+        np.testing.assert_allclose(images, images_, atol=TOLERANCE)
+
+    def test_scalar_projection_with_tabulated_kappa_matches_exact_projection(self):
+        for point in Point.from_xyz((1,2,3), (-1,0.5,0.2), (0.2,-1,-1), (2,0,0)):
+            with self.subTest(point=point):
+                image, expected = self.tabulated.point(point, pi/5), self.exact.point(point, pi/5)
+                self.assertLessEqual(image - expected, TOLERANCE)
+                self.assertEqual(self.tabulated.plan(pi/5).point(point), image)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+
+import conicsp
+from conicsp import PointArray
+from conicsp.parallel import ParallelProjector
+
+
+class Test_Parallel_Projection(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.points = PointArray.from_xyz(rng.uniform(-2, 2, (1000,3)), rev=rng.integers(-2, 3, 1000))
+        self.projector = conicsp.Projector(2.0)
+
+    def assert_images_equal(self, images: PointArray, expected: PointArray) -> None:
+        np.testing.assert_array_equal(images.xyz, expected.xyz)
+        np.testing.assert_array_equal(images.rev, expected.rev)
+
+    def test_images_are_identical_to_serial_projection_in_both_modes(self):
+        expected = self.projector.point_array(self.points, 0.3)
+        for mode in ("process", "thread"):
+            with self.subTest(mode=mode):
+                with ParallelProjector(self.projector, workers=2, chunk_size=300, mode=mode) as parallel:
+                    self.assert_images_equal(parallel.point_array(self.points, 0.3), expected)
+
+    def test_images_do_not_depend_on_number_of_workers(self):
+        expected = self.projector.point_array(self.points)
+        for workers in (1, 3):
+            with self.subTest(workers=workers):
+                with ParallelProjector(self.projector, workers, chunk_size=128) as parallel:
+                    self.assert_images_equal(parallel.point_array(self.points), expected)
+
+    def test_base_plane_angles_of_points(self):
+        base = np.linspace(-3, 3, 1000)
+        expected = self.projector.point_array(self.points, base)
+        for mode in ("process", "thread"):
+            with self.subTest(mode=mode):
+                with ParallelProjector(self.projector, workers=2, chunk_size=300, mode=mode) as parallel:
+                    self.assert_images_equal(parallel.point_array(self.points, base), expected)
+                    with self.assertRaises(ValueError):
+                        parallel.point_array(self.points, base[:10])
+
+    def test_float32_points_give_float32_images(self):
+        points = self.points.astype(np.float32)
+        expected = self.projector.point_array(points, 0.3)
+        for mode in ("process", "thread"):
+            with self.subTest(mode=mode):
+                with ParallelProjector(self.projector, workers=2, chunk_size=300, mode=mode) as parallel:
+                    images = parallel.point_array(points, 0.3)
+                    self.assertEqual(images.dtype, np.float32)
+                    self.assert_images_equal(images, expected)
+                    xyz, _ = parallel.points(self.points.xyz, base=np.full(1000, 0.3), dtype=np.float32)
+                    self.assertEqual(xyz.dtype, np.float32)
+
+    def test_workers_use_kappa_table_of_projector(self):
+        projector = conicsp.Projector(2.0, kappa_error=1e-9)
+        with ParallelProjector(projector, workers=2, chunk_size=500) as parallel:
+            images, revs = parallel.points(self.points.xyz, self.points.rev)
+        expected, expected_revs = projector.points(self.points.xyz, self.points.rev)
+        np.testing.assert_array_equal(images, expected)
+        np.testing.assert_array_equal(revs, expected_revs)
+
+    def test_pool_is_reused_between_calls(self):
+        with ParallelProjector(self.projector, workers=1, mode="thread") as parallel:
+            parallel.point_array(self.points[:10])
+            pool = parallel._executor
+            parallel.point_array(self.points[10:20])
+            self.assertIs(parallel._executor, pool)
+        self.assertIsNone(parallel._executor)
+
+    def test_empty_array(self):
+        with ParallelProjector(self.projector, workers=1) as parallel:
+            self.assertEqual(len(parallel.point_array(PointArray.empty(0))), 0)
+
+    def test_invalid_mode_or_chunk_size_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            ParallelProjector(self.projector, mode="gpu")
+        with self.assertRaises(ValueError):
+            ParallelProjector(self.projector, chunk_size=0)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
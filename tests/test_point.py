@@ -0,0 +1,61 @@
+import unittest
+import pickle
+from math import pi
+
+from conicsp import Point
+
+
+class Test_Point(unittest.TestCase):
+
+    def test_point_can_be_created_from_positional_or_keyword_arguments(self):
+        self.assertEqual(Point(1, 2, 3), Point(x=1, y=2, z=3, rev=0))
+        self.assertEqual(Point(1, 2, 3, 2).rev, 2)
+        self.assertEqual(Point(1, 2, 3).xyz, (1, 2, 3))
+
+    def test_coordinates_and_revolutions_cannot_be_changed(self):
+        p = Point(1, 2, 3)
+        for attr in ("x", "y", "z", "rev"):
+            with self.subTest(attr=attr):
+                with self.assertRaises(AttributeError):
+                    setattr(p, attr, 5)
+
+    def test_point_has_no_instance_dictionary(self):
+        with self.assertRaises(AttributeError):
+            Point(1, 2, 3).__dict__
+
+    def test_angles_and_distance_are_cached(self):
+        p = Point(1, 2, 3, 1)
+        for attr in ("r", "omega", "phi"):
+            with self.subTest(attr=attr):
+                self.assertIs(getattr(p, attr), getattr(p, attr))
+
+    def test_cached_phi_includes_revolutions(self):
+        p = Point(0, 1, 0, 1)
+        p.r
+        self.assertAlmostEqual(p.phi, 5*pi/2)
+        self.assertAlmostEqual(p.phi, 5*pi/2)
+
+    def test_hash_is_given_by_exact_coordinates_and_revolutions(self):
+        self.assertEqual(hash(Point(1, 2, 3, 1)), hash(Point(1.0, 2.0, 3.0, 1)))
+        self.assertEqual(len({Point(1, 2, 3), Point(1, 2, 3), Point(1, 2, 3, 1)}), 2)
+
+    def test_repr(self):
+        self.assertEqual(repr(Point(1, 2.5, 3, -1)), "Point(x=1, y=2.5, z=3, rev=-1)")
+
+    def test_pickling(self):
+        p = Point(1, 2, 3, 1)
+        p.phi
+        q = pickle.loads(pickle.dumps(p))
+        self.assertEqual(q, p)
+        self.assertEqual(q.phi, p.phi)
+
+    def test_pattern_matching_on_coordinates(self):
+        match Point(1, 2, 3, 1):
+            case Point(x, y, z, rev):
+                self.assertEqual((x, y, z, rev), (1, 2, 3, 1))
+            case _:  # pragma: no cover
+                self.fail("Point does not match its own pattern.")
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
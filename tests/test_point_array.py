@@ -0,0 +1,100 @@
+import unittest
+from math import pi
+
+import numpy as np
+
+import conicsp
+from conicsp import Point, PointArray
+
+
+class Test_Creating_Point_Array(unittest.TestCase):
+
+    def test_point_array_from_xyz_has_contiguous_float64_coordinates_and_int32_revolutions(self):
+        points = PointArray.from_xyz([(1,2,3), (4,5,6)], rev=[0,1])
+        for column in (points.x, points.y, points.z):
+            self.assertEqual(column.dtype, np.float64)
+            self.assertTrue(column.flags.c_contiguous)
+        self.assertEqual(points.rev.dtype, np.int32)
+        np.testing.assert_array_equal(points.y, [2,5])
+        np.testing.assert_array_equal(points.rev, [0,1])
+
+    def test_revolutions_default_to_zero(self):
+        points = PointArray.from_xyz([(1,2,3), (4,5,6)])
+        np.testing.assert_array_equal(points.rev, [0,0])
+        points = PointArray([1,2], [3,4], [5,6])
+        np.testing.assert_array_equal(points.rev, [0,0])
+
+    def test_columns_of_different_lengths_raise_value_error(self):
+        with self.assertRaises(ValueError):
+            PointArray([1,2], [3,4], [5])
+
+    def test_memory_use_is_28_bytes_per_point(self):
+        points = PointArray.from_xyz(np.zeros((1000,3)))
+        self.assertEqual(points.nbytes, 28*1000)
+
+
+class Test_Converting_Between_Point_Array_And_Points(unittest.TestCase):
+
+    def test_round_trip(self):
+        points = [Point(1,2,3), Point(-1,0,0.5,2), Point(0,0,0,-1)]
+        array = PointArray.from_points(points)
+        self.assertEqual(len(array), 3)
+        self.assertEqual(array.to_points(), points)
+        self.assertEqual(list(array), points)
+
+    def test_indexing_by_integer_returns_point(self):
+        array = PointArray.from_xyz([(1,2,3), (4,5,6)], rev=[0,1])
+        self.assertEqual(array[1], Point(4,5,6,1))
+        self.assertEqual(array[-1], Point(4,5,6,1))
+        self.assertIsInstance(array[0].x, float)
+        self.assertIsInstance(array[0].rev, int)
+
+
+class Test_Slicing_Point_Array(unittest.TestCase):
+
+    def test_slice_is_a_view_of_the_original_columns(self):
+        array = PointArray.from_xyz(np.arange(30, dtype=float).reshape(10,3))
+        part = array[2:8:2]
+        self.assertEqual(len(part), 3)
+        for column, column_ in zip((part.x, part.y, part.z, part.rev), (array.x, array.y, array.z, array.rev)):
+            self.assertTrue(np.shares_memory(column, column_))
+        array.x[2] = -1
+        self.assertEqual(part[0].x, -1)
+
+    def test_indexing_by_mask_selects_points(self):
+        array = PointArray.from_xyz(np.arange(30, dtype=float).reshape(10,3))
+        np.testing.assert_array_equal(array[array.x>20].x, [21,24,27])
+
+
+class Test_Point_Array_Angles(unittest.TestCase):
+
+    def test_angles_and_distances_match_those_of_points(self):
+        rng = np.random.default_rng(0)
+        array = PointArray.from_xyz(rng.uniform(-2, 2, (50,3)), rng.integers(-2, 3, 50))
+        array = PointArray.from_points(array.to_points() + [Point(0,0,0), Point(-1,0,0,1), Point(0,-1,0)])
+        for p, r, omega, phi in zip(array, array.r, array.omega, array.phi):
+            with self.subTest(point=p):
+                self.assertAlmostEqual(r, p.r)
+                self.assertAlmostEqual(omega, p.omega)
+                self.assertAlmostEqual(phi, p.phi)
+
+    def test_xyz_is_n_by_3_array(self):
+        array = PointArray.from_xyz([(1,2,3), (4,5,6)])
+        np.testing.assert_array_equal(array.xyz, [(1,2,3), (4,5,6)])
+
+
+class Test_Projecting_Point_Array(unittest.TestCase):
+
+    def test_projecting_point_array_gives_same_result_as_projecting_coordinates(self):
+        rng = np.random.default_rng(0)
+        xyz, rev = rng.uniform(-2, 2, (100,3)), rng.integers(-2, 3, 100)
+        proj = conicsp.Projector(2.0)
+        images = proj.point_array(PointArray.from_xyz(xyz, rev), base=pi/5)
+        xyz_, rev_ = proj.points(xyz, rev, base=pi/5)
+        self.assertIsInstance(images, PointArray)
+        np.testing.assert_array_equal(images.xyz, xyz_)
+        np.testing.assert_array_equal(images.rev, rev_)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+
+from conicsp import Point, PointArray
+from conicsp.projection import TOLERANCE
+from conicsp.pointset import match, unique, intersect, difference
+
+
+def clustered_points(seed: int, n: int) -> list[Point]:
+    # groups of points closer to each other than about the tolerance
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-1, 1, (n//4, 3))
+    xyz = centers[rng.integers(0, len(centers), n)] + rng.normal(scale=0.7*TOLERANCE, size=(n,3))
+    rev = rng.integers(0, 2, n)
+    return [Point(*map(float, p), int(r)) for p, r in zip(xyz, rev)]
+
+
+class Test_Set_Operations(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.points = clustered_points(0, 400)
+        self.others = clustered_points(0, 400)[:150] + clustered_points(1, 100)
+
+    def test_unique_equals_pairwise_single_pass(self):
+        expected = []
+        for p in self.points:
+            if not any(p==k for k in expected):
+                expected.append(p)
+        self.assertEqual(unique(self.points), expected)
+        self.assertLess(len(expected), len(self.points))
+
+    def test_unique_of_long_chain_equals_pairwise_single_pass(self):
+        # each point equals its neighbours, but not the points two steps away
+        x = 0.3 + np.cumsum(np.resize([0.8, 0.6, 0.3], 900))*TOLERANCE
+        points = [Point(float(k), 0.1, 0.2) for k in x]
+        expected = []
+        for p in points:
+            if not any(p==k for k in expected):
+                expected.append(p)
+        self.assertEqual(unique(points), expected)
+        chain = PointArray.from_xyz(np.column_stack((np.arange(200000)*0.9*TOLERANCE, np.full(200000, 0.5), np.zeros(200000))))
+        np.testing.assert_array_equal(unique(chain).x, chain.x[::2])
+
+    def test_intersection_and_difference_equal_pairwise_comparison(self):
+        expected = [p for p in self.points if any(p==o for o in self.others)]
+        self.assertEqual(intersect(self.points, self.others), expected)
+        self.assertEqual(difference(self.points, self.others), [p for p in self.points if all(p!=o for o in self.others)])
+
+    def test_match_finds_nearest_equal_point(self):
+        matches = match(self.points, self.others)
+        for p, m in zip(self.points, matches):
+            equal = [k for k, o in enumerate(self.others) if p==o]
+            if not equal:
+                self.assertEqual(m, -1)
+            else:
+                self.assertEqual(m, min(equal, key=lambda k: (p - self.others[k], k)))
+
+    def test_point_arrays_give_point_arrays(self):
+        array = PointArray.from_points(self.points)
+        result = unique(array)
+        self.assertIsInstance(result, PointArray)
+        self.assertEqual(result.to_points(), unique(self.points))
+
+    def test_points_are_compared_by_distance_and_revolutions(self):
+        points = [Point(0.3, 0, 0), Point(0.3, 0.9*TOLERANCE, 0), Point(0.3, 1.1*TOLERANCE, 0), Point(0.3, 0, 0, 1)]
+        self.assertEqual([points[0]==p for p in points], [True, True, False, False])
+        self.assertEqual(unique(points), [points[0], points[2], points[3]])
+
+    def test_nonpositive_tolerance_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            unique(self.points, tolerance=0)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
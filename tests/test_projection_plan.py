@@ -0,0 +1,81 @@
+import unittest
+import dataclasses
+import random
+from math import pi, cos, sin
+
+import numpy as np
+
+import conicsp
+from conicsp import Point, ProjectionPlan
+
+
+class Test_Projection_Plan(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.proj = conicsp.Projector(2.0)
+
+    def test_plan_holds_base_rotation_and_azimuth_limit(self):
+        plan = self.proj.plan(pi/3)
+        self.assertEqual(plan.lambda_, 2.0)
+        self.assertEqual(plan.base, pi/3)
+        self.assertEqual((plan.cos_base, plan.sin_base), (cos(pi/3), sin(pi/3)))
+        self.assertEqual(plan.gamma, 4*pi)
+
+    def test_plan_is_immutable(self):
+        plan = self.proj.plan(pi/3)
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            plan.base = 0  # type: ignore
+
+    def test_projecting_point_with_plan_gives_identical_result_as_projector(self):
+        random.seed(0)
+        for lambda_ in (-0.5, 0.7, 1.0, 3.6):
+            proj = conicsp.Projector(lambda_)
+            for _ in range(200):
+                point = Point(random.uniform(-3,3), random.uniform(-3,3), random.uniform(-3,3), random.randint(-2,2))
+                base = random.choice((0, pi/2, -1.1, 2.5))
+                image, expected = proj.plan(base).point(point), proj.point(point, base)
+                self.assertEqual((image.x, image.y, image.z, image.rev), (expected.x, expected.y, expected.z, expected.rev))
+
+    def test_projecting_coordinates_with_given_azimuth_gives_identical_result_as_projector(self):
+        random.seed(0)
+        for base in (0, pi/2, -1.1, 2.5):
+            plan = self.proj.plan(base)
+            for xyz in [(random.uniform(-3,3), random.uniform(-3,3), random.uniform(-3,3)) for _ in range(100)] + [(-1,0,0)]:
+                point = Point(*xyz, 1)
+                azimuth = plan.azimuth(*xyz)
+                self.assertEqual(azimuth + 2*pi, conicsp.rot_yz(point, -base).phi)
+                expected = self.proj.point(point, base)
+                self.assertEqual(plan.coordinates(*xyz, 1), (expected.x, expected.y, expected.z, expected.rev))
+                self.assertEqual(plan.coordinates(*xyz, 1, azimuth), plan.coordinates(*xyz, 1))
+
+    def test_projecting_batch_with_plan_gives_identical_result_as_projector(self):
+        rng = np.random.default_rng(0)
+        xyz, rev = rng.uniform(-2, 2, (100,3)), rng.integers(-2, 3, 100)
+        images, revs = self.proj.plan(0.4).points(xyz, rev)
+        images_, revs_ = self.proj.points(xyz, rev, 0.4)
+        np.testing.assert_array_equal(images, images_)
+        np.testing.assert_array_equal(revs, revs_)
+
+
+class Test_Caching_Plans(unittest.TestCase):
+
+    def test_plan_for_repeated_base_is_taken_from_cache(self):
+        proj = conicsp.Projector(2.0)
+        self.assertIs(proj.plan(0.5), proj.plan(0.5))
+        self.assertIsNot(proj.plan(0.5), proj.plan(0.6))
+
+    def test_least_recently_used_plan_is_dropped_when_cache_is_full(self):
+        proj = conicsp.Projector(2.0, plan_cache_size=2)
+        plan_a, plan_b = proj.plan(0.1), proj.plan(0.2)
+        proj.plan(0.1)
+        proj.plan(0.3)
+        self.assertIs(proj.plan(0.1), plan_a)
+        self.assertIsNot(proj.plan(0.2), plan_b)
+
+    def test_plan_can_be_created_without_projector(self):
+        plan = ProjectionPlan.create(2.0, pi/4)
+        self.assertEqual(plan, conicsp.Projector(2.0).plan(pi/4))
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import conicsp
+from conicsp import PointArray
+from conicsp.raster import RasterGrid, RemapCache, RemapTable, Warper
+
+
+GRID = RasterGrid((30, 40), origin=(-2.0, -1.5, 0.3), u=(0.1, 0.0, 0.0), v=(0.0, 0.1, 0.0))
+
+
+class Test_Raster_Grid(unittest.TestCase):
+
+    def test_pixels_of_pixel_centers_are_their_rows_and_columns(self):
+        rows, cols = GRID.pixels(GRID.points(slice(None), slice(None)))
+        i, j = np.indices(GRID.shape)
+        np.testing.assert_allclose(rows, i, atol=1e-12)
+        np.testing.assert_allclose(cols, j, atol=1e-12)
+
+
+class Test_Warping(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.frame = np.random.default_rng(0).uniform(size=GRID.shape + (3,))
+
+    def test_projection_with_unit_lambda_keeps_frame(self):
+        warper = Warper(conicsp.Projector(1.0), GRID, GRID, tile_size=7)
+        np.testing.assert_array_equal(warper(self.frame, "nearest"), self.frame)
+        np.testing.assert_allclose(warper(self.frame, "bilinear"), self.frame, atol=1e-5)
+
+    def test_table_holds_source_pixels_projected_to_target_pixels(self):
+        centers = GRID.points(slice(None), slice(None)).reshape(-1, 3)
+        for lambda_ in (2.0, -1.5):
+            with self.subTest(lambda_=lambda_):
+                projector = conicsp.Projector(lambda_)
+                table = RemapTable.compute(projector, 0.5, GRID, GRID, tile_size=8)
+                # the images of points with zero revolutions have revolutions -1, 0 or 1
+                targets = PointArray.from_xyz(np.repeat(centers, 3, axis=0), np.tile([0, -1, 1], len(centers)))
+                points, valid = projector.unproject_array(targets, 0.5)
+                valid = (valid & (points.rev==0)).reshape(-1, 3)
+                single = np.count_nonzero(valid, axis=1)==1
+                self.assertTrue(np.any(single))
+                rows, cols = GRID.pixels(points.xyz[valid.ravel() & np.repeat(single, 3)])
+                np.testing.assert_allclose(table.rows.ravel()[single], rows, rtol=1e-6, atol=1e-4)
+                np.testing.assert_allclose(table.cols.ravel()[single], cols, rtol=1e-6, atol=1e-4)
+                self.assertTrue(np.all(np.isnan(table.rows.ravel()[~single])))
+
+    def test_warped_pixel_lands_at_projected_position_of_source_pixel(self):
+        projector = conicsp.Projector(-1.5)
+        image = projector.point(conicsp.Point(*GRID.points(slice(12, 13), slice(17, 18))[0,0]), 0.5)
+        u, v = (0.05, 0.0, 0.0), (0.0, 0.05, 0.0)
+        origin = tuple(image.xyz - 6*np.asarray(u) - 4*np.asarray(v))
+        target = RasterGrid((10, 12), origin, u, v)
+        frame = np.zeros(GRID.shape)
+        frame[12,17] = 1.0
+        warped = Warper(projector, GRID, target, base=0.5)(frame, "nearest")
+        self.assertEqual(warped[4,6], 1.0)
+        self.assertEqual(np.count_nonzero(warped), 1)
+
+    def test_pixels_sampling_outside_source_are_filled(self):
+        table = RemapTable(np.array([[-1.0, 0.0]], dtype=np.float32), np.array([[0.0, 50.0]], dtype=np.float32))
+        for method in ("nearest", "bilinear"):
+            with self.subTest(method=method):
+                np.testing.assert_array_equal(table.warp(np.ones((2, 2)), method, fill=-1), [[-1, -1]])
+
+    def test_bilinear_sampling_interpolates_between_pixels(self):
+        table = RemapTable(np.array([[0.5]], dtype=np.float32), np.array([[0.25]], dtype=np.float32))
+        frame = np.array([[0.0, 4.0], [8.0, 12.0]])
+        self.assertEqual(table.warp(frame, "bilinear")[0,0], 5.0)
+        self.assertEqual(table.warp(frame, "nearest")[0,0], 0.0)
+
+    def test_unknown_method_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            Warper(conicsp.Projector(), GRID, GRID)(self.frame, "cubic")
+
+    def test_tiles_computed_in_parallel_give_same_result(self):
+        projector = conicsp.Projector(2.0)
+        expected = Warper(projector, GRID, GRID)(self.frame)
+        with ThreadPoolExecutor(2) as executor:
+            warped = Warper(projector, GRID, GRID, tile_size=9, executor=executor)(self.frame)
+        np.testing.assert_array_equal(warped, expected)
+
+
+class Test_Remap_Cache(unittest.TestCase):
+
+    def test_tables_are_reused_from_memory(self):
+        cache = RemapCache()
+        table = cache.table(conicsp.Projector(2.0), 0.0, GRID, GRID)
+        self.assertIs(cache.table(conicsp.Projector(2.0), 0.0, GRID, GRID), table)
+        self.assertIsNot(cache.table(conicsp.Projector(2.0), 0.1, GRID, GRID), table)
+
+    def test_least_recently_used_table_is_dropped(self):
+        cache = RemapCache(size=1)
+        table = cache.table(conicsp.Projector(2.0), 0.0, GRID, GRID)
+        cache.table(conicsp.Projector(3.0), 0.0, GRID, GRID)
+        self.assertIsNot(cache.table(conicsp.Projector(2.0), 0.0, GRID, GRID), table)
+
+    def test_tables_are_stored_on_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            table = RemapCache(directory).table(conicsp.Projector(2.0), 0.0, GRID, GRID)
+            self.assertEqual(len(os.listdir(directory)), 1)
+            loaded = RemapCache(directory).table(conicsp.Projector(2.0), 0.0, GRID, GRID)
+            self.assertIsInstance(loaded.rows, np.memmap)
+            np.testing.assert_array_equal(loaded.rows, table.rows)
+            np.testing.assert_array_equal(loaded.cols, table.cols)
+            del loaded
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
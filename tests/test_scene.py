@@ -0,0 +1,92 @@
+import unittest
+from math import pi
+
+import numpy as np
+
+import conicsp
+from conicsp import PointArray, vectorized
+from conicsp.scene import Scene
+from conicsp.spherical import SphericalPointArray
+
+
+class Test_Scene(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        xyz = rng.normal(size=(2000,3))
+        xyz[:5,1:] = 0
+        self.points = PointArray.from_xyz(xyz, rng.integers(-2, 3, 2000))
+        self.rng = rng
+
+    def assert_images_projected(self, scene: Scene) -> None:
+        expected = scene.projector.point_array(scene.points, scene.base)
+        np.testing.assert_allclose(scene.images.xyz, expected.xyz, atol=1e-12)
+        # the revolutions are those of the limited azimuth, the cartesian projection adds the rounded angle omega3
+        # of the points rotated on the x axis
+        points = scene.points
+        aligned = vectorized.align(points.x, points.y, points.z, points.rev, scene.base)
+        limited = vectorized.limit_azimuth(aligned.phi, 2*pi*scene.projector.lambda_)
+        np.testing.assert_array_equal(scene.images.rev, vectorized.rev(limited)[0])
+        np.testing.assert_array_equal(expected.rev, vectorized.rev(aligned.omega3 + limited)[0])
+        spherical = scene.projector.point_array(SphericalPointArray.from_point_array(scene.points), scene.base)
+        np.testing.assert_array_equal(scene.images.rev, spherical.rev)
+
+    def test_images_equal_projected_images(self):
+        for lambda_ in (2.0, 0.5, -1.5):
+            for kappa_error in (None, 1e-9):
+                with self.subTest(lambda_=lambda_, kappa_error=kappa_error):
+                    self.assert_images_projected(Scene(conicsp.Projector(lambda_, kappa_error=kappa_error), self.points, 0.3))
+
+    def test_only_moved_points_are_reprojected(self):
+        scene = Scene(conicsp.Projector(2.0), self.points, 0.3)
+        self.assertEqual(scene.refresh(), 2000)
+        self.assertEqual(scene.refresh(), 0)
+        indices = [7, 100, 100, -1]
+        scene.move(indices, PointArray.from_xyz(self.rng.normal(size=(4,3)), [1, 0, -1, 2]))
+        scene.move([8], PointArray.from_xyz([(0.0, 0.0, 1.0)]))
+        self.assertEqual(scene.n_dirty, 5)
+        self.assertEqual(scene.refresh(), 4)
+        self.assertEqual(scene.points[100].rev, -1)
+        self.assert_images_projected(scene)
+        # the state of the other points is kept
+        images = scene.images.xyz
+        scene.move([1], PointArray.from_xyz([(1.0, 2.0, 3.0)]))
+        self.assertEqual(scene.n_dirty, 1)
+        self.assertEqual(scene.refresh(), 1)
+        np.testing.assert_array_equal(np.delete(scene.images.xyz, 1, axis=0), np.delete(images, 1, axis=0))
+        self.assert_images_projected(scene)
+
+    def test_base_change_reprojects_all_points(self):
+        scene = Scene(conicsp.Projector(-1.5), self.points)
+        scene.refresh()
+        kappa = scene.kappa.copy()
+        scene.base = 2.5
+        scene.move([3], PointArray.from_xyz([(1.0, 2.0, 3.0)], [1]))
+        self.assertEqual(scene.refresh(), 2000)
+        self.assert_images_projected(scene)
+        np.testing.assert_array_equal(scene.kappa[4:], kappa[4:])
+        scene.base = 2.5
+        self.assertEqual(scene.refresh(), 0)
+
+    def test_intermediate_state_equals_that_of_points(self):
+        scene = Scene(conicsp.Projector(0.5), self.points, 1.0)
+        for k in range(5, 2000, 97):
+            point = conicsp.rot_yz(self.points[k], -1.0)
+            self.assertAlmostEqual(scene.omega[k], point.omega)
+            self.assertAlmostEqual(scene.phi[k], point.phi)
+            self.assertAlmostEqual(scene.kappa[k], scene.projector.kappa(point.x, float(np.hypot(point.y, point.z))))
+
+    def test_float32_points(self):
+        scene = Scene(conicsp.Projector(2.0), self.points.astype(np.float32), 0.3)
+        self.assertEqual(scene.images.dtype, np.float32)
+        expected = scene.projector.point_array(self.points, 0.3)
+        np.testing.assert_allclose(scene.images.xyz, expected.xyz, atol=1e-5)
+
+    def test_mismatched_move_raises_value_error(self):
+        scene = Scene(conicsp.Projector(2.0), self.points)
+        with self.assertRaises(ValueError):
+            scene.move([1, 2], self.points[:1])
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import conicsp
+from conicsp import Point, PointArray
+from conicsp.service import ProjectionServer, ProjectionClient, load_test
+
+
+class Test_Projection_Service(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "conicsp.sock")
+        self.server = ProjectionServer(max_delay=0.05, max_batch_size=64)
+        await self.server.start_unix(self.path)
+        self.client = ProjectionClient(self.path, connections=2)
+        rng = np.random.default_rng(0)
+        self.points = PointArray.from_xyz(rng.normal(size=(200,3)), rng.integers(-2, 3, 200))
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.server.close()
+        self.dir.cleanup()
+
+    async def test_images_equal_those_of_projector(self):
+        projector = conicsp.Projector(2.0)
+        images = await self.client.point_array(self.points, 2.0, 0.3)
+        np.testing.assert_array_equal(images.xyz, projector.point_array(self.points, 0.3).xyz)
+        np.testing.assert_array_equal(images.rev, projector.point_array(self.points, 0.3).rev)
+        point = Point(0.3, -0.2, 0.5, 1)
+        self.assertEqual(await self.client.point(point, 0.5), conicsp.Projector(0.5).point(point))
+
+    async def test_concurrent_requests_are_projected_in_batches(self):
+        keys = [(2.0, 0.0), (2.0, 0.3), (-1.5, 0.0)]
+        requests = [self.client.point(p, *keys[k % 3]) for k, p in enumerate(self.points)]
+        images = await asyncio.gather(*requests)
+        for k, (p, image) in enumerate(zip(self.points, images)):
+            lambda_, base = keys[k % 3]
+            # the revolutions of the scalar projection may differ in degenerate cases
+            self.assertEqual(image, conicsp.Projector(lambda_).point_array(PointArray.from_points([p]), base)[0])
+        self.assertEqual(self.server.stats.requests, 200)
+        # each batch holds the points of a single lambda and base, several requests on average
+        self.assertGreaterEqual(self.server.stats.batches, 3)
+        self.assertLess(self.server.stats.batches, 50)
+        self.assertLessEqual(len(self.client._connections), 2)
+
+    async def test_batch_is_flushed_at_maximum_size(self):
+        await self.client.point_array(self.points, 2.0)
+        self.assertEqual(self.server.stats.batches, 1)
+        await asyncio.gather(*(self.client.point_array(self.points[:10], 2.0) for _ in range(13)))
+        # a batch is flushed when it reaches 70 points, the remaining 60 points after the delay
+        self.assertEqual(self.server.stats.batches, 3)
+
+    async def test_projectors_of_least_recently_requested_lambdas_are_dropped(self):
+        server = ProjectionServer(projector_cache_size=2)
+        first = server._projector(2.0)
+        server._projector(0.5)
+        self.assertIs(server._projector(2.0), first)
+        server._projector(-1.5)
+        self.assertEqual(list(server._projectors), [2.0, -1.5])
+        for k in range(100):
+            server._projector(1.0 + k/100)
+        self.assertEqual(len(server._projectors), 2)
+
+    async def test_invalid_request_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            await self.client.point(Point(1, 0, 0), 0.0)
+        self.assertEqual(await self.client.point(Point(1, 0, 0), 2.0), Point(1, 0, 0))
+
+    async def test_load_report(self):
+        report = await load_test(self.client, self.points, 2.0, (0.0, 0.3), concurrency=16)
+        self.assertEqual(len(report.latencies), 200)
+        self.assertLessEqual(report.p50, report.p99)
+        self.assertGreater(report.points_per_second, 0)
+        self.assertIn("p99", str(report))
+
+
+class Test_Projection_Service_Over_TCP(unittest.IsolatedAsyncioTestCase):
+
+    async def test_images_equal_those_of_projector(self):
+        async with ProjectionServer(max_delay=0) as server:
+            await server.start_tcp()
+            async with ProjectionClient(port=server.port) as client:
+                point = Point(-0.3, 0.2, 0.5)
+                self.assertEqual(await client.point(point, 2.0, 1.0), conicsp.Projector(2.0).point(point, 1.0))
+
+    async def test_lost_connection_raises_connection_error(self):
+        server = ProjectionServer(max_delay=10)
+        await server.start_tcp()
+        async with ProjectionClient(port=server.port) as client:
+            request = asyncio.ensure_future(client.point(Point(1, 1, 1), 2.0))
+            await asyncio.sleep(0.05)
+            server._batches.clear()
+            for connection in client._connections:
+                connection._writer.transport.abort()
+            with self.assertRaises(ConnectionError):
+                await request
+        await server.close()
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
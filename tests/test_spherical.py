@@ -0,0 +1,87 @@
+import unittest
+from math import pi
+
+import numpy as np
+
+import conicsp
+from conicsp import Point, PointArray, limit_azimuth, rot_xy, rot_yz, vectorized
+from conicsp.spherical import SphericalPoint, SphericalPointArray
+
+
+class Test_Spherical_Points(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        xyz = rng.normal(size=(3000,3))
+        xyz[:10,1:] = 0
+        self.points = PointArray.from_xyz(xyz, rev=rng.integers(-2, 3, 3000))
+        self.spherical = SphericalPointArray.from_point_array(self.points)
+
+    def test_conversion_keeps_coordinates_and_azimuth(self):
+        np.testing.assert_allclose(self.spherical.to_point_array().xyz, self.points.xyz, atol=1e-12)
+        np.testing.assert_allclose(self.spherical.phi, self.points.phi, atol=1e-12)
+        point = Point(-0.5, 0.3, -0.2, 2)
+        self.assertEqual(SphericalPoint.from_point(point).to_point(), point)
+        self.assertAlmostEqual(SphericalPoint.from_point(point).phi, point.phi)
+
+    def test_rotation_about_x_axis_equals_rotation_of_cartesian_points(self):
+        rotated = self.spherical.rotated(0.4).rotated(2.9)
+        y, z = vectorized.rot_yz(self.points.y, self.points.z, 3.3)
+        np.testing.assert_allclose(rotated.to_point_array().xyz, np.column_stack((self.points.x, y, z)), atol=1e-12)
+        np.testing.assert_allclose(rotated.phi, vectorized.phi(self.points.x, y, z, self.points.rev), atol=1e-12)
+        point = Point(0.2, 0.3, 0.4, 1)
+        self.assertEqual(SphericalPoint.from_point(point).rotated(2.0).to_point(), conicsp.rot_yz(point, 2.0))
+
+    def test_projection_equals_projection_of_cartesian_points(self):
+        for lambda_ in (2.0, 1.3, 1.0, 0.5, -1.5):
+            for base in (0.0, 2.9):
+                with self.subTest(lambda_=lambda_, base=base):
+                    projector = conicsp.Projector(lambda_)
+                    expected = projector.point_array(self.points, base)
+                    images = projector.point_array(self.spherical, base)
+                    self.assertIsInstance(images, SphericalPointArray)
+                    np.testing.assert_allclose(images.to_point_array().xyz, expected.xyz, atol=1e-9)
+                    # the revolutions of the cartesian projection depend on rounding, see the next test
+                    self.assertLessEqual(np.abs(images.rev - expected.rev).max(), 1)
+
+    def test_revolutions_of_images_are_those_of_limited_azimuth(self):
+        for lambda_ in (2.0, 0.5, -1.5):
+            for base in (0.0, 2.9):
+                with self.subTest(lambda_=lambda_, base=base):
+                    images = conicsp.Projector(lambda_).point_array(self.spherical, base)
+                    limited = vectorized.limit_azimuth(self.spherical.rotated(-base).phi, 2*pi*lambda_)
+                    np.testing.assert_array_equal(images.rev, vectorized.rev(limited)[0])
+
+    def test_revolutions_of_cartesian_images_differ_by_rounding_of_points_rotated_on_x_axis(self):
+        projector, base = conicsp.Projector(2.0), 0.3
+        images = projector.point_array(self.spherical, base)
+        differ = 0
+        for k in range(0, 3000, 3):
+            point = self.points[k]
+            point1 = rot_yz(point, -base)
+            omega3 = rot_xy(rot_yz(point1, -point1.omega), -point1.phi).omega
+            limited = limit_azimuth(point1.phi, 4*pi)
+            rounding = int(vectorized.rev(np.array([omega3 + limited]))[0][0] - images.rev[k])
+            with self.subTest(point=point):
+                self.assertEqual(projector.point(point, base).rev, images.rev[k] + rounding)
+                if omega3==0:
+                    self.assertEqual(rounding, 0)
+            differ += rounding!=0
+        # a point with positive azimuth whose rotated point rounds to the negative side of the y axis
+        point = Point(0.2, 0.7, -0.3, 0)
+        self.assertEqual(projector.point(point, base).rev, 1)
+        self.assertEqual(projector.point(SphericalPoint.from_point(point), base).rev, 0)
+        self.assertTrue(0.2 < differ/1000 < 0.35)
+
+    def test_single_point_projection_equals_array_projection(self):
+        projector = conicsp.Projector(2.0, kappa_error=1e-9)
+        images = projector.plan(0.7).point_array(self.spherical)
+        for k in range(0, 3000, 97):
+            with self.subTest(k=k):
+                image = projector.plan(0.7).point(self.spherical[k])
+                self.assertIsInstance(image, SphericalPoint)
+                self.assertEqual(image.to_point(), images[k].to_point())
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
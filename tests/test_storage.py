@@ -0,0 +1,117 @@
+import unittest
+import contextlib
+import io
+import os
+import tempfile
+
+import numpy as np
+
+import conicsp
+from conicsp import PointArray
+from conicsp.__main__ import main
+from conicsp.storage import ALIGNMENT, PointFile, PointFileWriter, project_file, write_points
+
+
+class Test_Point_File(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "points.csp")
+        rng = np.random.default_rng(0)
+        self.points = PointArray.from_xyz(rng.uniform(-2, 2, (25,3)), rev=rng.integers(-3, 4, 25))
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_round_trip(self):
+        write_points(self.path, self.points, chunk_size=10)
+        file = PointFile(self.path)
+        self.assertEqual(len(file), 25)
+        self.assertEqual(file.n_chunks, 3)
+        self.assertEqual([file.chunk_size(k) for k in range(3)], [10, 10, 5])
+        read = file.read()
+        np.testing.assert_array_equal(read.xyz, self.points.xyz)
+        np.testing.assert_array_equal(read.rev, self.points.rev)
+
+    def test_any_chunk_can_be_taken_directly(self):
+        write_points(self.path, self.points, chunk_size=10)
+        file = PointFile(self.path)
+        np.testing.assert_array_equal(file.chunk(2).xyz, self.points[20:].xyz)
+        middle, = file.chunks(1, 2)
+        np.testing.assert_array_equal(middle.rev, self.points[10:20].rev)
+
+    def test_chunks_are_views_of_mapped_file(self):
+        write_points(self.path, self.points, chunk_size=10)
+        file = PointFile(self.path)
+        chunk = file.chunk(1)
+        for column in (chunk.x, chunk.y, chunk.z, chunk.rev):
+            self.assertTrue(np.shares_memory(column, file._mmap))
+            self.assertFalse(column.flags.writeable)
+
+    def test_chunks_start_at_aligned_offsets(self):
+        write_points(self.path, self.points, chunk_size=7)
+        file = PointFile(self.path)
+        self.assertTrue(all(offset % ALIGNMENT==0 for offset, _ in file._table))
+
+    def test_coordinates_can_be_stored_as_float32(self):
+        write_points(self.path, self.points, chunk_size=10, dtype=np.float32)
+        file = PointFile(self.path)
+        self.assertEqual(file.dtype, np.float32)
+        read = file.read()
+        np.testing.assert_array_equal(read.xyz, self.points.xyz.astype(np.float32))
+        np.testing.assert_array_equal(read.rev, self.points.rev)
+
+    def test_unsupported_coordinate_type_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            PointFileWriter(self.path, np.int64)
+
+    def test_empty_file(self):
+        with PointFileWriter(self.path):
+            pass
+        file = PointFile(self.path)
+        self.assertEqual(len(file), 0)
+        self.assertEqual(list(file), [])
+        self.assertEqual(len(file.read()), 0)
+
+    def test_reading_other_file_raises_value_error(self):
+        with open(self.path, "wb") as f:
+            f.write(bytes(100))
+        with self.assertRaises(ValueError):
+            PointFile(self.path)
+
+    def test_projecting_file(self):
+        write_points(self.path, self.points, chunk_size=10)
+        target = os.path.join(self.dir.name, "images.csp")
+        project_file(self.path, target, conicsp.Projector(2.0), base=0.5)
+        images = PointFile(target)
+        self.assertEqual(images.n_chunks, 3)
+        expected, revs = conicsp.Projector(2.0).points(self.points.xyz, self.points.rev, base=0.5)
+        np.testing.assert_array_equal(images.read().xyz, expected)
+        np.testing.assert_array_equal(images.read().rev, revs)
+
+    def test_projecting_file_with_command_line(self):
+        write_points(self.path, self.points, chunk_size=10)
+        target = os.path.join(self.dir.name, "images.csp")
+        with contextlib.redirect_stderr(io.StringIO()):
+            main([self.path, "-o", target, "--lambda", "2"])
+        expected, revs = conicsp.Projector(2.0).points(self.points.xyz, self.points.rev)
+        np.testing.assert_array_equal(PointFile(target).read().xyz, expected)
+
+    def test_projecting_file_to_standard_output_as_text(self):
+        write_points(self.path, self.points, chunk_size=10)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main([self.path, "--lambda", "2", "-q"])
+        expected, revs = conicsp.Projector(2.0).points(self.points.xyz, self.points.rev)
+        np.testing.assert_allclose(np.loadtxt(io.StringIO(output.getvalue()))[:,:3], expected)
+
+    def test_closed_file_has_no_chunks(self):
+        write_points(self.path, self.points, chunk_size=10)
+        with PointFile(self.path) as points:
+            chunk = points.chunk(0)
+        self.assertEqual(points.n_chunks, 0)
+        np.testing.assert_array_equal(chunk.xyz, self.points[:10].xyz)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+import contextlib
+import io
+import itertools
+import os
+import tempfile
+from math import pi
+
+import numpy as np
+
+import conicsp
+from conicsp import PointArray
+from conicsp.__main__ import main
+from conicsp.stream import (
+    StreamStats,
+    project_chunks,
+    project_stream,
+    read_binary,
+    read_text,
+    write_binary,
+    write_text,
+)
+
+
+class Test_Projecting_Stream(unittest.TestCase):
+
+    def test_projecting_rows_in_chunks_gives_same_images_as_projecting_all_at_once(self):
+        xyz = np.random.default_rng(0).uniform(-2, 2, (25,3))
+        chunks = list(project_stream(xyz.tolist(), 2.0, base=0.3, chunk_size=10))
+        self.assertEqual([len(c) for c in chunks], [10, 10, 5])
+        images, revs = conicsp.Projector(2.0).points(xyz, base=0.3)
+        np.testing.assert_array_equal(np.vstack([c.xyz for c in chunks]), images)
+        np.testing.assert_array_equal(np.concatenate([c.rev for c in chunks]), revs)
+
+    def test_rows_may_contain_revolutions(self):
+        chunk = next(project_stream([(1, 2, 3, 1), (0, 0, 1, -2)], 1.0))
+        self.assertEqual(chunk[0], conicsp.Projector(1.0).point(conicsp.Point(1, 2, 3, 1)))
+        self.assertEqual(chunk[1].rev, conicsp.Projector(1.0).point(conicsp.Point(0, 0, 1, -2)).rev)
+
+    def test_stream_is_projected_lazily(self):
+        endless_rows = itertools.cycle([(1.0, 2.0, 3.0)])
+        chunks = project_stream(endless_rows, 2.0, chunk_size=100)
+        self.assertEqual(len(next(chunks)), 100)
+        self.assertEqual(len(next(chunks)), 100)
+
+    def test_projected_points_are_counted(self):
+        stats = StreamStats()
+        chunks = [PointArray.from_xyz(np.ones((7,3))), PointArray.from_xyz(np.ones((3,3)))]
+        list(project_chunks(chunks, conicsp.Projector(2.0), pi/2, stats))
+        self.assertEqual(stats.points, 10)
+        self.assertIn("points/s", str(stats))
+
+
+class Test_Reading_And_Writing_Points(unittest.TestCase):
+
+    def test_reading_csv_in_chunks(self):
+        file = io.StringIO("1,2,3\n4,5,6\n\n7,8,9\n")
+        stats = StreamStats()
+        chunks = list(read_text(file, chunk_size=2, delimiter=",", stats=stats))
+        np.testing.assert_array_equal(np.vstack([c.xyz for c in chunks]), [(1,2,3), (4,5,6), (7,8,9)])
+        self.assertEqual(stats.bytes_read, len(file.getvalue()))
+
+    def test_reading_whitespace_delimited_points_with_revolutions(self):
+        chunk, = read_text(io.StringIO("1 2 3 1\n4\t5 6 -2\n"))
+        np.testing.assert_array_equal(chunk.xyz, [(1,2,3), (4,5,6)])
+        np.testing.assert_array_equal(chunk.rev, [1,-2])
+
+    def test_wrong_number_of_columns_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            list(read_text(io.StringIO("1 2\n")))
+
+    def test_text_round_trip(self):
+        points = PointArray.from_xyz([(0.1, 2/3, -5e-20), (1, 2, 3)], rev=[3, -1])
+        file = io.StringIO()
+        write_text(file, points, ",")
+        file.seek(0)
+        read, = read_text(file, delimiter=",")
+        np.testing.assert_array_equal(read.xyz, points.xyz)
+        np.testing.assert_array_equal(read.rev, points.rev)
+
+    def test_binary_round_trip(self):
+        points = PointArray.from_xyz(np.random.default_rng(0).uniform(-2, 2, (10,3)), rev=np.arange(10)-5)
+        file = io.BytesIO()
+        write_binary(file, points)
+        self.assertEqual(len(file.getvalue()), 10*4*8)
+        file.seek(0)
+        chunks = list(read_binary(file, chunk_size=4, with_rev=True))
+        self.assertEqual([len(c) for c in chunks], [4, 4, 2])
+        np.testing.assert_array_equal(np.vstack([c.xyz for c in chunks]), points.xyz)
+        np.testing.assert_array_equal(np.concatenate([c.rev for c in chunks]), points.rev)
+
+    def test_reading_binary_coordinates_without_revolutions(self):
+        file = io.BytesIO(np.arange(6, dtype="<f8").tobytes())
+        chunk, = read_binary(file)
+        np.testing.assert_array_equal(chunk.xyz, [(0,1,2), (3,4,5)])
+        np.testing.assert_array_equal(chunk.rev, [0,0])
+
+    def test_incomplete_binary_record_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            list(read_binary(io.BytesIO(np.arange(5, dtype="<f8").tobytes())))
+
+
+class Test_Command_Line(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.xyz = np.random.default_rng(0).uniform(-2, 2, (50,3))
+        self.input = os.path.join(self.dir.name, "points.csv")
+        np.savetxt(self.input, self.xyz, delimiter=",")
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_projecting_csv_file_into_binary_file(self):
+        output = os.path.join(self.dir.name, "images.bin")
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            main([self.input, "-o", output, "--lambda", "2", "--base", "0.5", "--chunk-size", "16"])
+        with open(output, "rb") as file:
+            images = PointArray.from_points(p for chunk in read_binary(file, with_rev=True) for p in chunk)
+        expected, revs = conicsp.Projector(2.0).points(self.xyz, base=0.5)
+        np.testing.assert_array_equal(images.xyz, expected)
+        np.testing.assert_array_equal(images.rev, revs)
+        self.assertIn("50 points", stderr.getvalue())
+        self.assertIn("MB/s", stderr.getvalue())
+
+    def test_statistics_are_not_printed_in_quiet_mode(self):
+        output = os.path.join(self.dir.name, "images.txt")
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            main([self.input, "-o", output, "-q"])
+        self.assertEqual(stderr.getvalue(), "")
+        with open(output) as file:
+            chunk, = read_text(file)
+        np.testing.assert_allclose(chunk.xyz, self.xyz, atol=conicsp.projection.TOLERANCE)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+
+import conicsp
+from conicsp import PointArray
+from conicsp.subdivision import project_mesh, project_polyline, _distance_to_chord
+
+
+OCTAHEDRON = np.array([(1,0,0), (-1,0,0), (0,1,0), (0,-1,0), (0,0,1), (0,0,-1)], dtype=float)*1.5
+OCTAHEDRON_FACES = np.array([
+    (0,2,4), (2,1,4), (1,3,4), (3,0,4), (2,0,5), (1,2,5), (3,1,5), (0,3,5)
+])
+
+
+def edges_of(triangles: np.ndarray) -> np.ndarray:
+    return np.sort(np.stack((triangles, np.roll(triangles, -1, axis=1)), axis=2), axis=2).reshape(-1, 2)
+
+
+class Test_Polyline(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.projector = conicsp.Projector(2.0)
+        self.vertices = np.random.default_rng(3).uniform(-2, 2, (10,3))
+
+    def test_images_of_subdivided_edges_are_close_to_chords(self):
+        sources, images = project_polyline(self.vertices, self.projector, tolerance=1e-3)
+        midpoints = PointArray.from_xyz((sources.xyz[:-1] + sources.xyz[1:])/2, sources.rev[:-1])
+        deviation = _distance_to_chord(self.projector.point_array(midpoints), images[:-1], images[1:])
+        continuous = images.rev[:-1]==images.rev[1:]
+        self.assertLessEqual(deviation[continuous].max(), 1e-3)
+
+    def test_polyline_passes_through_original_vertices_in_order(self):
+        sources, _ = project_polyline(self.vertices, self.projector)
+        indices = [int(np.flatnonzero((sources.xyz==v).all(axis=1))[0]) for v in self.vertices]
+        self.assertEqual(indices, sorted(indices))
+        self.assertEqual(indices[-1], len(sources)-1)
+
+    def test_images_are_projected_sources(self):
+        sources, images = project_polyline(self.vertices, self.projector, base=0.4)
+        np.testing.assert_array_equal(images.xyz, self.projector.point_array(sources, 0.4).xyz)
+
+    def test_straight_images_are_not_subdivided(self):
+        # segments on the x axis are projected onto themselves
+        sources, _ = project_polyline([(1,0,0), (2,0,0), (3,0,0)], self.projector)
+        self.assertEqual(len(sources), 3)
+
+    def test_subdivision_is_bounded_by_max_depth(self):
+        sources, _ = project_polyline(self.vertices[:2], self.projector, tolerance=0.0, max_depth=3)
+        self.assertEqual(len(sources), 9)
+
+
+class Test_Mesh(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.projector = conicsp.Projector(2.0)
+
+    def test_subdivided_closed_mesh_has_no_cracks(self):
+        _, _, triangles = project_mesh(OCTAHEDRON, OCTAHEDRON_FACES, self.projector, tolerance=1e-2, max_depth=5)
+        self.assertGreater(len(triangles), len(OCTAHEDRON_FACES))
+        _, counts = np.unique(edges_of(triangles), axis=0, return_counts=True)
+        self.assertTrue(np.all(counts==2))
+
+    def test_orientation_of_triangles_is_kept(self):
+        sources, _, triangles = project_mesh(OCTAHEDRON, OCTAHEDRON_FACES, self.projector, tolerance=1e-2, max_depth=4)
+        a, b, c = (sources.xyz[triangles[:,k]] for k in range(3))
+        centers = (a + b + c)/3
+        outward = np.einsum("ij,ij->i", np.cross(b - a, c - a), centers)
+        self.assertTrue(np.all(outward>0))
+
+    def test_images_are_projected_vertices(self):
+        sources, images, _ = project_mesh(OCTAHEDRON, OCTAHEDRON_FACES, self.projector, base=1.0, max_depth=3)
+        np.testing.assert_array_equal(images.xyz, self.projector.point_array(sources, 1.0).xyz)
+
+    def test_shared_edges_are_split_once(self):
+        sources, _, _ = project_mesh(OCTAHEDRON, OCTAHEDRON_FACES, self.projector, tolerance=0.0, max_depth=1)
+        # each of the 12 edges of the octahedron gets a single midpoint
+        self.assertEqual(len(sources), 6 + 12)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+import conicsp
+from conicsp import PointArray
+from conicsp.sweep import Sweep, sweep
+
+
+class Test_Sweep(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        xyz = rng.uniform(-2, 2, (5000,3))
+        xyz[::10,1:] = 0
+        self.points = PointArray.from_xyz(xyz, rev=rng.integers(-2, 3, 5000))
+        self.lambdas = [0.5, 1.0, 2.5]
+        self.bases = [0.0, 1.2]
+
+    def test_images_are_identical_to_independent_projections(self):
+        xyz, revs = Sweep(self.points, self.lambdas, self.bases).arrays()
+        self.assertEqual(xyz.shape, (6, 5000, 3))
+        self.assertEqual(revs.shape, (6, 5000))
+        for m, (lambda_, base) in enumerate(Sweep(self.points, self.lambdas, self.bases).params):
+            with self.subTest(lambda_=lambda_, base=base):
+                expected, expected_revs = conicsp.Projector(lambda_).points(self.points.xyz, self.points.rev, base)
+                np.testing.assert_array_equal(xyz[m], expected)
+                np.testing.assert_array_equal(revs[m], expected_revs)
+
+    def test_parameters_are_ordered_by_base_first(self):
+        self.assertEqual(
+            Sweep(self.points, [1, 2], [0, 3]).params,
+            [(1.0, 0.0), (2.0, 0.0), (1.0, 3.0), (2.0, 3.0)]
+        )
+
+    def test_lazy_images_equal_evaluated_arrays(self):
+        s = Sweep(self.points, self.lambdas, self.bases)
+        xyz, revs = s.arrays()
+        self.assertEqual(len(s), 6)
+        for m, images in enumerate(s):
+            np.testing.assert_array_equal(images.xyz, xyz[m])
+            np.testing.assert_array_equal(images.rev, revs[m])
+        np.testing.assert_array_equal(s[-1].xyz, xyz[-1])
+        self.assertEqual(len(s[1:3]), 2)
+
+    def test_index_out_of_range_raises_index_error(self):
+        with self.assertRaises(IndexError):
+            Sweep(self.points, self.lambdas)[3]
+
+    def test_sweep_of_coordinate_array(self):
+        xyz, revs = sweep(self.points.xyz, 2.0, 0.5)
+        expected, expected_revs = conicsp.Projector(2.0).points(self.points.xyz, base=0.5)
+        np.testing.assert_array_equal(xyz[0], expected)
+        np.testing.assert_array_equal(revs[0], expected_revs)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from math import pi
+
+import numpy as np
+
+import conicsp
+from conicsp import PointArray
+from conicsp.trajectory import Trajectory, project_trajectory
+
+
+def helix(turns: float, n: int, base: float = 0.0) -> np.ndarray:
+    # circles around the origin in the plane rotated by the base angle, with z of the plane slowly growing
+    t = np.linspace(0, 2*pi*turns, n)
+    y, z = np.sin(t), np.full(n, 0.1)
+    return np.column_stack((np.cos(t), np.cos(base)*y - np.sin(base)*z, np.sin(base)*y + np.cos(base)*z))
+
+
+class Test_Trajectory(unittest.TestCase):
+
+    def test_revolutions_follow_winding_of_trajectory(self):
+        revs = Trajectory(conicsp.Projector()).unwrap(PointArray.from_xyz(helix(3, 300)))
+        t = np.linspace(0, 6*pi, 300)
+        np.testing.assert_array_equal(revs, np.floor((t+pi)/(2*pi)).astype(int))
+
+    def test_revolutions_decrease_when_winding_backwards(self):
+        trajectory = Trajectory(conicsp.Projector(1.0), rev=3)
+        revs = trajectory.unwrap(PointArray.from_xyz(helix(3, 301)[::-1]))
+        self.assertEqual(revs[0], 3)
+        self.assertEqual(trajectory.rev, 0)
+
+    def test_base_plane_angle_is_taken_into_account(self):
+        trajectory = Trajectory(conicsp.Projector(), base=1.0)
+        trajectory.extend(helix(2, 201, base=1.0))
+        self.assertEqual(trajectory.rev, 2)
+
+    def test_appending_samples_gives_same_images_as_extending(self):
+        xyz = helix(2.5, 250)
+        batch = project_trajectory(xyz, 2.0)
+        trajectory = Trajectory(conicsp.Projector(2.0))
+        images, revs = [], []
+        for p in xyz.tolist():
+            images.append(trajectory.append(*p))
+            revs.append(trajectory.rev)
+        self.assertEqual(revs, Trajectory(conicsp.Projector(2.0)).unwrap(PointArray.from_xyz(xyz)).tolist())
+        np.testing.assert_allclose([p.xyz for p in images], batch.xyz, atol=conicsp.projection.TOLERANCE)
+        self.assertEqual(len(trajectory), 250)
+        self.assertAlmostEqual(trajectory.phi, 5*pi, delta=0.1)
+
+    def test_trajectory_can_be_extended_in_parts(self):
+        xyz = helix(4, 400)
+        whole = project_trajectory(xyz, 2.0)
+        trajectory = Trajectory(conicsp.Projector(2.0))
+        parts = [trajectory.extend(xyz[i:i+70]) for i in range(0, 400, 70)]
+        np.testing.assert_array_equal(np.concatenate([p.rev for p in parts]), whole.rev)
+        np.testing.assert_array_equal(np.vstack([p.xyz for p in parts]), whole.xyz)
+
+    def test_images_equal_projected_points_with_tracked_revolutions(self):
+        xyz = helix(2, 100)
+        images = project_trajectory(xyz, 2.0, rev=-1)
+        tracked = Trajectory(conicsp.Projector(2.0), rev=-1).unwrap(PointArray.from_xyz(xyz))
+        self.assertEqual(tracked[-1], 1)
+        expected, revs = conicsp.Projector(2.0).points(xyz, tracked)
+        np.testing.assert_array_equal(images.xyz, expected)
+        np.testing.assert_array_equal(images.rev, revs)
+
+    def test_empty_trajectory(self):
+        trajectory = Trajectory(conicsp.Projector())
+        self.assertEqual(len(trajectory.extend(np.empty((0,3)))), 0)
+        self.assertIsNone(trajectory.phi)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()
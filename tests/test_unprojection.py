@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+
+import conicsp
+from conicsp import Point, PointArray, vectorized
+
+
+LAMBDAS = (2.0, 1.3, 1.0, 0.5, -1.5, 3.0)
+
+
+class Test_Unprojection(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.points = PointArray.from_xyz(rng.normal(size=(5000,3)), rev=rng.integers(-2, 3, 5000))
+
+    def test_valid_results_are_projected_to_images(self):
+        for lambda_ in LAMBDAS:
+            with self.subTest(lambda_=lambda_):
+                projector = conicsp.Projector(lambda_)
+                images = projector.point_array(self.points, 0.3)
+                sources, valid = projector.unproject_array(images, 0.3)
+                self.assertGreater(valid.mean(), 0.05)
+                again = projector.point_array(sources[valid], 0.3)
+                self.assertEqual(again.to_points(), images[valid].to_points())
+
+    def test_points_with_kept_azimuth_are_recovered(self):
+        for lambda_ in LAMBDAS:
+            with self.subTest(lambda_=lambda_):
+                projector = conicsp.Projector(lambda_)
+                images = projector.point_array(self.points, 0.3)
+                sources, valid = projector.unproject_array(images, 0.3)
+                distance = np.linalg.norm(sources.xyz - self.points.xyz, axis=1)
+                self.assertLessEqual(distance[valid].max(), conicsp.projection.TOLERANCE)
+                # the revolutions of the image may be the same for consecutive revolutions of the point
+                self.assertLessEqual(np.abs(sources.rev[valid] - self.points.rev[valid]).max(), 1)
+
+    def test_images_of_clamped_points_are_not_valid(self):
+        projector = conicsp.Projector(2.0)
+        aligned = vectorized.align(self.points.x, self.points.y, self.points.z, self.points.rev, 0.3)
+        clamped = vectorized.limit_azimuth(aligned.phi, 4*np.pi)!=aligned.phi
+        self.assertTrue(np.any(clamped))
+        _, valid = projector.unproject_array(projector.point_array(self.points, 0.3), 0.3)
+        self.assertFalse(np.any(valid & clamped))
+
+    def test_images_of_several_planes_are_not_valid(self):
+        # with lambda below one, the planes of the images turn by more than the planes of the points
+        projector = conicsp.Projector(0.5)
+        image = projector.point(Point(0.5, -1, 0.1))
+        self.assertIsNone(projector.unproject(image))
+
+    def test_images_out_of_range_are_not_valid(self):
+        # with lambda above one, the planes of the images turn by less than pi
+        projector = conicsp.Projector(2.0)
+        sources, valid = projector.unproject_array(PointArray.from_xyz([(0.9, -1.0, 1e-3)]))
+        self.assertFalse(valid[0])
+        self.assertTrue(np.isnan(sources.x[0]))
+
+    def test_scalar_unprojection(self):
+        projector = conicsp.Projector(2.0)
+        point = Point(1.0, 0.5, 0.2)
+        self.assertEqual(projector.unproject(projector.point(point, 0.1), 0.1), point)
+
+    def test_unprojection_with_kappa_table_and_plan(self):
+        projector = conicsp.Projector(2.0, kappa_error=1e-9)
+        images = projector.plan(0.3).point_array(self.points)
+        sources, valid = projector.plan(0.3).unproject_array(images)
+        self.assertGreater(valid.mean(), 0.05)
+        distance = np.linalg.norm(sources.xyz - self.points.xyz, axis=1)
+        self.assertLessEqual(distance[valid].max(), conicsp.projection.TOLERANCE)
+
+
+if __name__=="__main__":  # pragma: no cover
+    unittest.main()